@@ -4,13 +4,16 @@ from django.contrib import admin
 课程应用的管理界面配置
 """
 from django.contrib import admin
-from .models import Course, Enrollment, TeachingAssignment, Classroom, Schedule
+from .models import (
+    Course, Enrollment, TeachingAssignment, Classroom, Schedule, AdmissionRequest, Waitlist, SeatHold,
+    RegistrationWindow, LotteryEntry, TimetableJob,
+)
 
 
 @admin.register(Course)
 class CourseAdmin(admin.ModelAdmin):
     """课程模型的管理界面配置"""
-    list_display = ('name', 'code', 'course_type', 'credits', 'total_hours', 'semester', 'max_students')
+    list_display = ('name', 'code', 'course_type', 'credits', 'total_hours', 'semester', 'max_students', 'enrolled_count', 'held_count', 'seat_shards')
     search_fields = ('name', 'code')
     list_filter = ('course_type', 'semester')
     ordering = ('code',)
@@ -74,3 +77,57 @@ class ScheduleAdmin(admin.ModelAdmin):
         return obj.teaching_assignment.teacher
     
     teacher.short_description = '教师'
+
+
+@admin.register(AdmissionRequest)
+class AdmissionRequestAdmin(admin.ModelAdmin):
+    """选课排队请求模型的管理界面配置"""
+    list_display = ('student', 'course', 'status', 'reason', 'created_at', 'processed_at')
+    search_fields = ('student__name', 'course__name')
+    list_filter = ('status', 'course')
+    ordering = ('-created_at',)
+
+
+@admin.register(Waitlist)
+class WaitlistAdmin(admin.ModelAdmin):
+    """候补记录模型的管理界面配置"""
+    list_display = ('course', 'student', 'position', 'created_at')
+    search_fields = ('student__name', 'course__name')
+    list_filter = ('course',)
+    ordering = ('course', 'position')
+
+
+
+@admin.register(SeatHold)
+class SeatHoldAdmin(admin.ModelAdmin):
+    """座位预留模型的管理界面配置"""
+    list_display = ('course', 'student', 'expires_at', 'created_at')
+    search_fields = ('student__name', 'course__name')
+    list_filter = ('course',)
+    ordering = ('expires_at',)
+
+
+
+@admin.register(RegistrationWindow)
+class RegistrationWindowAdmin(admin.ModelAdmin):
+    """选课抽签批次模型的管理界面配置"""
+    list_display = ('name', 'opens_at', 'closes_at', 'status', 'seed', 'allocated_at')
+    list_filter = ('status',)
+    ordering = ('-opens_at',)
+
+
+@admin.register(LotteryEntry)
+class LotteryEntryAdmin(admin.ModelAdmin):
+    """选课抽签申请模型的管理界面配置"""
+    list_display = ('window', 'student', 'course', 'priority', 'status', 'reason', 'created_at')
+    search_fields = ('student__name', 'course__name')
+    list_filter = ('window', 'status', 'course')
+    ordering = ('window', 'course', '-priority')
+
+
+@admin.register(TimetableJob)
+class TimetableJobAdmin(admin.ModelAdmin):
+    """自动排课任务模型的管理界面配置"""
+    list_display = ('semester', 'status', 'dry_run', 'placed_count', 'time_budget', 'created_at', 'finished_at')
+    list_filter = ('status', 'semester')
+    ordering = ('-created_at',)
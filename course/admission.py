@@ -0,0 +1,143 @@
+"""
+选课批量准入逻辑
+排队准入、批量选课等场景在课程行锁内一次准入多条选课请求，
+用集合查询判重、每门课程只检查一次剩余名额，
+再用一次 bulk_create 写入选课记录并按课程调整计数
+"""
+from collections import Counter
+
+from django.db.models import Case, F, Value, When
+
+from student.models import Student
+
+from .models import Course, Enrollment
+from . import seat_slots, versions
+from .seats import refresh_available_seats
+
+# 批量准入的失败原因，与单条选课接口的错误信息保持一致
+COURSE_FULL = '该课程选课人数已达上限'
+ALREADY_ENROLLED = '该学生已经选过此课程'
+STUDENT_NOT_FOUND = '学生不存在'
+COURSE_NOT_FOUND = '课程不存在'
+
+
+def lock_courses(course_ids):
+    """按课程ID升序锁定课程行，返回 {课程ID: 课程实例}
+
+    所有批量路径都按相同顺序加锁，两个批次同时锁定多门课程时不会互相死锁；
+    必须在事务中调用
+    """
+    courses = Course.objects.select_for_update().filter(pk__in=set(course_ids)).order_by('pk')
+    return {course.pk: course for course in courses}
+
+
+def admit_batch(courses, requests):
+    """在已加锁的课程上按顺序准入一批选课请求
+
+    参数：
+    - courses: {课程ID: 已通过 lock_courses 加锁的课程实例}
+    - requests: 按准入顺序排列的 (学生ID, 课程ID) 列表，学生必须已确认存在
+
+    返回：
+    - 与 requests 一一对应的结果列表，None 表示准入成功，否则为失败原因
+    """
+    student_ids = {student_id for student_id, _ in requests}
+    enrolled = set(
+        Enrollment.objects.filter(course_id__in=list(courses), student_id__in=student_ids)
+        .values_list('student_id', 'course_id')
+    )
+    # 每门课程只计算一次剩余名额（扣除座位预留，名额已满时先回收过期预留）
+    available = {
+        course_id: refresh_available_seats(course)
+        for course_id, course in courses.items()
+    }
+    # 分片计数的课程锁定全部槽位并重新分配名额，准入期间槽位上不会有其他抢占，
+    # 剩余名额以加锁后的槽位为准
+    slots = {}
+    for course_id, course in courses.items():
+        if course.seat_shards:
+            slots[course_id] = seat_slots.rebalance_slots(course_id)
+            available[course_id] = seat_slots.free_seats(slots[course_id])
+
+    results = []
+    new_enrollments = []
+    for student_id, course_id in requests:
+        if course_id not in courses:
+            results.append(COURSE_NOT_FOUND)
+        elif (student_id, course_id) in enrolled:
+            results.append(ALREADY_ENROLLED)
+        elif available[course_id] <= 0:
+            results.append(COURSE_FULL)
+        else:
+            new_enrollments.append(Enrollment(student_id=student_id, course_id=course_id))
+            enrolled.add((student_id, course_id))
+            available[course_id] -= 1
+            results.append(None)
+
+    if new_enrollments:
+        # bulk_create 不触发 post_save 信号，需按课程显式调整计数
+        Enrollment.objects.bulk_create(new_enrollments)
+        versions.bump(versions.ENROLLMENT)
+        admitted_by_course = Counter(e.course_id for e in new_enrollments)
+        for course_id, admitted in admitted_by_course.items():
+            if course_id in slots:
+                seat_slots.fill_locked_slots(slots[course_id], 'enrolled_count', admitted)
+            courses[course_id].enrolled_count += admitted
+        _add_enrolled_counts({
+            course_id: admitted
+            for course_id, admitted in admitted_by_course.items()
+            if course_id not in slots
+        })
+    return results
+
+
+def _add_enrolled_counts(admitted_by_course):
+    """用一条 UPDATE ... CASE 语句给多门已加锁的课程增加已选人数
+
+    课程行已加锁，分片状态在事务内不会变化，无需逐门课程经过 adjust_enrolled_count 的分片判断
+    """
+    if not admitted_by_course:
+        return
+    increment = Case(
+        *[When(pk=course_id, then=Value(admitted)) for course_id, admitted in admitted_by_course.items()],
+        default=Value(0),
+    )
+    Course.objects.filter(pk__in=list(admitted_by_course)).update(
+        enrolled_count=F('enrolled_count') + increment
+    )
+
+
+def admit_students(course, student_ids):
+    """在已加锁的课程上按顺序准入一批学生，返回与 student_ids 对应的结果列表"""
+    return admit_batch({course.pk: course}, [(student_id, course.pk) for student_id in student_ids])
+
+
+def bulk_enroll(pairs):
+    """批量选课：按 (学生ID, 课程ID) 列表准入，必须在事务中调用
+
+    学生存在性用一次集合查询校验，课程按ID升序一次性加锁，
+    容量和重复选课的保证与单条选课接口一致
+
+    返回：
+    - 与 pairs 一一对应的结果列表，None 表示准入成功，否则为失败原因
+    """
+    existing_students = set(
+        Student.objects.filter(pk__in={student_id for student_id, _ in pairs})
+        .values_list('pk', flat=True)
+    )
+    courses = lock_courses(course_id for _, course_id in pairs)
+
+    results = [None] * len(pairs)
+    admissible = []
+    for index, (student_id, course_id) in enumerate(pairs):
+        if student_id not in existing_students:
+            results[index] = STUDENT_NOT_FOUND
+        elif course_id not in courses:
+            results[index] = COURSE_NOT_FOUND
+        else:
+            admissible.append(index)
+
+    batch_results = admit_batch(courses, [pairs[index] for index in admissible])
+    for index, error in zip(admissible, batch_results):
+        results[index] = error
+    return results
@@ -0,0 +1,170 @@
+"""
+选课排队准入
+排队模式下选课请求先写入 AdmissionRequest 表（持久化队列），
+由本进程内的准入工作线程按课程分组、按提交顺序分批处理：
+每批只对课程行加一次锁，并在同一事务中提交整批准入结果
+"""
+import logging
+import threading
+
+from django.conf import settings
+from django.db import close_old_connections, connection, transaction
+from django.utils import timezone
+
+from .admission import admit_students
+from .models import AdmissionRequest, Course
+
+logger = logging.getLogger(__name__)
+
+
+def get_batch_size():
+    """每批处理的请求数量"""
+    return getattr(settings, 'ENROLLMENT_QUEUE_BATCH_SIZE', 100)
+
+
+def worker_enabled():
+    """是否由本进程的准入工作线程处理队列（关闭时需运行 process_admission_queue 命令）"""
+    return getattr(settings, 'ENROLLMENT_QUEUE_WORKER', True)
+
+
+def submit(student, course, timeout=0):
+    """将选课请求写入队列，并在等待预算内等待处理结果
+
+    参数：
+    - timeout: 等待预算（秒），超时后返回仍处于排队状态的请求，由客户端轮询状态接口
+
+    返回：
+    - 最新的 AdmissionRequest 记录
+    """
+    admission_request = AdmissionRequest.objects.create(student=student, course=course)
+    if not worker_enabled():
+        return admission_request
+
+    # 先登记等待，再唤醒工作线程，避免错过本请求的完成通知
+    with _results:
+        _waiting.add(admission_request.pk)
+    try:
+        wake_worker()
+        if timeout > 0:
+            with _results:
+                _results.wait_for(lambda: admission_request.pk in _finished, timeout=timeout)
+    finally:
+        with _results:
+            _waiting.discard(admission_request.pk)
+            _finished.discard(admission_request.pk)
+    admission_request.refresh_from_db()
+    return admission_request
+
+
+def process_course_batch(course_id, batch_size=None):
+    """处理一门课程的一批待处理请求，返回本批处理的请求数量"""
+    batch_size = batch_size or get_batch_size()
+    with transaction.atomic():
+        # 每批只获取一次课程行锁
+        course = Course.objects.select_for_update().filter(pk=course_id).first()
+        if course is None:
+            return 0
+        pending = list(
+            AdmissionRequest.objects.filter(course_id=course_id, status=AdmissionRequest.STATUS_PENDING)
+            .order_by('id')[:batch_size]
+        )
+        if not pending:
+            return 0
+
+        results = admit_students(course, [item.student_id for item in pending])
+
+        processed_at = timezone.now()
+        for item, error in zip(pending, results):
+            item.status = AdmissionRequest.STATUS_REJECTED if error else AdmissionRequest.STATUS_ADMITTED
+            item.reason = error or ''
+            item.processed_at = processed_at
+        AdmissionRequest.objects.bulk_update(pending, ['status', 'reason', 'processed_at'])
+
+        processed_ids = [item.pk for item in pending]
+        transaction.on_commit(lambda: _mark_finished(processed_ids))
+    return len(pending)
+
+
+def drain(batch_size=None):
+    """处理队列中所有待处理的请求，返回处理的请求总数"""
+    total = 0
+    while True:
+        # 逐门课程处理，同一课程内按提交顺序分批准入
+        course_ids = list(
+            AdmissionRequest.objects.filter(status=AdmissionRequest.STATUS_PENDING)
+            .values_list('course_id', flat=True)
+            .order_by('course_id')
+            .distinct()
+        )
+        if not course_ids:
+            return total
+        for course_id in course_ids:
+            total += process_course_batch(course_id, batch_size)
+
+
+# ---- 本进程内的结果通知 ----
+
+_results = threading.Condition()
+_waiting = set()
+_finished = set()
+
+
+def _mark_finished(request_ids):
+    """批次提交后通知正在等待这些请求结果的请求线程"""
+    with _results:
+        done = _waiting.intersection(request_ids)
+        if done:
+            _finished.update(done)
+            _results.notify_all()
+
+
+# ---- 本进程内的准入工作线程 ----
+
+class AdmissionWorker(threading.Thread):
+    """准入工作线程：被唤醒或轮询间隔到达时处理队列中的全部请求"""
+
+    def __init__(self):
+        super().__init__(name='admission-worker', daemon=True)
+        self.wakeup = threading.Event()
+        self.stopping = threading.Event()
+
+    def run(self):
+        poll_interval = getattr(settings, 'ENROLLMENT_QUEUE_POLL_SECONDS', 1.0)
+        while not self.stopping.is_set():
+            self.wakeup.wait(timeout=poll_interval)
+            self.wakeup.clear()
+            if self.stopping.is_set():
+                break
+            try:
+                drain()
+            except Exception:
+                logger.exception('处理选课排队请求失败')
+            finally:
+                # CONN_MAX_AGE 为0时关闭本线程的数据库连接，空闲期间不占用连接
+                close_old_connections()
+        connection.close()
+
+
+_worker = None
+_worker_lock = threading.Lock()
+
+
+def wake_worker():
+    """确保本进程的准入工作线程已启动并唤醒它"""
+    global _worker
+    with _worker_lock:
+        if _worker is None or not _worker.is_alive():
+            _worker = AdmissionWorker()
+            _worker.start()
+    _worker.wakeup.set()
+
+
+def stop_worker(timeout=5):
+    """停止本进程的准入工作线程，未处理的请求保留在队列中"""
+    global _worker
+    with _worker_lock:
+        worker, _worker = _worker, None
+    if worker is not None and worker.is_alive():
+        worker.stopping.set()
+        worker.wakeup.set()
+        worker.join(timeout)
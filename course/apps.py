@@ -4,3 +4,7 @@ from django.apps import AppConfig
 class CourseConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "course"
+
+    def ready(self):
+        """注册选课计数等信号处理函数"""
+        from . import signals  # noqa: F401
@@ -0,0 +1,88 @@
+"""
+课程搜索的分面统计
+按课程类型、授课方式、学期和学分区间统计当前筛选条件下的课程数，供课程浏览页的筛选侧栏显示。
+四个分面由一条 GROUP BY 查询得到（按四个维度的组合分组后在内存中汇总），
+结果按筛选条件签名和课程表版本号缓存：翻页、切换排序不改变签名，课程表写入后版本号变化，缓存自然失效
+"""
+import hashlib
+
+from django.db.models import Case, CharField, Count, Value, When
+
+from . import response_cache, versions
+from .models import Course
+
+# 分面缓存在 RESPONSE_CACHE_TTL 中的操作名
+CACHE_NAME = 'course-facets'
+
+# 学分区间：(上界, 标签)，区间为左闭右开，超过最后一个上界的归入 CREDITS_OVERFLOW
+CREDIT_BUCKETS = (
+    (1, '0-1'),
+    (2, '1-2'),
+    (3, '2-3'),
+    (4, '3-4'),
+)
+CREDITS_OVERFLOW = '4+'
+
+# 参与分面签名的筛选参数（分页、字段裁剪等参数不影响统计结果）
+FILTER_PARAMS = (
+    'q', 'name', 'code', 'course_type', 'semester', 'teaching_method', 'min_credits', 'max_credits',
+)
+
+
+def _empty():
+    """各分面的初始计数，枚举类型的选项和学分区间即使为0也输出，侧栏选项保持稳定"""
+    return {
+        'course_type': {value: 0 for value, _ in Course.COURSE_TYPE_CHOICES},
+        'teaching_method': {value: 0 for value, _ in Course.TEACHING_METHOD_CHOICES},
+        'semester': {},
+        'credits': {label: 0 for _, label in CREDIT_BUCKETS} | {CREDITS_OVERFLOW: 0},
+    }
+
+
+def compute(queryset):
+    """用一条分组查询统计查询集的各分面计数"""
+    bucket = Case(
+        *[When(credits__lt=upper, then=Value(label)) for upper, label in CREDIT_BUCKETS],
+        default=Value(CREDITS_OVERFLOW),
+        output_field=CharField(),
+    )
+    rows = (
+        queryset.order_by()
+        .values('course_type', 'teaching_method', 'semester', credit_bucket=bucket)
+        .annotate(count=Count('id'))
+    )
+    facets = _empty()
+    for row in rows:
+        for name, value in (
+            ('course_type', row['course_type']),
+            ('teaching_method', row['teaching_method']),
+            ('semester', row['semester']),
+            ('credits', row['credit_bucket']),
+        ):
+            facets[name][value] = facets[name].get(value, 0) + row['count']
+    facets['semester'] = dict(sorted(facets['semester'].items()))
+    return facets
+
+
+def signature(request, course_version):
+    """筛选条件签名：课程表版本号加规范化后的筛选参数"""
+    params = '&'.join(sorted(
+        f'{key}={value}'
+        for key in FILTER_PARAMS
+        for value in request.query_params.getlist(key)
+    ))
+    return hashlib.sha1(f'{course_version}|{params}'.encode()).hexdigest()
+
+
+def get_facets(request, queryset, table_versions=None):
+    """返回查询集的分面计数，按筛选条件签名缓存（RESPONSE_CACHE_TTL 中配置 course-facets）"""
+    if table_versions is None or versions.COURSE not in table_versions:
+        table_versions, _ = versions.get_versions([versions.COURSE])
+    if not response_cache.get_ttl(CACHE_NAME):
+        return compute(queryset)
+    key = signature(request, table_versions[versions.COURSE])
+    facets = response_cache.get(CACHE_NAME, request, key)
+    if facets is None:
+        facets = compute(queryset)
+        response_cache.set(CACHE_NAME, request, key, facets)
+    return facets
@@ -0,0 +1,132 @@
+"""
+座位预留逻辑
+学生在确认选课前先预留座位，预留在有效期内计入课程的预留人数（held_count）；
+确认时在同一事务中删除预留并写入选课记录，名额从预留人数转到已选人数，
+过期的预留在读取课程名额时按需回收，或由 sweep_seat_holds 命令按过期时间索引批量回收
+"""
+from collections import defaultdict
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+
+from .models import Enrollment, SeatHold
+from .seats import adjust_enrolled_count, adjust_held_count, claim_seat, reclaim_expired_holds
+from .waitlist import promote_from_waitlist
+
+
+class SeatHoldError(Exception):
+    """座位预留的创建或确认失败"""
+
+
+def get_hold_ttl():
+    """座位预留的有效期"""
+    return timedelta(seconds=getattr(settings, 'SEAT_HOLD_TTL_SECONDS', 300))
+
+
+def create_hold(student, course):
+    """为学生预留课程的一个座位，返回座位预留记录
+
+    先通过条件UPDATE抢占名额（held_count 加一），再写入预留记录，
+    与条件UPDATE准入相同，避免INSERT的外键共享锁与随后的UPDATE在MySQL中形成死锁
+    """
+    with transaction.atomic():
+        if Enrollment.objects.filter(course=course, student=student).exists():
+            raise SeatHoldError('该学生已经选过此课程')
+        existing = SeatHold.objects.filter(course=course, student=student).first()
+        if existing is not None:
+            if not existing.is_expired:
+                raise SeatHoldError('该学生已预留此课程座位')
+            reclaim_expired_holds(course.pk)
+
+        if not claim_seat(course.pk, 'held_count'):
+            raise SeatHoldError('该课程选课人数已达上限')
+        try:
+            with transaction.atomic():
+                return SeatHold.objects.create(
+                    course=course,
+                    student=student,
+                    expires_at=timezone.now() + get_hold_ttl(),
+                )
+        except IntegrityError:
+            # 并发的重复预留由 (course, student) 唯一约束拦截，外层事务回滚已抢占的名额
+            raise SeatHoldError('该学生已预留此课程座位')
+
+
+def confirm_hold(hold_id):
+    """确认座位预留，在同一事务中删除预留并写入选课记录，返回选课记录
+
+    名额已在预留时占用，确认时只把一个名额从预留人数转到已选人数，不再检查课程容量
+    """
+    expired = False
+    with transaction.atomic():
+        hold = SeatHold.objects.select_for_update().filter(pk=hold_id).first()
+        if hold is None:
+            raise SeatHoldError('座位预留不存在')
+        if hold.is_expired:
+            # 过期预留在本事务中回收后再报错，回收结果需要提交
+            release_hold(hold)
+            expired = True
+        else:
+            SeatHold.objects.filter(pk=hold.pk).delete()
+            adjust_held_count(hold.course_id, -1)
+            adjust_enrolled_count(hold.course_id, 1)
+            enrollment = Enrollment(course_id=hold.course_id, student_id=hold.student_id)
+            enrollment.seat_claimed = True
+            try:
+                with transaction.atomic():
+                    enrollment.save()
+            except IntegrityError:
+                raise SeatHoldError('该学生已经选过此课程')
+    if expired:
+        raise SeatHoldError('座位预留已过期')
+    return enrollment
+
+
+def release_hold(hold):
+    """释放座位预留，名额优先转给候补名单中的学生，返回是否确实删除了预留"""
+    with transaction.atomic():
+        deleted, _ = SeatHold.objects.filter(pk=hold.pk).delete()
+        if deleted:
+            adjust_held_count(hold.course_id, -deleted)
+            promote_from_waitlist(hold.course_id)
+    return bool(deleted)
+
+
+def release_student_holds(student_id):
+    """释放学生的全部座位预留（删除学生前调用，级联删除不会扣减预留人数）"""
+    for hold in SeatHold.objects.filter(student_id=student_id):
+        release_hold(hold)
+
+
+def sweep_expired_holds(chunk_size=500, now=None):
+    """批量回收所有课程中已过期的座位预留，返回回收的数量
+
+    按 expires_at 索引分块读取过期记录，只扫描已过期的部分，不做全表扫描；
+    每块按课程分组删除并扣减计数，释放的名额优先转给候补名单中的学生
+    """
+    now = now or timezone.now()
+    total = 0
+    while True:
+        expired = list(
+            SeatHold.objects.filter(expires_at__lte=now)
+            .order_by('expires_at')
+            .values_list('pk', 'course_id')[:chunk_size]
+        )
+        if not expired:
+            return total
+
+        hold_ids_by_course = defaultdict(list)
+        for hold_id, course_id in expired:
+            hold_ids_by_course[course_id].append(hold_id)
+
+        for course_id, hold_ids in sorted(hold_ids_by_course.items()):
+            with transaction.atomic():
+                # 以实际删除的行数扣减计数，与按需回收并发执行时不会重复扣减
+                deleted, _ = SeatHold.objects.filter(course_id=course_id, pk__in=hold_ids).delete()
+                adjust_held_count(course_id, -deleted)
+                for _ in range(deleted):
+                    if promote_from_waitlist(course_id) is None:
+                        break
+            total += deleted
@@ -0,0 +1,164 @@
+"""
+选课抽签分配
+抽签准入模式下，批次开放期间的选课申请只写入 LotteryEntry；批次关闭后在一个事务中
+按课程ID升序锁定涉及的课程，每门课程的申请按优先级从高到低、同优先级内按抽签顺序排列，
+再复用批量准入逻辑（集合判重、每门课程只检查一次名额、bulk_create 写入选课记录）。
+
+抽签顺序只由种子、课程ID和申请ID决定，与申请的读取顺序和其他课程无关：
+分配前可以用 --dry-run 预览结果，分配后可以用保存的种子重新排出抽签顺序，
+校验每门课程中选上的申请都排在因名额已满而未选上的申请之前
+"""
+import random
+import secrets
+from collections import defaultdict
+
+from django.db import transaction
+from django.utils import timezone
+
+from .admission import COURSE_FULL, COURSE_NOT_FOUND, admit_batch, lock_courses
+from .models import LotteryEntry, RegistrationWindow
+
+# 按ID批量更新申请结果时每条语句包含的申请数量
+UPDATE_CHUNK_SIZE = 1000
+
+
+class LotteryError(Exception):
+    """抽签批次无法分配"""
+
+
+def get_open_window():
+    """获取当前正在接受申请的抽签批次，没有时返回None"""
+    now = timezone.now()
+    return (
+        RegistrationWindow.objects.filter(
+            status=RegistrationWindow.STATUS_OPEN,
+            opens_at__lte=now,
+            closes_at__gt=now,
+        )
+        .order_by('closes_at')
+        .first()
+    )
+
+
+def draw_order(seed, course_id, entries):
+    """返回一门课程的申请按抽签规则排列后的顺序
+
+    参数：
+    - entries: [(申请ID, 学生ID, 优先级), ...]
+
+    先按申请ID排序消除读取顺序的影响，用 (种子, 课程ID) 初始化的随机数生成器打乱，
+    再按优先级稳定排序，同优先级内保持抽签顺序
+    """
+    ordered = sorted(entries)
+    random.Random(f'{seed}:{course_id}').shuffle(ordered)
+    ordered.sort(key=lambda entry: -entry[2])
+    return ordered
+
+
+def allocate_window(window_id, seed=None, dry_run=False, force=False):
+    """为抽签批次分配名额
+
+    参数：
+    - seed: 抽签种子，默认使用批次已保存的种子，没有时随机生成
+    - dry_run: 只计算分配结果，不保存（事务回滚），用于分配前预览
+    - force: 批次尚未到截止时间时也进行分配
+
+    返回：
+    - {'seed': 种子, 'admitted': 选上数量, 'rejected': 未选上数量, 'results': {申请ID: 未选上原因或None}}
+    """
+    with transaction.atomic():
+        window = RegistrationWindow.objects.select_for_update().filter(pk=window_id).first()
+        if window is None:
+            raise LotteryError('抽签批次不存在')
+        if window.status == RegistrationWindow.STATUS_ALLOCATED:
+            raise LotteryError('该抽签批次已完成分配')
+        if window.closes_at > timezone.now() and not force:
+            raise LotteryError('该抽签批次尚未截止')
+        if seed is None:
+            seed = window.seed if window.seed is not None else secrets.randbits(63)
+
+        entries_by_course = defaultdict(list)
+        entries = LotteryEntry.objects.filter(window=window, status=LotteryEntry.STATUS_PENDING)
+        for entry_id, student_id, course_id, priority in entries.values_list(
+            'pk', 'student_id', 'course_id', 'priority'
+        ):
+            entries_by_course[course_id].append((entry_id, student_id, priority))
+
+        # 所有涉及的课程按ID升序一次性加锁
+        courses = lock_courses(entries_by_course)
+        results = {}
+        for course_id in sorted(entries_by_course):
+            ordered = draw_order(seed, course_id, entries_by_course[course_id])
+            if course_id not in courses:
+                results.update((entry_id, COURSE_NOT_FOUND) for entry_id, _, _ in ordered)
+                continue
+            errors = admit_batch(
+                {course_id: courses[course_id]},
+                [(student_id, course_id) for _, student_id, _ in ordered],
+            )
+            results.update((entry_id, error) for (entry_id, _, _), error in zip(ordered, errors))
+
+        if dry_run:
+            transaction.set_rollback(True)
+        else:
+            _save_results(results)
+            window.status = RegistrationWindow.STATUS_ALLOCATED
+            window.seed = seed
+            window.allocated_at = timezone.now()
+            window.save(update_fields=['status', 'seed', 'allocated_at'])
+
+    admitted = sum(1 for error in results.values() if error is None)
+    return {
+        'seed': seed,
+        'admitted': admitted,
+        'rejected': len(results) - admitted,
+        'results': results,
+    }
+
+
+def _save_results(results):
+    """按结果分组，用按ID分块的UPDATE写回申请的抽签结果"""
+    entry_ids_by_error = defaultdict(list)
+    for entry_id, error in results.items():
+        entry_ids_by_error[error].append(entry_id)
+
+    for error, entry_ids in entry_ids_by_error.items():
+        status = LotteryEntry.STATUS_REJECTED if error else LotteryEntry.STATUS_ADMITTED
+        for start in range(0, len(entry_ids), UPDATE_CHUNK_SIZE):
+            LotteryEntry.objects.filter(pk__in=entry_ids[start:start + UPDATE_CHUNK_SIZE]).update(
+                status=status,
+                reason=error or '',
+            )
+
+
+def verify_window(window_id):
+    """用保存的种子重新排出已分配批次的抽签顺序，返回分配结果与抽签顺序不一致的课程ID列表
+
+    同一课程中，选上的申请不应排在因名额已满而未选上的申请之后
+    （重复选课等其他原因未选上的申请不占用名额，不影响校验）
+    """
+    window = RegistrationWindow.objects.filter(pk=window_id).first()
+    if window is None:
+        raise LotteryError('抽签批次不存在')
+    if window.status != RegistrationWindow.STATUS_ALLOCATED:
+        raise LotteryError('该抽签批次尚未分配')
+
+    entries_by_course = defaultdict(list)
+    outcomes = {}
+    for entry_id, student_id, course_id, priority, status, reason in LotteryEntry.objects.filter(
+        window=window
+    ).values_list('pk', 'student_id', 'course_id', 'priority', 'status', 'reason'):
+        entries_by_course[course_id].append((entry_id, student_id, priority))
+        outcomes[entry_id] = (status, reason)
+
+    mismatched = []
+    for course_id in sorted(entries_by_course):
+        seen_full = False
+        for entry_id, _, _ in draw_order(window.seed, course_id, entries_by_course[course_id]):
+            status, reason = outcomes[entry_id]
+            if reason == COURSE_FULL:
+                seen_full = True
+            elif status == LotteryEntry.STATUS_ADMITTED and seen_full:
+                mismatched.append(course_id)
+                break
+    return mismatched
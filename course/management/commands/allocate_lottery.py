@@ -0,0 +1,77 @@
+"""
+选课抽签分配的管理命令
+抽签批次截止后运行，按带种子的抽签为批次中的全部申请分配名额
+
+用法：
+    python manage.py allocate_lottery                    # 分配所有已截止且未分配的批次
+    python manage.py allocate_lottery 3                  # 分配指定批次
+    python manage.py allocate_lottery 3 --seed 42        # 指定抽签种子
+    python manage.py allocate_lottery 3 --dry-run        # 只预览分配结果，不保存
+    python manage.py allocate_lottery 3 --verify         # 用保存的种子校验已分配批次的结果
+"""
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from course.lottery import LotteryError, allocate_window, verify_window
+from course.models import RegistrationWindow
+
+
+class Command(BaseCommand):
+    help = '为已截止的选课抽签批次（RegistrationWindow）分配名额'
+
+    def add_arguments(self, parser):
+        parser.add_argument('window_id', type=int, nargs='?', help='抽签批次ID，省略时处理所有已截止且未分配的批次')
+        parser.add_argument('--seed', type=int, default=None, help='抽签种子，默认使用批次保存的种子或随机生成')
+        parser.add_argument('--dry-run', action='store_true', help='只计算分配结果，不保存')
+        parser.add_argument('--force', action='store_true', help='批次尚未截止时也进行分配')
+        parser.add_argument('--verify', action='store_true', help='用保存的种子校验已分配批次的结果')
+
+    def handle(self, *args, **options):
+        window_id = options['window_id']
+        if options['verify']:
+            if window_id is None:
+                raise CommandError('--verify 需要指定抽签批次ID')
+            self._verify(window_id)
+            return
+
+        if window_id is not None:
+            window_ids = [window_id]
+        else:
+            window_ids = list(
+                RegistrationWindow.objects.filter(
+                    status=RegistrationWindow.STATUS_OPEN,
+                    closes_at__lte=timezone.now(),
+                ).order_by('closes_at').values_list('pk', flat=True)
+            )
+        for pk in window_ids:
+            self._allocate(pk, options)
+
+    def _allocate(self, window_id, options):
+        started = time.perf_counter()
+        try:
+            summary = allocate_window(
+                window_id,
+                seed=options['seed'],
+                dry_run=options['dry_run'],
+                force=options['force'],
+            )
+        except LotteryError as e:
+            raise CommandError(f'批次 {window_id}: {e}')
+        elapsed = time.perf_counter() - started
+
+        action = '预览' if options['dry_run'] else '分配'
+        self.stdout.write(self.style.SUCCESS(
+            f'批次 {window_id} {action}完成（种子 {summary["seed"]}）：'
+            f'选上 {summary["admitted"]}，未选上 {summary["rejected"]}，耗时 {elapsed:.2f}s'
+        ))
+
+    def _verify(self, window_id):
+        try:
+            mismatched = verify_window(window_id)
+        except LotteryError as e:
+            raise CommandError(f'批次 {window_id}: {e}')
+        if mismatched:
+            raise CommandError(f'批次 {window_id} 以下课程的分配结果与抽签顺序不一致：{mismatched}')
+        self.stdout.write(self.style.SUCCESS(f'批次 {window_id} 的分配结果与抽签顺序一致'))
@@ -0,0 +1,43 @@
+"""
+检查关键查询执行计划的管理命令
+对排课占用位图、课程筛选、选课列表等关键查询执行 EXPLAIN，任一查询在目标表上做全表扫描时命令失败，
+可在部署前或 CI 中运行，防止索引被误删或查询条件改变后不再命中索引
+
+用法：
+    python manage.py check_query_plans                          # 检查全部关键查询
+    python manage.py check_query_plans course_roster            # 只检查指定查询
+    python manage.py check_query_plans -v 2                     # 同时输出执行计划
+"""
+from django.core.management.base import BaseCommand, CommandError
+
+from course import query_plans
+
+
+class Command(BaseCommand):
+    help = '对关键查询执行 EXPLAIN，出现全表扫描时失败'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'names',
+            nargs='*',
+            help=f'只检查指定的查询，可选：{", ".join(query_plans.KEY_QUERIES)}',
+        )
+
+    def handle(self, *args, **options):
+        unknown = set(options['names']) - set(query_plans.KEY_QUERIES)
+        if unknown:
+            raise CommandError(f'未知的查询：{", ".join(sorted(unknown))}')
+        failed = []
+        for name, plan, scans in query_plans.check(options['names']):
+            if scans:
+                failed.append(name)
+                self.stdout.write(self.style.ERROR(f'{name}: 全表扫描'))
+                for line in scans:
+                    self.stdout.write(f'  {line}')
+            else:
+                self.stdout.write(self.style.SUCCESS(f'{name}: 使用索引'))
+            if options['verbosity'] >= 2:
+                for line in plan.splitlines():
+                    self.stdout.write(f'    {line}')
+        if failed:
+            raise CommandError(f'以下查询做了全表扫描：{", ".join(failed)}')
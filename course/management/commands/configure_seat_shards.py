@@ -0,0 +1,47 @@
+"""
+为热门课程启用或关闭分片座位计数的管理命令
+启用后该课程的座位计数分散到多个槽位行，选课请求随机选择槽位抢占座位，不再争用同一课程行
+
+用法：
+    python manage.py configure_seat_shards 12 --shards 8     # 课程12启用8个槽位（已启用时按新数量重建）
+    python manage.py configure_seat_shards 12 --shards 0     # 关闭分片，计数汇总回课程行
+"""
+from django.core.management.base import BaseCommand, CommandError
+
+from course.models import Course
+from course.seat_slots import disable_seat_shards, enable_seat_shards
+
+# 槽位数量上限，槽位过多时汇总计数和重新分配名额的开销随之增大
+MAX_SEAT_SHARDS = 64
+
+
+class Command(BaseCommand):
+    help = '为课程启用或关闭分片座位计数（CourseSeatSlot）'
+
+    def add_arguments(self, parser):
+        parser.add_argument('course_id', type=int, help='课程ID')
+        parser.add_argument(
+            '--shards',
+            type=int,
+            required=True,
+            help=f'槽位数量，0表示关闭分片（最多{MAX_SEAT_SHARDS}个）',
+        )
+
+    def handle(self, *args, **options):
+        course_id = options['course_id']
+        shards = options['shards']
+        if not 0 <= shards <= MAX_SEAT_SHARDS:
+            raise CommandError(f'--shards 必须在0到{MAX_SEAT_SHARDS}之间')
+
+        try:
+            if shards:
+                enable_seat_shards(course_id, shards)
+            else:
+                disable_seat_shards(course_id)
+        except Course.DoesNotExist:
+            raise CommandError(f'课程 {course_id} 不存在')
+
+        if shards:
+            self.stdout.write(self.style.SUCCESS(f'课程 {course_id} 已启用 {shards} 个计数槽位'))
+        else:
+            self.stdout.write(self.style.SUCCESS(f'课程 {course_id} 已关闭分片计数'))
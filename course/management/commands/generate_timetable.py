@@ -0,0 +1,76 @@
+"""
+自动排课的管理命令
+为学期中尚未排课的线下课程生成排课并写入，输出未能排入的课程及原因；
+未启用Web进程内的排课工作线程（TIMETABLE_JOB_WORKER = False）时，用 --pending 执行通过接口提交的任务
+
+用法：
+    python manage.py generate_timetable --semester 2024-2025-1
+    python manage.py generate_timetable --semester 2024-2025-1 --time-budget 30 --dry-run
+    python manage.py generate_timetable --pending
+"""
+from django.core.management.base import BaseCommand, CommandError
+
+from course import timetable
+from course.models import TimetableJob
+
+
+class Command(BaseCommand):
+    help = '为学期生成不冲突的排课（自动排课），或执行等待中的自动排课任务'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--semester',
+            help='要排课的学期',
+        )
+        parser.add_argument(
+            '--time-budget',
+            type=float,
+            default=None,
+            help='求解时间预算（秒，默认使用 TIMETABLE_TIME_BUDGET_SECONDS），超时后写入部分解',
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='只求解并输出结果，不写入排课',
+        )
+        parser.add_argument(
+            '--pending',
+            action='store_true',
+            help='执行全部等待中的自动排课任务',
+        )
+
+    def handle(self, *args, **options):
+        if options['pending']:
+            processed = timetable.run_pending()
+            self.stdout.write(self.style.SUCCESS(f'共执行 {processed} 个自动排课任务'))
+            return
+
+        if not options['semester']:
+            raise CommandError('请指定 --semester 或 --pending')
+        time_budget = options['time_budget']
+        if time_budget is not None and time_budget <= 0:
+            raise CommandError('--time-budget 必须为正数')
+
+        # 与接口提交的任务一样记录在 TimetableJob 中，在当前进程内同步执行
+        job = TimetableJob.objects.create(
+            semester=options['semester'],
+            time_budget=timetable.get_time_budget() if time_budget is None else time_budget,
+            dry_run=options['dry_run'],
+        )
+        job = timetable.run_job(job.pk)
+        if job.status == TimetableJob.STATUS_FAILED:
+            raise CommandError(f'自动排课失败：{job.error}')
+
+        if options['verbosity'] >= 2:
+            for row in job.schedules:
+                self.stdout.write(
+                    f"课程 {row['course']}  教室 {row['classroom']}  星期{row['day_of_week']} "
+                    f"第{row['start_section']}-{row['end_section']}节 {row['week_pattern']}"
+                )
+        for item in job.unplaced:
+            self.stdout.write(self.style.WARNING(f"未排入：{item['code']}（{item['reason']}）"))
+        action = '试算' if job.dry_run else '写入'
+        self.stdout.write(self.style.SUCCESS(
+            f'任务 {job.pk}：排入 {job.placed_count} 门课程，{action} {len(job.schedules)} 条排课，'
+            f'未排入 {len(job.unplaced)} 门'
+        ))
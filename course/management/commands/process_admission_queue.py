@@ -0,0 +1,50 @@
+"""
+处理选课排队请求的管理命令
+在未启用Web进程内准入工作线程（ENROLLMENT_QUEUE_WORKER = False）时，
+或需要处理重启前遗留的排队请求时使用
+
+用法：
+    python manage.py process_admission_queue                 # 处理当前全部待处理请求后退出
+    python manage.py process_admission_queue --loop          # 持续轮询处理
+    python manage.py process_admission_queue --batch-size 50
+"""
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from course import admission_queue
+
+
+class Command(BaseCommand):
+    help = '按课程分批处理选课排队请求（AdmissionRequest）'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=None,
+            help='每批处理的请求数量（默认使用 ENROLLMENT_QUEUE_BATCH_SIZE）',
+        )
+        parser.add_argument(
+            '--loop',
+            action='store_true',
+            help='持续轮询处理，直到进程被终止',
+        )
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        if batch_size is not None and batch_size <= 0:
+            raise CommandError('--batch-size 必须为正数')
+
+        if not options['loop']:
+            processed = admission_queue.drain(batch_size)
+            self.stdout.write(self.style.SUCCESS(f'共处理 {processed} 条排队请求'))
+            return
+
+        poll_interval = getattr(settings, 'ENROLLMENT_QUEUE_POLL_SECONDS', 1.0)
+        while True:
+            processed = admission_queue.drain(batch_size)
+            if processed:
+                self.stdout.write(f'处理 {processed} 条排队请求')
+            time.sleep(poll_interval)
@@ -0,0 +1,31 @@
+"""
+重建课程搜索索引的管理命令
+课程保存后会自动重建该课程的词元；批量导入（bulk_create / update）绕过了信号，导入后需要手动重建
+
+用法：
+    python manage.py rebuild_course_search_index                 # 重建全部课程
+    python manage.py rebuild_course_search_index --course 1 2    # 只重建指定课程
+"""
+from django.core.management.base import BaseCommand
+
+from course import search_index
+from course.models import Course
+
+
+class Command(BaseCommand):
+    help = '重建课程名称、代码、描述的搜索词元'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--course',
+            type=int,
+            nargs='+',
+            help='只重建指定ID的课程',
+        )
+
+    def handle(self, *args, **options):
+        queryset = Course.objects.all()
+        if options['course']:
+            queryset = queryset.filter(id__in=options['course'])
+        written = search_index.rebuild(queryset)
+        self.stdout.write(self.style.SUCCESS(f'已重建 {queryset.count()} 门课程的搜索索引，共 {written} 个词元'))
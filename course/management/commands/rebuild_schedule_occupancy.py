@@ -0,0 +1,18 @@
+"""
+重建排课占用位图的管理命令
+排课记录保存和删除、排课批量导入时会自动重算占用位图；其他绕过信号的批量写入（bulk_create / update）之后需要手动重建
+
+用法：
+    python manage.py rebuild_schedule_occupancy
+"""
+from django.core.management.base import BaseCommand
+
+from course import occupancy
+
+
+class Command(BaseCommand):
+    help = '按排课表重建教室和教师的占用位图'
+
+    def handle(self, *args, **options):
+        written = occupancy.rebuild()
+        self.stdout.write(self.style.SUCCESS(f'已重建排课占用位图，共 {written} 行'))
@@ -0,0 +1,33 @@
+"""
+查看列表和搜索接口响应缓存命中情况的管理命令
+
+用法：
+    python manage.py response_cache_stats            # 输出各操作的命中/未命中次数和命中率
+    python manage.py response_cache_stats --reset    # 输出后清零计数
+"""
+from django.core.management.base import BaseCommand
+
+from course import response_cache
+
+
+class Command(BaseCommand):
+    help = '输出列表和搜索接口响应缓存的命中/未命中次数'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--reset',
+            action='store_true',
+            help='输出后清零计数',
+        )
+
+    def handle(self, *args, **options):
+        for name, counts in response_cache.get_stats().items():
+            total = counts[response_cache.HIT] + counts[response_cache.MISS]
+            ratio = counts[response_cache.HIT] / total if total else 0
+            self.stdout.write(
+                f'{name}: 命中 {counts[response_cache.HIT]}，未命中 {counts[response_cache.MISS]}，'
+                f'有效期 {response_cache.get_ttl(name)}s，命中率 {ratio:.1%}'
+            )
+        if options['reset']:
+            response_cache.reset_stats()
+            self.stdout.write(self.style.SUCCESS('计数已清零'))
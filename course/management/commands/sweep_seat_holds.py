@@ -0,0 +1,53 @@
+"""
+回收过期座位预留的管理命令
+读取课程名额时只按需回收单门课程的过期预留，该命令用于定期（如由cron每分钟）批量回收全部过期预留
+
+用法：
+    python manage.py sweep_seat_holds                    # 回收当前全部过期预留后退出
+    python manage.py sweep_seat_holds --loop --interval 30
+    python manage.py sweep_seat_holds --chunk-size 200
+"""
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from course.holds import sweep_expired_holds
+
+
+class Command(BaseCommand):
+    help = '按过期时间索引分批回收已过期的座位预留（SeatHold），并扣减课程的预留人数'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=500,
+            help='每批处理的预留数量（默认500）',
+        )
+        parser.add_argument(
+            '--loop',
+            action='store_true',
+            help='持续定期回收，直到进程被终止',
+        )
+        parser.add_argument(
+            '--interval',
+            type=float,
+            default=60,
+            help='--loop 模式下两次回收之间的间隔秒数（默认60）',
+        )
+
+    def handle(self, *args, **options):
+        chunk_size = options['chunk_size']
+        if chunk_size <= 0:
+            raise CommandError('--chunk-size 必须为正数')
+
+        if not options['loop']:
+            released = sweep_expired_holds(chunk_size)
+            self.stdout.write(self.style.SUCCESS(f'共回收 {released} 个过期座位预留'))
+            return
+
+        while True:
+            released = sweep_expired_holds(chunk_size)
+            if released:
+                self.stdout.write(f'回收 {released} 个过期座位预留')
+            time.sleep(options['interval'])
@@ -0,0 +1,121 @@
+"""
+校验并修复课程已选人数、预留人数冗余计数的管理命令
+
+用法：
+    python manage.py sync_enrollment_counts            # 只检测计数漂移，发现漂移时以非零状态退出
+    python manage.py sync_enrollment_counts --fix      # 检测并修复计数漂移
+    python manage.py sync_enrollment_counts --chunk-size 200
+"""
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.db.models import Count
+
+from course import seat_slots, versions
+from course.models import Course, CourseSeatSlot, Enrollment, SeatHold
+
+
+class Command(BaseCommand):
+    help = '按批次重新统计选课记录和座位预留，检测并修复课程已选人数（enrolled_count）和预留人数（held_count）的漂移'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=500,
+            help='每批处理的课程数量（默认500）',
+        )
+        parser.add_argument(
+            '--fix',
+            action='store_true',
+            help='将漂移的计数修复为实际选课人数和预留数量',
+        )
+
+    def handle(self, *args, **options):
+        chunk_size = options['chunk_size']
+        fix = options['fix']
+        if chunk_size <= 0:
+            raise CommandError('--chunk-size 必须为正数')
+
+        checked = 0
+        drifted = 0
+        last_pk = 0
+        while True:
+            # 按主键分段遍历，避免一次性加载全部课程
+            course_ids = list(
+                Course.objects.filter(pk__gt=last_pk)
+                .order_by('pk')
+                .values_list('pk', flat=True)[:chunk_size]
+            )
+            if not course_ids:
+                break
+            last_pk = course_ids[-1]
+            drifted += self._sync_chunk(course_ids, fix)
+            checked += len(course_ids)
+
+        if drifted and not fix:
+            raise CommandError(f'共检查 {checked} 门课程，发现 {drifted} 门课程计数漂移，可使用 --fix 修复')
+        action = '修复' if fix else '发现'
+        self.stdout.write(self.style.SUCCESS(f'共检查 {checked} 门课程，{action} {drifted} 门课程计数漂移'))
+
+    def _sync_chunk(self, course_ids, fix):
+        """统计一批课程的实际选课人数和预留数量并与冗余计数比较，返回漂移的课程数量"""
+        with transaction.atomic():
+            courses = Course.objects.filter(pk__in=course_ids).order_by('pk')
+            if fix:
+                # 修复时按主键顺序锁定本批课程，防止统计期间有新的选课或预留写入
+                courses = courses.select_for_update()
+            stored = {}
+            sharded = {}
+            for course_id, enrolled_count, held_count, seat_shards in courses.values_list(
+                'pk', 'enrolled_count', 'held_count', 'seat_shards'
+            ):
+                stored[course_id] = (enrolled_count, held_count)
+                if seat_shards:
+                    sharded[course_id] = seat_shards
+            if sharded:
+                # 分片计数的课程以各槽位之和作为冗余计数；修复时同样先锁定槽位
+                if fix:
+                    list(
+                        CourseSeatSlot.objects.select_for_update()
+                        .filter(course_id__in=list(sharded))
+                        .order_by('course_id', 'slot')
+                    )
+                slot_totals = seat_slots.get_slot_totals_by_course(list(sharded))
+                for course_id in sharded:
+                    stored[course_id] = slot_totals.get(course_id, (0, 0))
+            actual_enrolled = self._count_by_course(Enrollment, course_ids)
+            # 未回收的过期预留仍计入预留人数，回收时才扣减
+            actual_held = self._count_by_course(SeatHold, course_ids)
+
+            drifted = 0
+            for course_id, counts in stored.items():
+                expected = (actual_enrolled.get(course_id, 0), actual_held.get(course_id, 0))
+                if counts == expected:
+                    continue
+                drifted += 1
+                self.stdout.write(
+                    self.style.WARNING(
+                        f'课程 {course_id}: 已选计数 {counts[0]}，实际 {expected[0]}；'
+                        f'预留计数 {counts[1]}，实际 {expected[1]}'
+                    )
+                )
+                if fix and course_id in sharded:
+                    seat_slots.reset_slots(course_id, sharded[course_id], *expected)
+                elif fix:
+                    Course.objects.filter(pk=course_id).update(
+                        enrolled_count=expected[0],
+                        held_count=expected[1],
+                    )
+            if fix and drifted:
+                # 计数保存在课程表中并显示在课程列表中，修复后使依赖课程表的接口的 ETag 和响应缓存失效
+                versions.bump(versions.COURSE, versions.ENROLLMENT)
+            return drifted
+
+    def _count_by_course(self, model, course_ids):
+        """按课程统计一批课程的记录数量"""
+        return dict(
+            model.objects.filter(course_id__in=course_ids)
+            .values('course_id')
+            .annotate(total=Count('id'))
+            .values_list('course_id', 'total')
+        )
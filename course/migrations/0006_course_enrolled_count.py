@@ -0,0 +1,31 @@
+# Generated by Django 5.2.6 on 2026-10-18 12:02
+
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def populate_enrolled_count(apps, schema_editor):
+    """根据现有选课记录初始化课程的已选人数"""
+    Course = apps.get_model("course", "Course")
+    Enrollment = apps.get_model("course", "Enrollment")
+    counts = Enrollment.objects.values("course_id").annotate(total=Count("id"))
+    for row in counts.iterator():
+        Course.objects.filter(pk=row["course_id"]).update(enrolled_count=row["total"])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("course", "0005_course_classroom_alter_classroom_name_and_more"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="course",
+            name="enrolled_count",
+            field=models.PositiveIntegerField(
+                default=0, editable=False, verbose_name="已选人数"
+            ),
+        ),
+        migrations.RunPython(populate_enrolled_count, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,89 @@
+# Generated by Django 5.2.6 on 2026-10-18 12:07
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("course", "0006_course_enrolled_count"),
+        ("student", "0003_student_class_name_student_college_student_phone_and_more"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="AdmissionRequest",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "status",
+                    models.CharField(
+                        choices=[
+                            ("pending", "排队中"),
+                            ("admitted", "已选上"),
+                            ("rejected", "未选上"),
+                        ],
+                        default="pending",
+                        max_length=10,
+                        verbose_name="处理状态",
+                    ),
+                ),
+                (
+                    "reason",
+                    models.CharField(
+                        blank=True,
+                        default="",
+                        max_length=200,
+                        verbose_name="未选上原因",
+                    ),
+                ),
+                (
+                    "created_at",
+                    models.DateTimeField(auto_now_add=True, verbose_name="提交时间"),
+                ),
+                (
+                    "processed_at",
+                    models.DateTimeField(
+                        blank=True, null=True, verbose_name="处理时间"
+                    ),
+                ),
+                (
+                    "course",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="admission_requests",
+                        to="course.course",
+                        verbose_name="课程",
+                    ),
+                ),
+                (
+                    "student",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="admission_requests",
+                        to="student.student",
+                        verbose_name="学生",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "选课排队请求",
+                "verbose_name_plural": "选课排队管理",
+                "indexes": [
+                    models.Index(
+                        fields=["status", "course", "id"],
+                        name="course_admreq_pending_idx",
+                    )
+                ],
+            },
+        ),
+    ]
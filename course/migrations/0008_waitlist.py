@@ -0,0 +1,57 @@
+# Generated by Django 5.2.6 on 2026-10-18 12:10
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("course", "0007_admissionrequest"),
+        ("student", "0003_student_class_name_student_college_student_phone_and_more"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="Waitlist",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("position", models.PositiveIntegerField(verbose_name="候补序号")),
+                (
+                    "created_at",
+                    models.DateTimeField(auto_now_add=True, verbose_name="加入时间"),
+                ),
+                (
+                    "course",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="waitlist_entries",
+                        to="course.course",
+                        verbose_name="课程",
+                    ),
+                ),
+                (
+                    "student",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="waitlist_entries",
+                        to="student.student",
+                        verbose_name="学生",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "候补记录",
+                "verbose_name_plural": "候补管理",
+                "unique_together": {("course", "position"), ("course", "student")},
+            },
+        ),
+    ]
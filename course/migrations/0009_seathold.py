@@ -0,0 +1,71 @@
+# Generated by Django 5.2.6 on 2026-10-18 12:12
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("course", "0008_waitlist"),
+        ("student", "0003_student_class_name_student_college_student_phone_and_more"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="course",
+            name="held_count",
+            field=models.PositiveIntegerField(
+                default=0, editable=False, verbose_name="预留人数"
+            ),
+        ),
+        migrations.CreateModel(
+            name="SeatHold",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("expires_at", models.DateTimeField(verbose_name="过期时间")),
+                (
+                    "created_at",
+                    models.DateTimeField(auto_now_add=True, verbose_name="预留时间"),
+                ),
+                (
+                    "course",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="seat_holds",
+                        to="course.course",
+                        verbose_name="课程",
+                    ),
+                ),
+                (
+                    "student",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="seat_holds",
+                        to="student.student",
+                        verbose_name="学生",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "座位预留",
+                "verbose_name_plural": "座位预留管理",
+                "indexes": [
+                    models.Index(
+                        fields=["course", "expires_at"],
+                        name="course_hold_course_exp_idx",
+                    ),
+                    models.Index(fields=["expires_at"], name="course_hold_expires_idx"),
+                ],
+                "unique_together": {("course", "student")},
+            },
+        ),
+    ]
@@ -0,0 +1,62 @@
+# Generated by Django 5.2.6 on 2026-10-18 12:17
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("course", "0009_seathold"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="course",
+            name="seat_shards",
+            field=models.PositiveSmallIntegerField(
+                default=0, editable=False, verbose_name="计数分片数"
+            ),
+        ),
+        migrations.CreateModel(
+            name="CourseSeatSlot",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("slot", models.PositiveSmallIntegerField(verbose_name="槽位序号")),
+                (
+                    "capacity",
+                    models.PositiveIntegerField(default=0, verbose_name="槽位名额"),
+                ),
+                (
+                    "enrolled",
+                    models.PositiveIntegerField(default=0, verbose_name="槽位已选人数"),
+                ),
+                (
+                    "held",
+                    models.PositiveIntegerField(default=0, verbose_name="槽位预留人数"),
+                ),
+                (
+                    "course",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="seat_slots",
+                        to="course.course",
+                        verbose_name="课程",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "座位计数槽位",
+                "verbose_name_plural": "座位计数槽位",
+                "unique_together": {("course", "slot")},
+            },
+        ),
+    ]
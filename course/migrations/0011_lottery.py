@@ -0,0 +1,135 @@
+# Generated by Django 5.2.6 on 2026-10-18 12:25
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("course", "0010_courseseatslot"),
+        ("student", "0003_student_class_name_student_college_student_phone_and_more"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="RegistrationWindow",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("name", models.CharField(max_length=100, verbose_name="批次名称")),
+                ("opens_at", models.DateTimeField(verbose_name="开始时间")),
+                ("closes_at", models.DateTimeField(verbose_name="截止时间")),
+                (
+                    "status",
+                    models.CharField(
+                        choices=[("open", "收集中"), ("allocated", "已分配")],
+                        default="open",
+                        max_length=10,
+                        verbose_name="状态",
+                    ),
+                ),
+                (
+                    "seed",
+                    models.BigIntegerField(
+                        blank=True, null=True, verbose_name="抽签种子"
+                    ),
+                ),
+                (
+                    "allocated_at",
+                    models.DateTimeField(
+                        blank=True, null=True, verbose_name="分配时间"
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "选课抽签批次",
+                "verbose_name_plural": "选课抽签管理",
+            },
+        ),
+        migrations.CreateModel(
+            name="LotteryEntry",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("priority", models.IntegerField(default=0, verbose_name="优先级")),
+                (
+                    "status",
+                    models.CharField(
+                        choices=[
+                            ("pending", "待抽签"),
+                            ("admitted", "已选上"),
+                            ("rejected", "未选上"),
+                        ],
+                        default="pending",
+                        max_length=10,
+                        verbose_name="抽签结果",
+                    ),
+                ),
+                (
+                    "reason",
+                    models.CharField(
+                        blank=True,
+                        default="",
+                        max_length=200,
+                        verbose_name="未选上原因",
+                    ),
+                ),
+                (
+                    "created_at",
+                    models.DateTimeField(auto_now_add=True, verbose_name="提交时间"),
+                ),
+                (
+                    "course",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="lottery_entries",
+                        to="course.course",
+                        verbose_name="课程",
+                    ),
+                ),
+                (
+                    "student",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="lottery_entries",
+                        to="student.student",
+                        verbose_name="学生",
+                    ),
+                ),
+                (
+                    "window",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="entries",
+                        to="course.registrationwindow",
+                        verbose_name="抽签批次",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "选课抽签申请",
+                "verbose_name_plural": "选课抽签申请",
+                "indexes": [
+                    models.Index(
+                        fields=["window", "status"], name="course_lottery_pending_idx"
+                    )
+                ],
+                "unique_together": {("window", "student", "course")},
+            },
+        ),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 5.2.6 on 2026-10-18 12:34
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("course", "0011_lottery"),
+        ("student", "0003_student_class_name_student_college_student_phone_and_more"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="enrollment",
+            index=models.Index(
+                fields=["enroll_date", "id"], name="course_enroll_date_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="enrollment",
+            index=models.Index(
+                fields=["course", "enroll_date", "id"], name="course_enroll_roster_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="schedule",
+            index=models.Index(
+                fields=["day_of_week", "start_section", "id"],
+                name="course_schedule_slot_idx",
+            ),
+        ),
+    ]
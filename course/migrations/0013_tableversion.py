@@ -0,0 +1,33 @@
+# Generated by Django 5.2.6 on 2026-10-18 12:36
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("course", "0012_keyset_indexes"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="TableVersion",
+            fields=[
+                (
+                    "name",
+                    models.CharField(
+                        max_length=50,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="表名",
+                    ),
+                ),
+                ("version", models.BigIntegerField(default=0, verbose_name="版本号")),
+                ("updated_at", models.DateTimeField(verbose_name="最后修改时间")),
+            ],
+            options={
+                "verbose_name": "数据表版本号",
+                "verbose_name_plural": "数据表版本号",
+            },
+        ),
+    ]
@@ -0,0 +1,64 @@
+# Generated by Django 5.2.6 on 2026-10-18 12:47
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+from course.search_index import build_tokens
+
+
+def populate_search_tokens(apps, schema_editor):
+    """为已有课程建立搜索词元"""
+    Course = apps.get_model("course", "Course")
+    CourseSearchToken = apps.get_model("course", "CourseSearchToken")
+    tokens = []
+    for course in Course.objects.only("id", "code", "name", "description").iterator():
+        tokens.extend(build_tokens(course, model=CourseSearchToken))
+    CourseSearchToken.objects.bulk_create(tokens, batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("course", "0013_tableversion"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="CourseSearchToken",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("field", models.CharField(max_length=20, verbose_name="字段")),
+                ("token", models.CharField(max_length=2, verbose_name="词元")),
+                ("weight", models.PositiveIntegerField(default=1, verbose_name="权重")),
+                (
+                    "course",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="search_tokens",
+                        to="course.course",
+                        verbose_name="课程",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "课程搜索词元",
+                "verbose_name_plural": "课程搜索词元",
+                "indexes": [
+                    models.Index(
+                        fields=["token", "field", "course"],
+                        name="course_search_token_idx",
+                    )
+                ],
+                "unique_together": {("course", "field", "token")},
+            },
+        ),
+        migrations.RunPython(populate_search_tokens, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,47 @@
+# Generated by Django 5.2.6 on 2026-10-18 12:52
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("course", "0014_course_search_index"),
+        ("student", "0003_student_class_name_student_college_student_phone_and_more"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="course",
+            index=models.Index(
+                fields=["semester", "course_type", "teaching_method"],
+                name="course_catalog_filter_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="enrollment",
+            index=models.Index(
+                fields=["student", "enroll_date", "id"],
+                name="course_enroll_student_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="schedule",
+            index=models.Index(
+                fields=["classroom", "day_of_week", "week_pattern", "start_section"],
+                name="course_sched_room_slot_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="schedule",
+            index=models.Index(
+                fields=[
+                    "teaching_assignment",
+                    "day_of_week",
+                    "week_pattern",
+                    "start_section",
+                ],
+                name="course_sched_teacher_slot_idx",
+            ),
+        ),
+    ]
@@ -0,0 +1,74 @@
+# Generated by Django 5.2.6 on 2026-10-18 12:54
+
+from django.db import migrations, models
+
+
+def slot_mask(start_section, end_section, week_pattern):
+    """排课占用的位图，每节两位（单周、双周），最多31节"""
+    bits = {"all": 0b11, "odd": 0b01, "even": 0b10}[week_pattern]
+    mask = 0
+    for section in range(max(start_section, 1), min(end_section, 31) + 1):
+        mask |= bits << ((section - 1) * 2)
+    return mask
+
+
+def populate_occupancy(apps, schema_editor):
+    """按已有排课建立教室和授课记录的占用位图"""
+    Schedule = apps.get_model("course", "Schedule")
+    ScheduleOccupancy = apps.get_model("course", "ScheduleOccupancy")
+    masks = {}
+    rows = Schedule.objects.values_list(
+        "classroom_id", "teaching_assignment_id", "day_of_week", "start_section", "end_section", "week_pattern",
+    )
+    for classroom_id, assignment_id, day_of_week, start_section, end_section, week_pattern in rows.iterator():
+        mask = slot_mask(start_section, end_section, week_pattern)
+        for cell in (("classroom", classroom_id, day_of_week), ("assignment", assignment_id, day_of_week)):
+            masks[cell] = masks.get(cell, 0) | mask
+    ScheduleOccupancy.objects.bulk_create(
+        [
+            ScheduleOccupancy(resource_type=resource_type, resource_id=resource_id, day_of_week=day_of_week, mask=mask)
+            for (resource_type, resource_id, day_of_week), mask in masks.items()
+        ],
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("course", "0015_access_path_indexes"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ScheduleOccupancy",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "resource_type",
+                    models.CharField(
+                        choices=[("classroom", "教室"), ("assignment", "授课记录")],
+                        max_length=20,
+                        verbose_name="资源类型",
+                    ),
+                ),
+                ("resource_id", models.PositiveIntegerField(verbose_name="资源ID")),
+                ("day_of_week", models.IntegerField(verbose_name="星期几")),
+                ("mask", models.BigIntegerField(default=0, verbose_name="占用位图")),
+            ],
+            options={
+                "verbose_name": "排课占用位图",
+                "verbose_name_plural": "排课占用位图",
+                "unique_together": {("resource_type", "resource_id", "day_of_week")},
+            },
+        ),
+        migrations.RunPython(populate_occupancy, migrations.RunPython.noop),
+    ]
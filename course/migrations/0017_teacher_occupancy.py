@@ -0,0 +1,53 @@
+# Generated by Django 5.2.6 on 2026-10-18 12:58
+
+from django.db import migrations, models
+
+
+def slot_mask(start_section, end_section, week_pattern):
+    """排课占用的位图，每节两位（单周、双周），最多31节"""
+    bits = {"all": 0b11, "odd": 0b01, "even": 0b10}[week_pattern]
+    mask = 0
+    for section in range(max(start_section, 1), min(end_section, 31) + 1):
+        mask |= bits << ((section - 1) * 2)
+    return mask
+
+
+def replace_assignment_with_teacher(apps, schema_editor):
+    """授课记录的占用位图改为按教师汇总：删除授课记录的位图，按排课所属教师重建"""
+    Schedule = apps.get_model("course", "Schedule")
+    ScheduleOccupancy = apps.get_model("course", "ScheduleOccupancy")
+    ScheduleOccupancy.objects.filter(resource_type="assignment").delete()
+    masks = {}
+    rows = Schedule.objects.values_list(
+        "teaching_assignment__teacher_id", "day_of_week", "start_section", "end_section", "week_pattern",
+    )
+    for teacher_id, day_of_week, start_section, end_section, week_pattern in rows.iterator():
+        cell = ("teacher", teacher_id, day_of_week)
+        masks[cell] = masks.get(cell, 0) | slot_mask(start_section, end_section, week_pattern)
+    ScheduleOccupancy.objects.bulk_create(
+        [
+            ScheduleOccupancy(resource_type=resource_type, resource_id=resource_id, day_of_week=day_of_week, mask=mask)
+            for (resource_type, resource_id, day_of_week), mask in masks.items()
+        ],
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("course", "0016_schedule_occupancy"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="scheduleoccupancy",
+            name="resource_type",
+            field=models.CharField(
+                choices=[("classroom", "教室"), ("teacher", "教师")],
+                max_length=20,
+                verbose_name="资源类型",
+            ),
+        ),
+        migrations.RunPython(replace_assignment_with_teacher, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,91 @@
+# Generated by Django 5.2.6 on 2026-10-18 13:09
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("course", "0017_teacher_occupancy"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="TimetableJob",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("semester", models.CharField(max_length=50, verbose_name="学期")),
+                ("time_budget", models.FloatField(verbose_name="求解时间预算（秒）")),
+                ("dry_run", models.BooleanField(default=False, verbose_name="仅试算")),
+                (
+                    "status",
+                    models.CharField(
+                        choices=[
+                            ("pending", "等待执行"),
+                            ("running", "执行中"),
+                            ("completed", "已完成"),
+                            ("failed", "执行失败"),
+                        ],
+                        default="pending",
+                        max_length=10,
+                        verbose_name="任务状态",
+                    ),
+                ),
+                (
+                    "placed_count",
+                    models.PositiveIntegerField(default=0, verbose_name="已排课程数"),
+                ),
+                (
+                    "schedules",
+                    models.JSONField(
+                        blank=True, default=list, verbose_name="生成的排课"
+                    ),
+                ),
+                (
+                    "unplaced",
+                    models.JSONField(
+                        blank=True, default=list, verbose_name="未排入的课程"
+                    ),
+                ),
+                (
+                    "error",
+                    models.CharField(
+                        blank=True, default="", max_length=200, verbose_name="失败原因"
+                    ),
+                ),
+                (
+                    "created_at",
+                    models.DateTimeField(auto_now_add=True, verbose_name="提交时间"),
+                ),
+                (
+                    "started_at",
+                    models.DateTimeField(
+                        blank=True, null=True, verbose_name="开始时间"
+                    ),
+                ),
+                (
+                    "finished_at",
+                    models.DateTimeField(
+                        blank=True, null=True, verbose_name="完成时间"
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "自动排课任务",
+                "verbose_name_plural": "自动排课任务",
+                "indexes": [
+                    models.Index(
+                        fields=["status", "id"], name="course_timetable_status_idx"
+                    )
+                ],
+            },
+        ),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 5.2.6 on 2026-10-18 13:18
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("course", "0018_timetable_job"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="scheduleoccupancy",
+            index=models.Index(
+                fields=["resource_type", "day_of_week"], name="course_occupancy_day_idx"
+            ),
+        ),
+    ]
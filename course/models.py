@@ -6,6 +6,7 @@ from django.db import models
 """
 from django.db import models
 from django.db.models import Count
+from django.utils import timezone
 
 class Course(models.Model):
     """课程模型类，定义课程实体的数据结构
@@ -58,6 +59,22 @@ class Course(models.Model):
         verbose_name='总人数上限'
     )
     
+    # 已选人数：冗余计数，与选课记录的增删在同一事务中维护，避免每次校验都执行COUNT
+    enrolled_count = models.PositiveIntegerField(default=0, editable=False, verbose_name='已选人数')
+    
+    # 预留人数：尚未确认或回收的座位预留数量，与已选人数一起占用课程名额
+    held_count = models.PositiveIntegerField(default=0, editable=False, verbose_name='预留人数')
+    
+    # 分片计数的槽位数量：0表示计数保存在课程行上；大于0时计数分散到 CourseSeatSlot 的各槽位，
+    # 课程行上的 enrolled_count、held_count 保持为0，通过 configure_seat_shards 命令切换
+    seat_shards = models.PositiveSmallIntegerField(default=0, editable=False, verbose_name='计数分片数')
+    
+    # 由计数逻辑通过条件UPDATE维护的字段，常规save()不会覆盖这些字段
+    COUNTER_FIELDS = ('enrolled_count', 'held_count', 'seat_shards')
+    
+    # 建立搜索词元的字段（与 search_index.FIELD_WEIGHTS 一致），从数据库加载时记录原值，未变化时保存不重建词元
+    SEARCH_FIELDS = ('code', 'name', 'description')
+    
     # 扩展字段
     semester = models.CharField(max_length=50, verbose_name='开设学期')
     description = models.TextField(blank=True, null=True, verbose_name='课程描述')
@@ -67,12 +84,28 @@ class Course(models.Model):
     @property
     def current_students(self):
         """获取当前已选择该课程的学生数"""
-        return self.enrollments.count()
+        return self.enrolled_count
+    
+    @property
+    def available_seats(self):
+        """获取剩余名额（总人数上限减去已选人数和预留人数）"""
+        return max(0, self.max_students - self.enrolled_count - self.held_count)
 
     def __str__(self):
         """返回课程的字符串表示形式"""
         return self.name
     
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        """从数据库加载时记录搜索字段的原值，用于保存后判断是否需要重建搜索词元"""
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_search_fields = instance.search_field_values()
+        return instance
+    
+    def search_field_values(self):
+        """已加载的搜索字段取值（延迟加载的字段不包含在内）"""
+        return {field: self.__dict__[field] for field in self.SEARCH_FIELDS if field in self.__dict__}
+    
     def save(self, *args, **kwargs):
         """重写save方法，自动处理线上课程的容量设置和教室关联"""
         if self.teaching_method == 'online':
@@ -83,12 +116,51 @@ class Course(models.Model):
             # 线下课程取教室容量
             self.max_students = self.classroom.capacity
         
+        # 更新已有课程时排除计数字段，防止内存中过期的计数覆盖数据库中的最新值；
+        # 因此对数据库中已删除的课程实例调用save()会抛出DatabaseError（不会重新插入），
+        # 需要重新插入时传入 force_insert=True
+        if not self._state.adding and kwargs.get('update_fields') is None and not kwargs.get('force_insert'):
+            kwargs['update_fields'] = [
+                field.name for field in self._meta.concrete_fields
+                if not field.primary_key and field.name not in self.COUNTER_FIELDS
+            ]
+        
         super().save(*args, **kwargs)
     
     class Meta:
         """模型的元数据配置"""
         verbose_name = '课程'
         verbose_name_plural = '课程管理'
+        # 课程搜索和分面统计按学期、课程类型、授课方式筛选
+        indexes = [
+            models.Index(fields=['semester', 'course_type', 'teaching_method'], name='course_catalog_filter_idx'),
+        ]
+
+class CourseSeatSlot(models.Model):
+    """课程座位计数槽位模型，热门课程启用分片计数后，座位计数分散到多个槽位行
+    每个槽位分得 capacity 个名额，enrolled + held 不超过 capacity；
+    课程的已选人数和预留人数为各槽位之和
+    """
+    course = models.ForeignKey(
+        Course,
+        on_delete=models.CASCADE,
+        related_name='seat_slots',
+        verbose_name='课程'
+    )
+    slot = models.PositiveSmallIntegerField(verbose_name='槽位序号')
+    capacity = models.PositiveIntegerField(default=0, verbose_name='槽位名额')
+    enrolled = models.PositiveIntegerField(default=0, verbose_name='槽位已选人数')
+    held = models.PositiveIntegerField(default=0, verbose_name='槽位预留人数')
+    
+    def __str__(self):
+        """返回槽位的字符串表示形式"""
+        return f'{self.course_id} #{self.slot} ({self.enrolled + self.held}/{self.capacity})'
+    
+    class Meta:
+        """模型的元数据配置，(course, slot) 唯一约束同时作为按槽位抢占座位的索引"""
+        verbose_name = '座位计数槽位'
+        verbose_name_plural = '座位计数槽位'
+        unique_together = ('course', 'slot')
 
 class Classroom(models.Model):
     """教室模型，定义教室实体的数据结构
@@ -127,6 +199,13 @@ class TeachingAssignment(models.Model):
     assign_date = models.DateTimeField(auto_now_add=True, verbose_name='分配日期')
     teaching_hours = models.IntegerField(verbose_name='授课课时')
     
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        """从数据库加载时记录原教师ID，用于更换授课教师时同步更新教师的排课占用位图"""
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_teacher_id = instance.__dict__.get('teacher_id')
+        return instance
+    
     class Meta:
         """模型的元数据配置，确保一名教师对同一门课程只能有一条记录"""
         verbose_name = '授课记录'
@@ -161,11 +240,97 @@ class Enrollment(models.Model):
         verbose_name = '选课记录'
         verbose_name_plural = '选课管理'
         unique_together = ('student', 'course')
+        # 选课列表和课程名单按 (选课时间, id) 键集分页
+        indexes = [
+            models.Index(fields=['enroll_date', 'id'], name='course_enroll_date_idx'),
+            models.Index(fields=['course', 'enroll_date', 'id'], name='course_enroll_roster_idx'),
+            # 按学生筛选的选课列表
+            models.Index(fields=['student', 'enroll_date', 'id'], name='course_enroll_student_idx'),
+        ]
+    
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        """从数据库加载时记录原课程ID，用于修改所属课程时同步计数"""
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_course_id = instance.__dict__.get('course_id')
+        return instance
     
     def __str__(self):
         """返回选课记录的字符串表示形式"""
         return f'{self.student.name} - {self.course.name}'
 
+class Waitlist(models.Model):
+    """候补名单模型，课程满员时学生按加入顺序候补
+    position 为课程内单调递增的序号，学生的候补位次为序号更小的记录数加一；
+    有选课记录被删除时，序号最小的候补学生在同一事务中自动转为正式选课
+    """
+    course = models.ForeignKey(
+        Course,
+        on_delete=models.CASCADE,
+        related_name='waitlist_entries',
+        verbose_name='课程'
+    )
+    student = models.ForeignKey(
+        'student.Student',
+        on_delete=models.CASCADE,
+        related_name='waitlist_entries',
+        verbose_name='学生'
+    )
+    position = models.PositiveIntegerField(verbose_name='候补序号')
+    created_at = models.DateTimeField(auto_now_add=True, verbose_name='加入时间')
+    
+    class Meta:
+        """模型的元数据配置，(course, position) 唯一约束同时作为按序号取首位和统计位次的索引"""
+        verbose_name = '候补记录'
+        verbose_name_plural = '候补管理'
+        unique_together = (
+            ('course', 'student'),
+            ('course', 'position'),
+        )
+    
+    def __str__(self):
+        """返回候补记录的字符串表示形式"""
+        return f'{self.student_id} - {self.course_id} #{self.position}'
+
+class SeatHold(models.Model):
+    """座位预留模型，学生在确认选课前临时占用课程的一个名额
+    预留在 expires_at 之前计入课程的预留人数，确认后转为选课记录，
+    过期后在读取课程名额时按需回收，或由定期清理命令批量回收
+    """
+    course = models.ForeignKey(
+        Course,
+        on_delete=models.CASCADE,
+        related_name='seat_holds',
+        verbose_name='课程'
+    )
+    student = models.ForeignKey(
+        'student.Student',
+        on_delete=models.CASCADE,
+        related_name='seat_holds',
+        verbose_name='学生'
+    )
+    expires_at = models.DateTimeField(verbose_name='过期时间')
+    created_at = models.DateTimeField(auto_now_add=True, verbose_name='预留时间')
+    
+    @property
+    def is_expired(self):
+        """预留是否已过期"""
+        return self.expires_at <= timezone.now()
+    
+    def __str__(self):
+        """返回座位预留的字符串表示形式"""
+        return f'{self.student_id} - {self.course_id} (至 {self.expires_at})'
+    
+    class Meta:
+        """模型的元数据配置，索引分别用于按课程回收过期预留和全局清理过期预留"""
+        verbose_name = '座位预留'
+        verbose_name_plural = '座位预留管理'
+        unique_together = ('course', 'student')
+        indexes = [
+            models.Index(fields=['course', 'expires_at'], name='course_hold_course_exp_idx'),
+            models.Index(fields=['expires_at'], name='course_hold_expires_idx'),
+        ]
+
 class Schedule(models.Model):
     """排课模型，定义课程表实体的数据结构
     用于详细排课信息管理
@@ -193,6 +358,17 @@ class Schedule(models.Model):
         """返回排课记录的字符串表示形式"""
         return f'{self.course.name} - {self.classroom.name} - 星期{self.day_of_week}'
     
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        """从数据库加载时记录原教室、授课记录和星期几，用于修改排课时同步更新原位置的占用位图"""
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_cells = (
+            instance.__dict__.get('classroom_id'),
+            instance.__dict__.get('teaching_assignment_id'),
+            instance.__dict__.get('day_of_week'),
+        )
+        return instance
+    
     class Meta:
         """模型的元数据配置，确保排课冲突检查"""
         verbose_name = '排课记录'
@@ -201,3 +377,284 @@ class Schedule(models.Model):
             ('classroom', 'day_of_week', 'start_section', 'week_pattern'),  # 防止教室排课冲突
             ('teaching_assignment', 'day_of_week', 'start_section', 'week_pattern'),  # 防止教师排课冲突
         )
+        # 排课列表按 (星期几, 开始节次, id) 键集分页
+        indexes = [
+            models.Index(fields=['day_of_week', 'start_section', 'id'], name='course_schedule_slot_idx'),
+            # 按教室、授课记录（教师）读取当天的排课（重算占用位图）：等值条件在前，节次在后
+            models.Index(
+                fields=['classroom', 'day_of_week', 'week_pattern', 'start_section'],
+                name='course_sched_room_slot_idx',
+            ),
+            models.Index(
+                fields=['teaching_assignment', 'day_of_week', 'week_pattern', 'start_section'],
+                name='course_sched_teacher_slot_idx',
+            ),
+        ]
+
+class AdmissionRequest(models.Model):
+    """选课排队请求模型，排队准入模式下持久化保存待处理的选课请求
+    由准入工作线程按课程分组、按提交顺序（FIFO）分批处理
+    """
+    STATUS_PENDING = 'pending'
+    STATUS_ADMITTED = 'admitted'
+    STATUS_REJECTED = 'rejected'
+    STATUS_CHOICES = (
+        (STATUS_PENDING, '排队中'),
+        (STATUS_ADMITTED, '已选上'),
+        (STATUS_REJECTED, '未选上'),
+    )
+    
+    student = models.ForeignKey(
+        'student.Student',
+        on_delete=models.CASCADE,
+        related_name='admission_requests',
+        verbose_name='学生'
+    )
+    course = models.ForeignKey(
+        Course,
+        on_delete=models.CASCADE,
+        related_name='admission_requests',
+        verbose_name='课程'
+    )
+    status = models.CharField(
+        max_length=10,
+        choices=STATUS_CHOICES,
+        default=STATUS_PENDING,
+        verbose_name='处理状态'
+    )
+    reason = models.CharField(max_length=200, blank=True, default='', verbose_name='未选上原因')
+    created_at = models.DateTimeField(auto_now_add=True, verbose_name='提交时间')
+    processed_at = models.DateTimeField(null=True, blank=True, verbose_name='处理时间')
+    
+    def __str__(self):
+        """返回排队请求的字符串表示形式"""
+        return f'{self.student_id} - {self.course_id} ({self.get_status_display()})'
+    
+    class Meta:
+        """模型的元数据配置，索引用于按课程取出待处理请求"""
+        verbose_name = '选课排队请求'
+        verbose_name_plural = '选课排队管理'
+        indexes = [
+            models.Index(fields=['status', 'course', 'id'], name='course_admreq_pending_idx'),
+        ]
+
+class RegistrationWindow(models.Model):
+    """选课抽签批次模型，抽签准入模式下在批次开放期间收集选课申请
+    批次关闭后由 allocate_lottery 命令一次性按带种子的抽签结果为每门课程分配名额，
+    种子随分配结果一起保存，相同的种子和申请可以复现分配结果，便于审计
+    """
+    STATUS_OPEN = 'open'
+    STATUS_ALLOCATED = 'allocated'
+    STATUS_CHOICES = (
+        (STATUS_OPEN, '收集中'),
+        (STATUS_ALLOCATED, '已分配'),
+    )
+    
+    name = models.CharField(max_length=100, verbose_name='批次名称')
+    opens_at = models.DateTimeField(verbose_name='开始时间')
+    closes_at = models.DateTimeField(verbose_name='截止时间')
+    status = models.CharField(
+        max_length=10,
+        choices=STATUS_CHOICES,
+        default=STATUS_OPEN,
+        verbose_name='状态'
+    )
+    seed = models.BigIntegerField(null=True, blank=True, verbose_name='抽签种子')
+    allocated_at = models.DateTimeField(null=True, blank=True, verbose_name='分配时间')
+    
+    @property
+    def is_accepting(self):
+        """批次当前是否接受选课申请"""
+        now = timezone.now()
+        return self.status == self.STATUS_OPEN and self.opens_at <= now < self.closes_at
+    
+    def __str__(self):
+        """返回抽签批次的字符串表示形式"""
+        return self.name
+    
+    class Meta:
+        """模型的元数据配置"""
+        verbose_name = '选课抽签批次'
+        verbose_name_plural = '选课抽签管理'
+
+class LotteryEntry(models.Model):
+    """选课抽签申请模型，抽签批次开放期间只写入申请记录，不锁定课程行
+    分配时同一课程的申请按优先级从高到低、同优先级内按抽签顺序准入
+    """
+    STATUS_PENDING = 'pending'
+    STATUS_ADMITTED = 'admitted'
+    STATUS_REJECTED = 'rejected'
+    STATUS_CHOICES = (
+        (STATUS_PENDING, '待抽签'),
+        (STATUS_ADMITTED, '已选上'),
+        (STATUS_REJECTED, '未选上'),
+    )
+    
+    window = models.ForeignKey(
+        RegistrationWindow,
+        on_delete=models.CASCADE,
+        related_name='entries',
+        verbose_name='抽签批次'
+    )
+    student = models.ForeignKey(
+        'student.Student',
+        on_delete=models.CASCADE,
+        related_name='lottery_entries',
+        verbose_name='学生'
+    )
+    course = models.ForeignKey(
+        Course,
+        on_delete=models.CASCADE,
+        related_name='lottery_entries',
+        verbose_name='课程'
+    )
+    priority = models.IntegerField(default=0, verbose_name='优先级')
+    status = models.CharField(
+        max_length=10,
+        choices=STATUS_CHOICES,
+        default=STATUS_PENDING,
+        verbose_name='抽签结果'
+    )
+    reason = models.CharField(max_length=200, blank=True, default='', verbose_name='未选上原因')
+    created_at = models.DateTimeField(auto_now_add=True, verbose_name='提交时间')
+    
+    def __str__(self):
+        """返回抽签申请的字符串表示形式"""
+        return f'{self.student_id} - {self.course_id} ({self.get_status_display()})'
+    
+    class Meta:
+        """模型的元数据配置，索引用于分配时按批次取出待抽签的申请"""
+        verbose_name = '选课抽签申请'
+        verbose_name_plural = '选课抽签申请'
+        unique_together = ('window', 'student', 'course')
+        indexes = [
+            models.Index(fields=['window', 'status'], name='course_lottery_pending_idx'),
+        ]
+
+class TableVersion(models.Model):
+    """数据表版本号模型，每张被缓存或条件请求依赖的表一行
+    表中数据写入并提交后版本号加一，用于计算列表和详情接口的 ETag / Last-Modified，
+    不需要扫描数据表本身
+    """
+    name = models.CharField(max_length=50, primary_key=True, verbose_name='表名')
+    version = models.BigIntegerField(default=0, verbose_name='版本号')
+    updated_at = models.DateTimeField(verbose_name='最后修改时间')
+    
+    def __str__(self):
+        """返回数据表版本号的字符串表示形式"""
+        return f'{self.name} v{self.version}'
+    
+    class Meta:
+        """模型的元数据配置"""
+        verbose_name = '数据表版本号'
+        verbose_name_plural = '数据表版本号'
+
+
+class CourseSearchToken(models.Model):
+    """课程搜索索引模型，课程名称、代码、描述切分出的 n-gram 词元（倒排索引）
+    每个 (课程, 字段, 词元) 一行，weight 为字段权重乘以词元出现次数；
+    课程保存后由信号重建该课程的词元，(token, field, course) 索引用于按词元查找候选课程
+    """
+    course = models.ForeignKey(
+        Course,
+        on_delete=models.CASCADE,
+        related_name='search_tokens',
+        verbose_name='课程'
+    )
+    field = models.CharField(max_length=20, verbose_name='字段')
+    token = models.CharField(max_length=2, verbose_name='词元')
+    weight = models.PositiveIntegerField(default=1, verbose_name='权重')
+    
+    def __str__(self):
+        """返回搜索词元的字符串表示形式"""
+        return f'{self.course_id} {self.field}:{self.token}'
+    
+    class Meta:
+        """模型的元数据配置"""
+        verbose_name = '课程搜索词元'
+        verbose_name_plural = '课程搜索词元'
+        unique_together = ('course', 'field', 'token')
+        indexes = [
+            models.Index(fields=['token', 'field', 'course'], name='course_search_token_idx'),
+        ]
+
+
+class ScheduleOccupancy(models.Model):
+    """排课占用位图模型，每个 (教室或教师, 星期几) 一行，记录该资源当天被占用的节次和单双周
+    mask 的第 (节次-1)*2 位表示单周占用、第 (节次-1)*2+1 位表示双周占用，每周上课的排课同时占用两位；
+    教师的位图汇总其全部授课记录的排课，排课冲突检查只需读取教室和教师各一行并与新排课的位图按位与。
+    由排课记录和授课记录的信号维护，详见 course.occupancy
+    """
+    RESOURCE_CLASSROOM = 'classroom'
+    RESOURCE_TEACHER = 'teacher'
+    RESOURCE_CHOICES = (
+        (RESOURCE_CLASSROOM, '教室'),
+        (RESOURCE_TEACHER, '教师'),
+    )
+    
+    resource_type = models.CharField(max_length=20, choices=RESOURCE_CHOICES, verbose_name='资源类型')
+    resource_id = models.PositiveIntegerField(verbose_name='资源ID')
+    day_of_week = models.IntegerField(verbose_name='星期几')
+    mask = models.BigIntegerField(default=0, verbose_name='占用位图')
+    
+    def __str__(self):
+        """返回占用位图的字符串表示形式"""
+        return f'{self.resource_type}:{self.resource_id} 星期{self.day_of_week} {self.mask:#x}'
+    
+    class Meta:
+        """模型的元数据配置，唯一约束同时作为按资源和星期几读取位图的索引"""
+        verbose_name = '排课占用位图'
+        verbose_name_plural = '排课占用位图'
+        unique_together = ('resource_type', 'resource_id', 'day_of_week')
+        # 查找空闲教室时读取全部教室当天的位图
+        indexes = [
+            models.Index(fields=['resource_type', 'day_of_week'], name='course_occupancy_day_idx'),
+        ]
+
+class TimetableJob(models.Model):
+    """自动排课任务模型，记录一次为学期生成排课的参数和结果
+    任务由Web进程内的工作线程或 generate_timetable 命令执行，客户端轮询任务状态；
+    未能排入的课程及原因保存在 unplaced 中（部分解），详见 course.timetable
+    """
+    STATUS_PENDING = 'pending'
+    STATUS_RUNNING = 'running'
+    STATUS_COMPLETED = 'completed'
+    STATUS_FAILED = 'failed'
+    STATUS_CHOICES = (
+        (STATUS_PENDING, '等待执行'),
+        (STATUS_RUNNING, '执行中'),
+        (STATUS_COMPLETED, '已完成'),
+        (STATUS_FAILED, '执行失败'),
+    )
+    
+    semester = models.CharField(max_length=50, verbose_name='学期')
+    time_budget = models.FloatField(verbose_name='求解时间预算（秒）')
+    dry_run = models.BooleanField(default=False, verbose_name='仅试算')
+    status = models.CharField(
+        max_length=10,
+        choices=STATUS_CHOICES,
+        default=STATUS_PENDING,
+        verbose_name='任务状态'
+    )
+    placed_count = models.PositiveIntegerField(default=0, verbose_name='已排课程数')
+    # 生成的排课：[{course, classroom, teaching_assignment, day_of_week, start_section, end_section, week_pattern, id}]，
+    # 试算时 id 为空
+    schedules = models.JSONField(default=list, blank=True, verbose_name='生成的排课')
+    # 未能排入的课程：[{course, code, reason}]
+    unplaced = models.JSONField(default=list, blank=True, verbose_name='未排入的课程')
+    error = models.CharField(max_length=200, blank=True, default='', verbose_name='失败原因')
+    created_at = models.DateTimeField(auto_now_add=True, verbose_name='提交时间')
+    started_at = models.DateTimeField(null=True, blank=True, verbose_name='开始时间')
+    finished_at = models.DateTimeField(null=True, blank=True, verbose_name='完成时间')
+    
+    def __str__(self):
+        """返回排课任务的字符串表示形式"""
+        return f'{self.semester} ({self.get_status_display()})'
+    
+    class Meta:
+        """模型的元数据配置，索引用于取出等待执行的任务"""
+        verbose_name = '自动排课任务'
+        verbose_name_plural = '自动排课任务'
+        indexes = [
+            models.Index(fields=['status', 'id'], name='course_timetable_status_idx'),
+        ]
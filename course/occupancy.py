@@ -0,0 +1,202 @@
+"""
+排课占用位图
+每个 (教室或教师, 星期几) 在 ScheduleOccupancy 中有一行位图，每个节次占两位（单周、双周），
+每周上课的排课同时占用两位，因此“每周”与“单周”“双周”的排课都会冲突，而单周与双周互不冲突。
+节次区间为闭区间：1-2 节与 2-3 节共用第2节，视为冲突（与原有的区间重叠检查一致）。
+
+教师的位图汇总该教师全部授课记录的排课，同一教师教多门课时也不会在同一时段重复排课；
+排课冲突检查只读取教室和教师各一行位图，与新排课的位图按位与，代价与教师所教课程数无关，
+不再对排课表做区间重叠查询。
+排课记录保存或删除、授课记录更换教师后由信号重算受影响的位图行（按索引读取该资源当天的排课），
+排课批量导入接口写入后自行重算涉及的位图行；其他绕过信号的批量写入（bulk_create / update）之后运行 rebuild_schedule_occupancy 重建
+"""
+from collections import defaultdict
+
+from django.db import connection, transaction
+from django.db.models import Q
+
+from .models import Schedule, ScheduleOccupancy, TeachingAssignment
+
+# 64位有符号整数可容纳的最大节次（每节两位，不使用符号位）
+MAX_SECTION = 31
+
+# 上课周模式对应的单双周位（低位为单周，高位为双周）
+WEEK_PATTERN_BITS = {
+    'all': 0b11,
+    'odd': 0b01,
+    'even': 0b10,
+}
+
+# 一次查询读取的位图行数上限（OR 条件过多时 SQLite 会报表达式树过深）
+CELL_BATCH_SIZE = 100
+
+CLASSROOM = ScheduleOccupancy.RESOURCE_CLASSROOM
+TEACHER = ScheduleOccupancy.RESOURCE_TEACHER
+
+# 资源类型对应的排课查询字段
+RESOURCE_FIELDS = {
+    CLASSROOM: 'classroom_id',
+    TEACHER: 'teaching_assignment__teacher_id',
+}
+
+
+def slot_mask(start_section, end_section, week_pattern):
+    """排课占用的位图：第 start_section 到 end_section 节（含），按上课周模式占用单周和/或双周位
+
+    超过 MAX_SECTION 的节次不计入（新排课由序列化器限制节次范围）
+    """
+    bits = WEEK_PATTERN_BITS[week_pattern]
+    mask = 0
+    for section in range(max(start_section, 1), min(end_section, MAX_SECTION) + 1):
+        mask |= bits << ((section - 1) * 2)
+    return mask
+
+
+def schedule_cells(classroom_id, teacher_id, day_of_week):
+    """排课涉及的位图行：[(资源类型, 资源ID, 星期几)]"""
+    cells = []
+    if classroom_id is not None:
+        cells.append((CLASSROOM, classroom_id, day_of_week))
+    if teacher_id is not None:
+        cells.append((TEACHER, teacher_id, day_of_week))
+    return cells
+
+
+def get_teacher_id(teaching_assignment_id):
+    """授课记录对应的教师ID"""
+    if teaching_assignment_id is None:
+        return None
+    return (
+        TeachingAssignment.objects.filter(pk=teaching_assignment_id)
+        .values_list('teacher_id', flat=True)
+        .first()
+    )
+
+
+def schedule_teacher_id(schedule):
+    """排课所属教师的ID，授课记录已加载时不再查询"""
+    if Schedule.teaching_assignment.is_cached(schedule):
+        return schedule.teaching_assignment.teacher_id
+    return get_teacher_id(schedule.teaching_assignment_id)
+
+
+def _cells_query(cells):
+    query = Q()
+    for resource_type, resource_id, day_of_week in cells:
+        query |= Q(resource_type=resource_type, resource_id=resource_id, day_of_week=day_of_week)
+    return query
+
+
+def get_masks(cells, lock=False):
+    """一次读取多个位图行，返回 {(资源类型, 资源ID, 星期几): 位图}，没有记录的行为0
+
+    lock 为真时先补齐缺失的行再加行锁（须在事务中调用），使并发的排课在同一资源、同一天上串行检查
+    """
+    if not cells:
+        return {}
+    if lock:
+        ScheduleOccupancy.objects.bulk_create(
+            [
+                ScheduleOccupancy(resource_type=resource_type, resource_id=resource_id, day_of_week=day_of_week)
+                for resource_type, resource_id, day_of_week in cells
+            ],
+            ignore_conflicts=True,
+            batch_size=CELL_BATCH_SIZE,
+        )
+    masks = dict.fromkeys(cells, 0)
+    cells = list(masks)
+    for offset in range(0, len(cells), CELL_BATCH_SIZE):
+        queryset = ScheduleOccupancy.objects.filter(_cells_query(cells[offset:offset + CELL_BATCH_SIZE]))
+        if lock:
+            queryset = queryset.select_for_update()
+        for resource_type, resource_id, day_of_week, mask in queryset.values_list(
+            'resource_type', 'resource_id', 'day_of_week', 'mask'
+        ):
+            masks[(resource_type, resource_id, day_of_week)] = mask
+    return masks
+
+
+def find_conflicts(classroom_id, teacher_id, day_of_week, start_section, end_section,
+                   week_pattern, instance=None, lock=False):
+    """检查新排课与已有排课的冲突，返回冲突的资源类型列表（CLASSROOM / TEACHER）
+
+    instance 为正在修改的排课记录（按数据库中的原值），检查时扣除它自身占用的位
+    """
+    mask = slot_mask(start_section, end_section, week_pattern)
+    cells = schedule_cells(classroom_id, teacher_id, day_of_week)
+    masks = get_masks(cells, lock=lock)
+    own = {}
+    if instance is not None and instance.pk is not None:
+        own_mask = slot_mask(instance.start_section, instance.end_section, instance.week_pattern)
+        own_teacher_id = get_teacher_id(instance.teaching_assignment_id)
+        for cell in schedule_cells(instance.classroom_id, own_teacher_id, instance.day_of_week):
+            own[cell] = own_mask
+    return [
+        cell[0] for cell in cells
+        if masks[cell] & ~own.get(cell, 0) & mask
+    ]
+
+
+def rebuild_cells(cells):
+    """按排课表重算指定位图行，占用为空的行删除
+
+    每类资源一条查询读取涉及的排课，重算后的位图用一条 upsert 写回（并发插入的同一行按唯一约束更新）
+    """
+    masks = dict.fromkeys(cells, 0)
+    if not masks:
+        return
+    resource_ids = defaultdict(set)
+    days = defaultdict(set)
+    for resource_type, resource_id, day_of_week in masks:
+        resource_ids[resource_type].add(resource_id)
+        days[resource_type].add(day_of_week)
+    for resource_type, ids in resource_ids.items():
+        field = RESOURCE_FIELDS[resource_type]
+        rows = Schedule.objects.filter(
+            **{f'{field}__in': ids},
+            day_of_week__in=days[resource_type],
+        ).values_list(field, 'day_of_week', 'start_section', 'end_section', 'week_pattern')
+        for resource_id, day_of_week, start_section, end_section, week_pattern in rows:
+            cell = (resource_type, resource_id, day_of_week)
+            if cell in masks:
+                masks[cell] |= slot_mask(start_section, end_section, week_pattern)
+
+    empty = [cell for cell, mask in masks.items() if not mask]
+    for offset in range(0, len(empty), CELL_BATCH_SIZE):
+        ScheduleOccupancy.objects.filter(_cells_query(empty[offset:offset + CELL_BATCH_SIZE])).delete()
+    ScheduleOccupancy.objects.bulk_create(
+        [
+            ScheduleOccupancy(resource_type=resource_type, resource_id=resource_id, day_of_week=day_of_week, mask=mask)
+            for (resource_type, resource_id, day_of_week), mask in masks.items() if mask
+        ],
+        update_conflicts=True,
+        # MySQL 的 ON DUPLICATE KEY UPDATE 不能指定冲突的唯一约束
+        unique_fields=(
+            ['resource_type', 'resource_id', 'day_of_week']
+            if connection.features.supports_update_conflicts_with_target else None
+        ),
+        update_fields=['mask'],
+        batch_size=CELL_BATCH_SIZE,
+    )
+
+
+def rebuild():
+    """按排课表重建全部位图，返回写入的行数"""
+    masks = {}
+    rows = Schedule.objects.values_list(
+        'classroom_id', 'teaching_assignment__teacher_id', 'day_of_week', 'start_section', 'end_section', 'week_pattern',
+    )
+    for classroom_id, teacher_id, day_of_week, start_section, end_section, week_pattern in rows.iterator():
+        mask = slot_mask(start_section, end_section, week_pattern)
+        for cell in schedule_cells(classroom_id, teacher_id, day_of_week):
+            masks[cell] = masks.get(cell, 0) | mask
+    with transaction.atomic():
+        ScheduleOccupancy.objects.all().delete()
+        ScheduleOccupancy.objects.bulk_create(
+            [
+                ScheduleOccupancy(resource_type=resource_type, resource_id=resource_id, day_of_week=day_of_week, mask=mask)
+                for (resource_type, resource_id, day_of_week), mask in masks.items()
+            ],
+            batch_size=1000,
+        )
+    return len(masks)
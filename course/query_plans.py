@@ -0,0 +1,113 @@
+"""
+关键查询的执行计划检查
+列出排课占用位图、空闲教室、课程筛选、选课列表等关键查询（与视图中的查询条件保持一致），
+用 EXPLAIN 检查它们是否在目标表上做全表扫描，由 check_query_plans 命令调用。
+
+数据量很小时数据库可能认为全表扫描更快，所以 PostgreSQL 上在事务内关闭 enable_seqscan 后再取执行计划，
+仍然出现 Seq Scan 说明没有可用的索引；SQLite 的 SCAN（包括 SCAN ... USING INDEX 的整个索引扫描）、
+MySQL 的 access_type ALL 视为全表扫描
+"""
+import json
+import re
+
+from django.db import connection, transaction
+
+from student.models import Student
+from .models import Course, CourseSearchToken, Enrollment, Schedule, ScheduleOccupancy
+
+# 示例参数，只用于生成执行计划
+SAMPLE_ID = 1
+SAMPLE_SEMESTER = '2024-2025-1'
+
+
+def _schedule_day(**owner):
+    """重算占用位图时读取教室或教师当天的排课（与 occupancy.rebuild_cells 的条件相同）"""
+    return Schedule.objects.filter(day_of_week=1, **owner).values_list('start_section', 'end_section', 'week_pattern')
+
+
+# 查询名称 -> (目标表, 生成查询集的函数)
+KEY_QUERIES = {
+    'schedule_classroom_day': (
+        Schedule._meta.db_table,
+        lambda: _schedule_day(classroom_id=SAMPLE_ID),
+    ),
+    'schedule_teacher_day': (
+        Schedule._meta.db_table,
+        lambda: _schedule_day(teaching_assignment__teacher_id=SAMPLE_ID),
+    ),
+    'schedule_occupancy': (
+        ScheduleOccupancy._meta.db_table,
+        lambda: ScheduleOccupancy.objects.filter(
+            resource_type=ScheduleOccupancy.RESOURCE_CLASSROOM, resource_id=SAMPLE_ID, day_of_week=1,
+        ),
+    ),
+    'occupancy_busy_rooms': (
+        ScheduleOccupancy._meta.db_table,
+        lambda: ScheduleOccupancy.objects.filter(resource_type=ScheduleOccupancy.RESOURCE_CLASSROOM, day_of_week=1),
+    ),
+    'course_catalog_filter': (
+        Course._meta.db_table,
+        lambda: Course.objects.filter(semester=SAMPLE_SEMESTER, course_type='required', teaching_method='offline'),
+    ),
+    'enrollment_by_student': (
+        Enrollment._meta.db_table,
+        lambda: Enrollment.objects.filter(student_id=SAMPLE_ID).order_by('enroll_date', 'id'),
+    ),
+    'course_roster': (
+        Enrollment._meta.db_table,
+        lambda: Enrollment.objects.filter(course_id=SAMPLE_ID).order_by('enroll_date', 'id'),
+    ),
+    'course_search_tokens': (
+        CourseSearchToken._meta.db_table,
+        lambda: CourseSearchToken.objects.filter(token__in=['数据', '据结'], field__in=['code', 'name', 'description']),
+    ),
+    'student_by_student_id': (
+        Student._meta.db_table,
+        lambda: Student.objects.filter(student_id='S0001'),
+    ),
+}
+
+
+def explain(queryset):
+    """返回查询集的执行计划文本（PostgreSQL 上关闭顺序扫描后获取）"""
+    if connection.vendor == 'postgresql':
+        with transaction.atomic():
+            with connection.cursor() as cursor:
+                cursor.execute('SET LOCAL enable_seqscan = off')
+            return queryset.explain()
+    if connection.vendor == 'mysql':
+        return queryset.explain(format='JSON')
+    return queryset.explain()
+
+
+def full_scans(plan, table):
+    """返回执行计划中对目标表做全表扫描的部分，空列表表示走了索引"""
+    if connection.vendor == 'postgresql':
+        return [line.strip() for line in plan.splitlines() if re.search(rf'Seq Scan on {table}\b', line)]
+    if connection.vendor == 'mysql':
+        found = []
+
+        def walk(node):
+            if isinstance(node, dict):
+                if node.get('table_name') == table and node.get('access_type') == 'ALL':
+                    found.append(f'{table}: access_type ALL')
+                for value in node.values():
+                    walk(value)
+            elif isinstance(node, list):
+                for value in node:
+                    walk(value)
+
+        walk(json.loads(plan))
+        return found
+    return [line.strip() for line in plan.splitlines() if re.search(rf'\bSCAN {table}\b', line)]
+
+
+def check(names=None):
+    """检查关键查询的执行计划，返回 [(查询名称, 执行计划, 全表扫描部分)]"""
+    results = []
+    for name, (table, build) in KEY_QUERIES.items():
+        if names and name not in names:
+            continue
+        plan = explain(build())
+        results.append((name, plan, full_scans(plan, table)))
+    return results
@@ -0,0 +1,85 @@
+"""
+列表和搜索接口的响应缓存
+缓存序列化后的响应数据，保存在 Django 缓存框架中（本地开发使用 locmem 或文件缓存）。
+缓存键由视图操作、用户可见范围和条件GET的 ETag 组成，ETag 已包含依赖表的版本号（版本化的键命名空间）、
+请求路径、规范化后的查询参数和响应格式：相关表写入并提交后信号递增版本号，之后的请求自然落到新的命名空间，
+旧条目不再被读取，等待过期即可，无需逐个删除。
+
+各操作的缓存有效期由 settings.RESPONSE_CACHE_TTL 配置，未配置或为0的操作不缓存；
+每个操作的命中和未命中次数计入缓存中的计数器，可用 response_cache_stats 命令查看
+"""
+import hashlib
+
+from django.conf import settings
+from django.core.cache import cache
+
+KEY_PREFIX = 'respcache'
+HIT = 'hit'
+MISS = 'miss'
+
+
+def get_ttl(name):
+    """获取操作的缓存有效期（秒），0表示不缓存"""
+    return getattr(settings, 'RESPONSE_CACHE_TTL', {}).get(name, 0)
+
+
+def get_scope(request):
+    """用户的可见范围：管理员、普通登录用户或匿名用户分别缓存"""
+    user = getattr(request, 'user', None)
+    if user is None or not user.is_authenticated:
+        return 'anonymous'
+    return 'admin' if user.is_admin() else 'user'
+
+
+def make_key(name, request, etag):
+    """由操作名、可见范围、主机名和 ETag 生成缓存键（分页链接包含主机名）"""
+    digest = hashlib.sha1(f'{get_scope(request)}|{request.get_host()}|{etag}'.encode()).hexdigest()
+    return f'{KEY_PREFIX}:{name}:{digest}'
+
+
+def get(name, request, etag):
+    """读取缓存的响应数据，未命中时返回None；同时累计命中/未命中次数"""
+    data = cache.get(make_key(name, request, etag))
+    _count(name, MISS if data is None else HIT)
+    return data
+
+
+def set(name, request, etag, data):
+    """按操作的有效期缓存响应数据"""
+    cache.set(make_key(name, request, etag), data, get_ttl(name))
+
+
+def _count(name, outcome):
+    key = f'{KEY_PREFIX}:stats:{name}:{outcome}'
+    try:
+        cache.incr(key)
+    except ValueError:
+        # 计数器不存在时创建，并发创建时可能少计一次
+        if not cache.add(key, 1, timeout=None):
+            cache.incr(key)
+
+
+def get_stats(names=None):
+    """返回各操作的命中/未命中次数 {操作名: {'hit': 次数, 'miss': 次数}}"""
+    names = names or sorted(getattr(settings, 'RESPONSE_CACHE_TTL', {}))
+    keys = {
+        f'{KEY_PREFIX}:stats:{name}:{outcome}': (name, outcome)
+        for name in names
+        for outcome in (HIT, MISS)
+    }
+    values = cache.get_many(list(keys))
+    stats = {name: {HIT: 0, MISS: 0} for name in names}
+    for key, value in values.items():
+        name, outcome = keys[key]
+        stats[name][outcome] = value
+    return stats
+
+
+def reset_stats(names=None):
+    """清零各操作的命中/未命中计数"""
+    names = names or sorted(getattr(settings, 'RESPONSE_CACHE_TTL', {}))
+    cache.delete_many([
+        f'{KEY_PREFIX}:stats:{name}:{outcome}'
+        for name in names
+        for outcome in (HIT, MISS)
+    ])
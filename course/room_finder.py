@@ -0,0 +1,113 @@
+"""
+空闲教室查找
+排课界面在用户每次输入时按星期几、节次区间、上课周模式、最小容量和所需设备查询空闲教室，
+查询不扫描排课表：
+- 教室按 (容量, ID) 升序排成列表缓存在进程内，教室表版本号变化后重建；
+  最小容量用二分查找定位到第一间容量足够的教室，从这里往后依次输出即为 best fit 顺序（容量刚好够用的在前）；
+- 时段是否被占用由占用位图判断：读取各教室当天的位图，与所查时段的位图按位与（数据库中计算），
+  只取回被占用的教室ID，单双周的判断与排课冲突检查一致。
+每次查询读取一次教室表版本号和一次占用位图，与排课数量无关
+"""
+import bisect
+import re
+
+from django.db.models import F
+
+from .models import Classroom, ScheduleOccupancy
+from . import occupancy, versions
+
+# 排序方式：best_fit 按容量从小到大（容量刚好够用的在前），name 按教室名称
+ORDER_BEST_FIT = 'best_fit'
+ORDER_NAME = 'name'
+ORDER_CHOICES = (
+    (ORDER_BEST_FIT, '容量从小到大'),
+    (ORDER_NAME, '教室名称'),
+)
+
+# 设备描述中的分隔符（中英文逗号、顿号、分号、斜杠和空白）
+EQUIPMENT_SEPARATORS = re.compile(r'[,，、;；/\s]+')
+
+
+def parse_equipment(text):
+    """把设备描述切分为小写的设备名称列表"""
+    return [item for item in EQUIPMENT_SEPARATORS.split((text or '').lower()) if item]
+
+
+class RoomIndex:
+    """按容量升序排列的教室（序列化后的数据），附带小写的设备描述用于匹配所需设备"""
+
+    def __init__(self, version, rooms):
+        self.version = version
+        self.rooms = sorted(rooms, key=lambda room: (room['capacity'], room['id']))
+        self.capacities = [room['capacity'] for room in self.rooms]
+        self.equipment = [(room['equipment'] or '').lower() for room in self.rooms]
+
+    def at_least(self, min_capacity):
+        """第一间容量不小于 min_capacity 的教室在列表中的位置"""
+        return bisect.bisect_left(self.capacities, min_capacity)
+
+
+_index = None
+
+
+def get_index():
+    """返回当前教室表版本号对应的教室索引，版本号变化（教室增删改的事务提交后）时重建"""
+    global _index
+    table_versions, _ = versions.get_versions([versions.CLASSROOM])
+    version = table_versions[versions.CLASSROOM]
+    index = _index
+    if index is None or index.version != version:
+        # 序列化器模块导入了本模块（查询参数的排序选项），这里延迟导入
+        from .serializers import ClassroomSerializer
+        index = RoomIndex(version, ClassroomSerializer(Classroom.objects.all(), many=True).data)
+        _index = index
+    return index
+
+
+def clear():
+    """丢弃进程内的教室索引，下次查询时重建"""
+    global _index
+    _index = None
+
+
+def busy_rooms(day_of_week, start_section, end_section, week_pattern):
+    """在指定时段被占用的教室ID集合"""
+    mask = occupancy.slot_mask(start_section, end_section, week_pattern)
+    return set(
+        ScheduleOccupancy.objects.filter(resource_type=occupancy.CLASSROOM, day_of_week=day_of_week)
+        .annotate(overlap=F('mask').bitand(mask))
+        .exclude(overlap=0)
+        .values_list('resource_id', flat=True)
+    )
+
+
+def find(day_of_week=None, start_section=None, end_section=None, week_pattern='all',
+         min_capacity=0, equipment=(), ordering=ORDER_BEST_FIT, limit=None):
+    """查找空闲教室，返回序列化后的教室列表
+
+    参数：
+    - day_of_week / start_section / end_section / week_pattern：要空闲的时段，不指定星期几时不检查占用
+    - min_capacity：最小容量
+    - equipment：所需设备名称，每项都须出现在教室的设备描述中
+    - ordering：ORDER_BEST_FIT 或 ORDER_NAME
+    - limit：最多返回的教室数
+    """
+    index = get_index()
+    busy = set()
+    if day_of_week is not None:
+        busy = busy_rooms(day_of_week, start_section, end_section, week_pattern)
+    required = [item.lower() for item in equipment]
+
+    found = []
+    for position in range(index.at_least(min_capacity), len(index.rooms)):
+        room = index.rooms[position]
+        if room['id'] in busy:
+            continue
+        if not all(item in index.equipment[position] for item in required):
+            continue
+        found.append(room)
+        if limit is not None and ordering == ORDER_BEST_FIT and len(found) >= limit:
+            break
+    if ordering == ORDER_NAME:
+        found.sort(key=lambda room: (room['name'], room['id']))
+    return found[:limit]
@@ -0,0 +1,264 @@
+"""
+排课批量导入
+一个学期的课表有上千条排课，逐条提交时每条都要单独检查冲突。批量导入把整批排课连同
+涉及的教室、教师当天已有的排课，按 (资源类型, 资源ID, 星期几) 分组，组内按开始节次排序后扫描一遍（扫描线），
+同时找出批次内部和批次与已有排课之间的冲突；单双周分别扫描，每周上课的排课两次都参与。
+冲突按提交顺序处理：与已有排课或更早通过的行冲突的行不写入，其余行用一次 bulk_create 写入，
+并在结果中列出冲突的对方（批次中的行号或已有排课的ID）。
+bulk_create 不触发信号，写入后由导入流程重算占用位图、递增排课表版本号
+"""
+import csv
+import heapq
+import io
+from collections import defaultdict
+
+from django.conf import settings
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import BaseParser
+
+from .models import Classroom, Course, Schedule, TeachingAssignment
+from . import occupancy, versions
+
+# 导入失败原因，与单条排课接口的错误信息保持一致
+COURSE_NOT_FOUND = '课程不存在'
+CLASSROOM_NOT_FOUND = '教室不存在'
+ASSIGNMENT_NOT_FOUND = '授课记录不存在'
+ONLINE_COURSE = '线上课程不允许分配教室'
+INVALID_DAY = '星期几必须在1-7之间'
+INVALID_SECTION = '开始节次必须为正数'
+SECTION_OUT_OF_RANGE = f'结束节次不能超过{occupancy.MAX_SECTION}'
+SECTION_ORDER = '开始节次必须小于结束节次'
+GROUP_FAILED = '同组的其他排课未能导入'
+CONFLICT_MESSAGES = {
+    occupancy.CLASSROOM: '该教室在该时间段已有排课',
+    occupancy.TEACHER: '该教师在该时间段已有排课',
+}
+
+# CSV 导入的列名，与 JSON 请求中每条排课的字段相同
+CSV_COLUMNS = (
+    'course', 'classroom', 'teaching_assignment', 'day_of_week', 'start_section', 'end_section', 'week_pattern',
+)
+
+
+class ScheduleCSVParser(BaseParser):
+    """解析 text/csv 请求体，首行为列名，解析为 {"schedules": [每行的字段字典]}；空单元格视为未提交"""
+    media_type = 'text/csv'
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        encoding = (parser_context or {}).get('encoding', settings.DEFAULT_CHARSET)
+        try:
+            # utf-8-sig 兼容 Excel 导出时带的 BOM
+            text = stream.read().decode('utf-8-sig' if encoding.lower() in ('utf-8', 'utf8') else encoding)
+        except UnicodeDecodeError as exc:
+            raise ParseError(f'CSV 编码错误：{exc}')
+        reader = csv.DictReader(io.StringIO(text))
+        missing = set(CSV_COLUMNS) - {'week_pattern'} - set(reader.fieldnames or ())
+        if missing:
+            raise ParseError(f'CSV 缺少列：{", ".join(sorted(missing))}')
+        return {
+            'schedules': [
+                {key: value.strip() for key, value in row.items() if key in CSV_COLUMNS and value and value.strip()}
+                for row in reader
+            ],
+        }
+
+
+def sweep(intervals):
+    """扫描线求重叠的区间对
+
+    参数：
+    - intervals: 同一资源、同一天的 [(开始节次, 结束节次, 上课周模式, 标识)]，节次为闭区间
+
+    返回：{(标识, 标识)} 重叠的区间对，对内按在 intervals 中的位置排序
+    """
+    position = {interval[3]: i for i, interval in enumerate(intervals)}
+    pairs = set()
+    for week_bit in (0b01, 0b10):
+        lane = sorted(
+            (start, end, key) for start, end, week_pattern, key in intervals
+            if occupancy.WEEK_PATTERN_BITS[week_pattern] & week_bit
+        )
+        # 仍在进行的区间，按结束节次排成小根堆
+        active = []
+        for start, end, key in lane:
+            while active and active[0][0] < start:
+                heapq.heappop(active)
+            for _, other in active:
+                pairs.add(tuple(sorted((other, key), key=position.__getitem__)))
+            heapq.heappush(active, (end, key))
+    return pairs
+
+
+def _validate(item, courses, classrooms, assignments):
+    """检查单条排课的取值和关联记录，返回失败原因，通过时返回None"""
+    course = courses.get(item['course'])
+    if course is None:
+        return COURSE_NOT_FOUND
+    if item['classroom'] not in classrooms:
+        return CLASSROOM_NOT_FOUND
+    if item['teaching_assignment'] not in assignments:
+        return ASSIGNMENT_NOT_FOUND
+    if course.teaching_method == 'online':
+        return ONLINE_COURSE
+    if not 1 <= item['day_of_week'] <= 7:
+        return INVALID_DAY
+    if item['start_section'] <= 0 or item['end_section'] <= 0:
+        return INVALID_SECTION
+    if item['end_section'] > occupancy.MAX_SECTION:
+        return SECTION_OUT_OF_RANGE
+    if item['start_section'] >= item['end_section']:
+        return SECTION_ORDER
+    return None
+
+
+def _existing_rows(cells):
+    """读取位图行对应资源当天已有的排课：[(排课ID, 教室ID, 教师ID, 星期几, 开始节次, 结束节次, 上课周模式)]
+
+    每类资源一个 IN 条件（走教室、授课记录的时段索引），可能多取到其他资源同一天的排课，由调用方按位图行过滤
+    """
+    resource_ids = defaultdict(set)
+    days = defaultdict(set)
+    for resource_type, resource_id, day_of_week in cells:
+        resource_ids[resource_type].add(resource_id)
+        days[resource_type].add(day_of_week)
+    queryset = Schedule.objects.none()
+    for resource_type, ids in resource_ids.items():
+        queryset |= Schedule.objects.filter(**{
+            f'{occupancy.RESOURCE_FIELDS[resource_type]}__in': ids,
+            'day_of_week__in': days[resource_type],
+        })
+    return list(queryset.values_list(
+        'id', 'classroom_id', 'teaching_assignment__teacher_id',
+        'day_of_week', 'start_section', 'end_section', 'week_pattern',
+    ))
+
+
+def import_schedules(items, group=None):
+    """批量导入排课，必须在事务中调用
+
+    参数：
+    - items: 按提交顺序排列的排课字段字典（course、classroom、teaching_assignment 为ID）
+    - group: 可选，由排课字段字典计算分组键的函数；同组中有任一行未通过时整组都不写入
+
+    返回：与 items 顺序一致的结果列表，每项为
+    {"id": 新排课ID或None, "error": 失败原因或None, "conflicts": [{"resource": 资源类型, "row"/"schedule": 行号/排课ID}]}
+    """
+    courses = Course.objects.in_bulk({item['course'] for item in items})
+    classrooms = Classroom.objects.in_bulk({item['classroom'] for item in items})
+    assignments = dict(
+        TeachingAssignment.objects.filter(pk__in={item['teaching_assignment'] for item in items})
+        .values_list('id', 'teacher_id')
+    )
+    results = [
+        {'id': None, 'error': _validate(item, courses, classrooms, assignments), 'conflicts': []}
+        for item in items
+    ]
+
+    # 按 (资源类型, 资源ID, 星期几) 分组：批次中通过校验的行用 ('row', 行号) 标识，已有排课用 ('schedule', ID) 标识
+    groups = defaultdict(list)
+    for index, (item, result) in enumerate(zip(items, results)):
+        if result['error'] is None:
+            interval = (item['start_section'], item['end_section'], item['week_pattern'], ('row', index))
+            for cell in occupancy.schedule_cells(
+                item['classroom'], assignments[item['teaching_assignment']], item['day_of_week']
+            ):
+                groups[cell].append(interval)
+    if not groups:
+        return results
+
+    # 先锁定涉及的位图行，与单条排课的冲突检查串行，再读取已有排课
+    occupancy.get_masks(list(groups), lock=True)
+    for schedule_id, classroom_id, teacher_id, day_of_week, start, end, week_pattern in _existing_rows(groups):
+        for cell in occupancy.schedule_cells(classroom_id, teacher_id, day_of_week):
+            if cell in groups:
+                groups[cell].append((start, end, week_pattern, ('schedule', schedule_id)))
+
+    # 每行的冲突对方：[(资源类型, 对方标识)]，已有排课之间的重叠与本次导入无关
+    clashes = defaultdict(list)
+    for cell, intervals in groups.items():
+        for first, second in sweep(intervals):
+            for own, other in ((first, second), (second, first)):
+                if own[0] == 'row':
+                    clashes[own[1]].append((cell[0], other))
+
+    # 按提交顺序处理：与已有排课或更早通过的行冲突的行不写入
+    accepted = set()
+    for index, result in enumerate(results):
+        if result['error'] is not None:
+            continue
+        blocking = [
+            (resource_type, other) for resource_type, other in clashes.get(index, ())
+            if other[0] == 'schedule' or other[1] in accepted
+        ]
+        if blocking:
+            result['error'] = CONFLICT_MESSAGES[blocking[0][0]]
+            result['conflicts'] = [
+                {'resource': resource_type, other[0]: other[1]}
+                for resource_type, other in sorted(set(blocking), key=lambda clash: (clash[1], clash[0]))
+            ]
+        else:
+            accepted.add(index)
+
+    if group is not None:
+        failed = {group(item) for item, result in zip(items, results) if result['error'] is not None}
+        for index in sorted(accepted):
+            if group(items[index]) in failed:
+                results[index]['error'] = GROUP_FAILED
+                accepted.discard(index)
+
+    if accepted:
+        _write(items, results, sorted(accepted), courses, classrooms, assignments)
+    return results
+
+
+def _write(items, results, indexes, courses, classrooms, assignments):
+    """写入通过检查的排课，并补做单条排课时由视图和信号完成的工作"""
+    schedules = Schedule.objects.bulk_create([
+        Schedule(
+            course_id=items[index]['course'],
+            classroom_id=items[index]['classroom'],
+            teaching_assignment_id=items[index]['teaching_assignment'],
+            day_of_week=items[index]['day_of_week'],
+            start_section=items[index]['start_section'],
+            end_section=items[index]['end_section'],
+            week_pattern=items[index]['week_pattern'],
+        )
+        for index in indexes
+    ])
+    for index, schedule in zip(indexes, schedules):
+        results[index]['id'] = schedule.pk
+    # MySQL 的 bulk_create 不返回主键，按唯一约束 (教室, 星期几, 开始节次, 上课周模式) 取回
+    missing = [index for index in indexes if results[index]['id'] is None]
+    if missing:
+        lookup = {
+            (classroom_id, day_of_week, start_section, week_pattern): schedule_id
+            for schedule_id, classroom_id, day_of_week, start_section, week_pattern in Schedule.objects.filter(
+                classroom_id__in={items[index]['classroom'] for index in missing},
+                day_of_week__in={items[index]['day_of_week'] for index in missing},
+            ).values_list('id', 'classroom_id', 'day_of_week', 'start_section', 'week_pattern')
+        }
+        for index in missing:
+            item = items[index]
+            results[index]['id'] = lookup.get(
+                (item['classroom'], item['day_of_week'], item['start_section'], item['week_pattern'])
+            )
+
+    # 与单条排课相同：线下课程的容量设为教室容量并关联教室（同一课程有多条排课时以最后一条为准）
+    bound = {}
+    for index in indexes:
+        bound[items[index]['course']] = items[index]['classroom']
+    for course_id, classroom_id in bound.items():
+        course = courses[course_id]
+        if course.teaching_method == 'offline':
+            course.max_students = classrooms[classroom_id].capacity
+            course.classroom = classrooms[classroom_id]
+            course.save(update_fields=['max_students', 'classroom', 'updated_at'])
+
+    occupancy.rebuild_cells([
+        cell
+        for index in indexes
+        for cell in occupancy.schedule_cells(
+            items[index]['classroom'], assignments[items[index]['teaching_assignment']], items[index]['day_of_week']
+        )
+    ])
+    versions.bump(versions.SCHEDULE)
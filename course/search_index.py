@@ -0,0 +1,124 @@
+"""
+课程全文搜索索引
+课程的名称、代码、描述按空白切分后再切成二元词元（bigram，单个字符的片段保留为一元词元），
+存入 CourseSearchToken（倒排索引），课程保存后由信号重建该课程的词元。
+中文不需要分词，MySQL、PostgreSQL 和本地测试用的 SQLite 使用同一套实现。
+
+搜索时先按查询词的词元在 (token, field, course) 索引上找出包含全部词元的候选课程，
+再在候选课程上用 icontains 确认查询词确实出现（词元只是必要条件），不再对课程表做前导通配符的全表扫描；
+相关度为命中词元的权重之和，权重按字段区分（代码 > 名称 > 描述）并乘以词元出现次数。
+只有一个字符的查询词没有可用的词元，只能在其余条件筛出的课程上逐行匹配
+"""
+from collections import Counter
+
+from django.db import transaction
+from django.db.models import Count, IntegerField, OuterRef, Q, Subquery, Sum, Value
+from django.db.models.functions import Coalesce
+
+from .models import Course, CourseSearchToken
+
+# 建立索引的字段及其权重
+FIELD_WEIGHTS = {
+    'code': 5,
+    'name': 3,
+    'description': 1,
+}
+
+# 重建索引时每批写入的词元行数
+BATCH_SIZE = 1000
+
+
+def tokenize(text):
+    """把文本切分为词元，返回 {词元: 出现次数}"""
+    counts = Counter()
+    for run in (text or '').lower().split():
+        if len(run) == 1:
+            counts[run] += 1
+            continue
+        for i in range(len(run) - 1):
+            counts[run[i:i + 2]] += 1
+    return counts
+
+
+def query_tokens(text):
+    """查询词的词元集合；单个字符的查询词不产生词元"""
+    return {
+        token
+        for term in (text or '').split() if len(term) > 1
+        for token in tokenize(term)
+    }
+
+
+def build_tokens(course, model=CourseSearchToken):
+    """生成课程的全部词元行（未保存），model 可以是迁移中的历史模型"""
+    return [
+        model(course_id=course.pk, field=field, token=token, weight=weight * count)
+        for field, weight in FIELD_WEIGHTS.items()
+        for token, count in tokenize(getattr(course, field)).items()
+    ]
+
+
+def index_course(course):
+    """重建单门课程的词元"""
+    with transaction.atomic():
+        CourseSearchToken.objects.filter(course=course).delete()
+        CourseSearchToken.objects.bulk_create(build_tokens(course))
+
+
+def rebuild(queryset=None):
+    """重建全部（或指定）课程的词元，返回写入的词元行数"""
+    queryset = Course.objects.all() if queryset is None else queryset
+    written = 0
+    with transaction.atomic():
+        CourseSearchToken.objects.filter(course__in=queryset).delete()
+        batch = []
+        for course in queryset.only('id', *FIELD_WEIGHTS).iterator():
+            batch.extend(build_tokens(course))
+            if len(batch) >= BATCH_SIZE:
+                CourseSearchToken.objects.bulk_create(batch)
+                written += len(batch)
+                batch = []
+        CourseSearchToken.objects.bulk_create(batch)
+        written += len(batch)
+    return written
+
+
+def _candidates(tokens, fields):
+    """包含全部词元的课程ID子查询"""
+    return (
+        CourseSearchToken.objects.filter(token__in=tokens, field__in=fields)
+        .values('course')
+        .annotate(matched=Count('token', distinct=True))
+        .filter(matched=len(tokens))
+        .values('course')
+    )
+
+
+def filter_field(queryset, field, text):
+    """按单个字段包含指定文本过滤课程（等价于 field__icontains，先用索引缩小范围）"""
+    tokens = query_tokens(text)
+    if tokens:
+        queryset = queryset.filter(id__in=_candidates(tokens, [field]))
+    return queryset.filter(**{f'{field}__icontains': text})
+
+
+def search(queryset, text):
+    """全文搜索：每个查询词都须出现在名称、代码或描述中，附加 search_score 注解并按相关度降序排列"""
+    tokens = query_tokens(text)
+    if tokens:
+        queryset = queryset.filter(id__in=_candidates(tokens, list(FIELD_WEIGHTS)))
+    for term in text.split():
+        queryset = queryset.filter(
+            Q(code__icontains=term) | Q(name__icontains=term) | Q(description__icontains=term)
+        )
+    if tokens:
+        score = (
+            CourseSearchToken.objects.filter(course=OuterRef('pk'), token__in=tokens)
+            .values('course')
+            .annotate(score=Sum('weight'))
+            .values('score')
+        )
+        search_score = Coalesce(Subquery(score, output_field=IntegerField()), 0)
+    else:
+        search_score = Value(0, output_field=IntegerField())
+    return queryset.annotate(search_score=search_score).order_by('-search_score', 'id')
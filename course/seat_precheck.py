@@ -0,0 +1,151 @@
+"""
+选课座位预检查（同一节点上所有工作进程共享）
+座位表保存在 mmap 映射的文件中，按课程ID定位固定大小的条目，记录课程最近一次从数据库读到的
+人数上限和已占用名额（已选人数 + 预留人数）。选课接口在访问数据库前先查询座位表，
+条目在有效期内且已满的课程直接拒绝，只有可能选上的请求才会进入数据库的条件UPDATE或行锁。
+
+座位表只用于快速拒绝，不参与准入判断：条目过期、缺失或被其他课程覆盖时都按“未满”处理，
+最终的容量保证仍由数据库完成。本节点释放座位时在事务提交后使条目失效，
+其他节点上的条目最多在 SEAT_PRECHECK_TTL_SECONDS 内过期，即座位释放后最多在该有效期内仍被误判为已满。
+写入使用 fcntl 记录锁在进程间互斥，没有 fcntl 的平台（如 Windows）上预检查自动关闭
+"""
+import logging
+import mmap
+import os
+import struct
+import threading
+import time
+
+from django.conf import settings
+from django.db import transaction
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - Windows
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+# 条目结构：版本号、课程ID、人数上限、已占用名额、刷新时间（time.time()）
+# 版本号为奇数表示正在写入，读取时版本号前后一致且为偶数才有效
+ENTRY = struct.Struct('<Qqiid')
+
+
+def is_enabled():
+    """是否启用座位预检查"""
+    return fcntl is not None and getattr(settings, 'SEAT_PRECHECK_ENABLED', False)
+
+
+class SeatTable:
+    """mmap 映射文件中的座位表，条目位置为 课程ID % 条目数量"""
+
+    def __init__(self, path, slots):
+        self.path = path
+        self.slots = slots
+        size = slots * ENTRY.size
+        self.fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o600)
+        if os.fstat(self.fd).st_size < size:
+            os.ftruncate(self.fd, size)
+        self.map = mmap.mmap(self.fd, size, mmap.MAP_SHARED, mmap.PROT_READ | mmap.PROT_WRITE)
+        # fcntl 记录锁只在进程之间互斥，同一进程内的线程另用线程锁
+        self.thread_lock = threading.Lock()
+
+    def _offset(self, course_id):
+        return (course_id % self.slots) * ENTRY.size
+
+    def read(self, course_id):
+        """读取课程的条目，返回 (人数上限, 已占用名额, 刷新时间)；条目不属于该课程或正在写入时返回None"""
+        offset = self._offset(course_id)
+        for _ in range(3):
+            version, entry_course_id, max_students, taken, refreshed_at = ENTRY.unpack_from(self.map, offset)
+            if version % 2 == 0 and struct.unpack_from('<Q', self.map, offset)[0] == version:
+                if entry_course_id != course_id:
+                    return None
+                return max_students, taken, refreshed_at
+        return None
+
+    def write(self, course_id, max_students, taken, refreshed_at):
+        """写入课程的条目，写入期间版本号为奇数"""
+        offset = self._offset(course_id)
+        with self.thread_lock:
+            fcntl.lockf(self.fd, fcntl.LOCK_EX, ENTRY.size, offset, os.SEEK_SET)
+            try:
+                version = struct.unpack_from('<Q', self.map, offset)[0]
+                struct.pack_into('<Q', self.map, offset, version | 1)
+                ENTRY.pack_into(self.map, offset, version | 1, course_id, max_students, taken, refreshed_at)
+                struct.pack_into('<Q', self.map, offset, (version | 1) + 1)
+            finally:
+                fcntl.lockf(self.fd, fcntl.LOCK_UN, ENTRY.size, offset, os.SEEK_SET)
+
+    def close(self):
+        self.map.close()
+        os.close(self.fd)
+
+
+_table = None
+_table_lock = threading.Lock()
+
+
+def get_table():
+    """获取本进程映射的座位表，配置的路径或大小变化时重新映射；无法映射时返回None"""
+    global _table
+    path = settings.SEAT_PRECHECK_PATH
+    slots = getattr(settings, 'SEAT_PRECHECK_SLOTS', 65536)
+    table = _table
+    if table is not None and table.path == path and table.slots == slots:
+        return table
+    with _table_lock:
+        if _table is not None and _table.path == path and _table.slots == slots:
+            return _table
+        try:
+            table = SeatTable(path, slots)
+        except OSError:
+            logger.exception('无法映射座位预检查文件 %s', path)
+            return None
+        if _table is not None:
+            _table.close()
+        _table = table
+        return table
+
+
+def _to_course_id(value):
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def is_definitely_full(course_id):
+    """座位表中该课程的条目在有效期内且已满时返回True，其余情况（包括未启用）返回False"""
+    course_id = _to_course_id(course_id)
+    if course_id is None or not is_enabled():
+        return False
+    table = get_table()
+    entry = table.read(course_id) if table else None
+    if entry is None:
+        return False
+    max_students, taken, refreshed_at = entry
+    ttl = getattr(settings, 'SEAT_PRECHECK_TTL_SECONDS', 2)
+    return taken >= max_students and time.time() - refreshed_at < ttl
+
+
+def record(course_id, max_students, taken, refreshed_at=None):
+    """用从数据库读到的人数上限和已占用名额刷新课程的条目"""
+    if not is_enabled():
+        return
+    table = get_table()
+    if table:
+        table.write(course_id, max_students, taken, time.time() if refreshed_at is None else refreshed_at)
+
+
+def record_course(course):
+    """用课程实例上的计数刷新课程的条目（分片计数的课程需已汇总槽位计数）"""
+    record(course.pk, course.max_students, course.enrolled_count + course.held_count)
+
+
+def invalidate(course_id):
+    """使课程的条目失效：在当前事务提交后执行，提交前其他请求仍可能读到释放前的计数"""
+    if not is_enabled():
+        return
+    # 刷新时间写为0，条目立即视为过期
+    transaction.on_commit(lambda: record(course_id, 0, 0, refreshed_at=0.0))
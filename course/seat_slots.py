@@ -0,0 +1,248 @@
+"""
+分片座位计数
+热门课程启用分片后，座位计数分散到 N 个槽位行（CourseSeatSlot），每个槽位分得一部分名额：
+抢占座位时随机选择一个槽位执行带条件的UPDATE，并发请求分散在不同的行上，不再争用课程行；
+已选人数和预留人数为各槽位之和。随机槽位名额用尽时，把当前未被占用的槽位的剩余名额
+重新平均分配后再抢占；各槽位名额之和始终不超过课程的总人数上限
+"""
+import random
+
+from django.db import transaction
+from django.db.models import F, Sum
+
+from .models import Course, CourseSeatSlot
+
+# 课程计数字段与槽位计数字段的对应关系
+SLOT_FIELDS = {
+    'enrolled_count': 'enrolled',
+    'held_count': 'held',
+}
+
+
+class SlotExhausted(Exception):
+    """槽位没有剩余名额，用于回滚抢占槽位的保存点"""
+
+
+def get_slot_totals(course_id):
+    """汇总课程各槽位的计数，返回 (已选人数, 预留人数)"""
+    totals = CourseSeatSlot.objects.filter(course_id=course_id).aggregate(
+        enrolled=Sum('enrolled'),
+        held=Sum('held'),
+    )
+    return totals['enrolled'] or 0, totals['held'] or 0
+
+
+def get_slot_totals_by_course(course_ids):
+    """按课程汇总一批课程各槽位的计数，返回 {课程ID: (已选人数, 预留人数)}"""
+    rows = (
+        CourseSeatSlot.objects.filter(course_id__in=course_ids)
+        .values('course_id')
+        .annotate(enrolled=Sum('enrolled'), held=Sum('held'))
+        .values_list('course_id', 'enrolled', 'held')
+    )
+    return {course_id: (enrolled, held) for course_id, enrolled, held in rows}
+
+
+def claim_slot_seat(course_id, shards, field):
+    """在分片计数的课程上抢占一个座位，成功返回True
+
+    先随机选择一个槽位抢占；该槽位名额用尽时重新分配其他槽位的剩余名额后再抢占
+    """
+    slot_field = SLOT_FIELDS[field]
+    if _claim_in_slot(course_id, random.randrange(shards), slot_field):
+        return True
+    return rebalance_and_claim(course_id, slot_field)
+
+
+def _claim_in_slot(course_id, slot, slot_field):
+    """在指定槽位上执行 UPDATE ... SET <field> = <field> + 1 WHERE enrolled + held < capacity
+
+    语句放在保存点中执行：PostgreSQL 等待并发更新后重新检查条件失败时仍会锁住该行，
+    失败时回滚保存点释放该行锁，避免随后再锁定其他槽位时与其他事务形成死锁
+    """
+    try:
+        with transaction.atomic():
+            updated = CourseSeatSlot.objects.alias(
+                taken=F('enrolled') + F('held'),
+            ).filter(
+                course_id=course_id,
+                slot=slot,
+                taken__lt=F('capacity'),
+            ).update(**{slot_field: F(slot_field) + 1})
+            if not updated:
+                raise SlotExhausted()
+    except SlotExhausted:
+        return False
+    return True
+
+
+def rebalance_and_claim(course_id, slot_field):
+    """随机槽位名额用尽时，重新分配剩余名额并抢占一个座位
+
+    只锁定当前没有被其他事务占用的槽位（SKIP LOCKED），不等待任何行锁，
+    在这些槽位之间平均分配它们的剩余名额（名额之和不变）后抢占；
+    这些槽位都没有剩余名额时，逐个等待仍有剩余名额的其他槽位
+    """
+    with transaction.atomic():
+        slots = list(
+            CourseSeatSlot.objects.select_for_update(skip_locked=True)
+            .filter(course_id=course_id)
+            .order_by('slot')
+        )
+        if _redistribute(slots, free_seats(slots)):
+            slot = random.choice([slot for slot in slots if slot.enrolled + slot.held < slot.capacity])
+            CourseSeatSlot.objects.filter(pk=slot.pk).update(**{slot_field: F(slot_field) + 1})
+            return True
+
+    locked = {slot.slot for slot in slots}
+    remaining = (
+        CourseSeatSlot.objects.alias(taken=F('enrolled') + F('held'))
+        .filter(course_id=course_id, taken__lt=F('capacity'))
+        .exclude(slot__in=locked)
+        .order_by('slot')
+        .values_list('slot', flat=True)
+    )
+    return any(_claim_in_slot(course_id, slot, slot_field) for slot in remaining)
+
+
+def _redistribute(slots, free):
+    """把 free 个剩余名额平均分配到已加锁的槽位上，每个槽位的名额为已占用数量加上分得的名额，
+    返回剩余名额总数
+    """
+    if not slots:
+        return free
+    share, extra = divmod(free, len(slots))
+    changed = []
+    for index, slot in enumerate(slots):
+        capacity = slot.enrolled + slot.held + share + (1 if index < extra else 0)
+        if slot.capacity != capacity:
+            slot.capacity = capacity
+            changed.append(slot)
+    if changed:
+        CourseSeatSlot.objects.bulk_update(changed, ['capacity'])
+    return free
+
+
+def rebalance_slots(course_id):
+    """按槽位顺序锁定课程的全部槽位，把剩余名额平均分配到各槽位，返回加锁后的槽位列表
+
+    名额之和为 max(总人数上限, 已占用总数)，课程人数上限调小后不会再有槽位可抢占；
+    用于批量准入、调整人数上限等低频路径，必须在事务中调用
+    """
+    max_students = Course.objects.filter(pk=course_id).values_list('max_students', flat=True).first() or 0
+    slots = _lock_slots(course_id)
+    used = sum(slot.enrolled + slot.held for slot in slots)
+    _redistribute(slots, max(0, max_students - used))
+    return slots
+
+
+def _lock_slots(course_id):
+    """按槽位顺序锁定课程的全部槽位，返回槽位列表"""
+    return list(CourseSeatSlot.objects.select_for_update().filter(course_id=course_id).order_by('slot'))
+
+
+def adjust_slot_counter(course_id, shards, field, delta):
+    """按增量调整分片计数课程的计数，返回是否调整成功
+
+    增加时计入随机槽位（与未分片时相同，不检查名额）；
+    减少时从仍有计数的槽位中依次扣减，每次扣减都带有不为负数的条件
+    """
+    slot_field = SLOT_FIELDS[field]
+    if delta > 0:
+        return CourseSeatSlot.objects.filter(
+            course_id=course_id,
+            slot=random.randrange(shards),
+        ).update(**{slot_field: F(slot_field) + delta}) > 0
+
+    remaining = -delta
+    candidates = list(
+        CourseSeatSlot.objects.filter(course_id=course_id, **{f'{slot_field}__gt': 0})
+        .values_list('slot', slot_field)
+    )
+    random.shuffle(candidates)
+    for slot, value in candidates:
+        take = min(value, remaining)
+        updated = CourseSeatSlot.objects.filter(
+            course_id=course_id,
+            slot=slot,
+            **{f'{slot_field}__gte': take},
+        ).update(**{slot_field: F(slot_field) - take})
+        if updated:
+            remaining -= take
+            if not remaining:
+                break
+    return remaining < -delta
+
+
+def free_seats(slots):
+    """已加锁槽位的剩余名额之和"""
+    return sum(max(0, slot.capacity - slot.enrolled - slot.held) for slot in slots)
+
+
+def fill_locked_slots(slots, field, count):
+    """将 count 个座位计入已加锁的槽位（批量准入使用）
+
+    依次填满有剩余名额的槽位；调用方已按 free_seats 限制准入数量，
+    超出部分（正常情况下不会出现）计入第一个槽位，保证计数与选课记录一致
+    """
+    slot_field = SLOT_FIELDS[field]
+    changed = []
+    for slot in slots:
+        if not count:
+            break
+        take = min(count, max(0, slot.capacity - slot.enrolled - slot.held))
+        if take:
+            setattr(slot, slot_field, getattr(slot, slot_field) + take)
+            changed.append(slot)
+            count -= take
+    if count and slots:
+        setattr(slots[0], slot_field, getattr(slots[0], slot_field) + count)
+        if slots[0] not in changed:
+            changed.append(slots[0])
+    if changed:
+        CourseSeatSlot.objects.bulk_update(changed, [slot_field])
+
+
+def reset_slots(course_id, shards, enrolled, held):
+    """重建课程的槽位：已选人数和预留人数平均分散到各槽位，再分配剩余名额；必须在事务中调用"""
+    CourseSeatSlot.objects.filter(course_id=course_id).delete()
+    enrolled_share, enrolled_extra = divmod(enrolled, shards)
+    held_share, held_extra = divmod(held, shards)
+    CourseSeatSlot.objects.bulk_create([
+        CourseSeatSlot(
+            course_id=course_id,
+            slot=index,
+            enrolled=enrolled_share + (1 if index < enrolled_extra else 0),
+            held=held_share + (1 if index < held_extra else 0),
+            capacity=0,
+        )
+        for index in range(shards)
+    ])
+    rebalance_slots(course_id)
+
+
+def enable_seat_shards(course_id, shards):
+    """为课程启用分片计数（已启用时按新的槽位数重建），课程行上的计数转入各槽位并清零"""
+    if shards <= 0:
+        raise ValueError('槽位数量必须为正数')
+    with transaction.atomic():
+        course = Course.objects.select_for_update().get(pk=course_id)
+        if course.seat_shards:
+            _lock_slots(course_id)
+            enrolled, held = get_slot_totals(course_id)
+        else:
+            enrolled, held = course.enrolled_count, course.held_count
+        Course.objects.filter(pk=course_id).update(seat_shards=shards, enrolled_count=0, held_count=0)
+        reset_slots(course_id, shards, enrolled, held)
+
+
+def disable_seat_shards(course_id):
+    """关闭课程的分片计数，各槽位的计数汇总回课程行后删除槽位"""
+    with transaction.atomic():
+        course = Course.objects.select_for_update().get(pk=course_id)
+        if not course.seat_shards:
+            return
+        _lock_slots(course_id)
+        enrolled, held = get_slot_totals(course_id)
+        CourseSeatSlot.objects.filter(course_id=course_id).delete()
+        Course.objects.filter(pk=course_id).update(seat_shards=0, enrolled_count=enrolled, held_count=held)
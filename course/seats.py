@@ -0,0 +1,168 @@
+"""
+课程座位计数的维护逻辑
+Course.enrolled_count 是选课记录数量的冗余计数，Course.held_count 是座位预留数量的冗余计数，
+两者之和不超过 max_students；所有增减都通过带条件的UPDATE完成，与对应记录的写入处于同一事务中。
+启用分片计数（seat_shards > 0）的课程，计数改由 seat_slots 模块在各槽位上维护
+"""
+from django.db import transaction
+from django.db.models import Case, F, IntegerField, OuterRef, Subquery, Sum, When
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from . import seat_precheck, seat_slots
+from .models import Course, CourseSeatSlot, SeatHold
+
+
+class CourseFullError(Exception):
+    """抢占座位失败（课程已满），用于回滚同一事务中已写入的数据"""
+
+
+def get_seat_shards(course_id):
+    """读取课程的计数分片数（不加锁），课程不存在时返回None"""
+    return Course.objects.filter(pk=course_id).values_list('seat_shards', flat=True).first()
+
+
+def adjust_counter(course_id, field, delta):
+    """按增量调整课程的计数字段
+
+    使用F表达式在数据库端完成加减，避免读取-修改-写回的竞争；
+    减少时附带 计数 >= |delta| 的条件，保证计数不会变为负数。
+    课程行上的UPDATE附带 seat_shards = 0 的条件，与启用/关闭分片并发时重新读取分片状态
+    """
+    if not delta:
+        return 0
+    while True:
+        shards = get_seat_shards(course_id)
+        if shards is None:
+            return 0
+        if shards:
+            updated = seat_slots.adjust_slot_counter(course_id, shards, field, delta)
+        else:
+            queryset = Course.objects.filter(pk=course_id, seat_shards=0)
+            if delta < 0:
+                queryset = queryset.filter(**{f'{field}__gte': -delta})
+            updated = queryset.update(**{field: F(field) + delta})
+        if updated or get_seat_shards(course_id) == shards:
+            if updated and delta < 0:
+                # 释放了名额，本节点座位预检查中的条目在提交后失效
+                seat_precheck.invalidate(course_id)
+            return int(updated)
+
+
+def adjust_enrolled_count(course_id, delta):
+    """按增量调整课程的已选人数"""
+    return adjust_counter(course_id, 'enrolled_count', delta)
+
+
+def adjust_held_count(course_id, delta):
+    """按增量调整课程的预留人数"""
+    return adjust_counter(course_id, 'held_count', delta)
+
+
+def try_claim_seat(course_id, field='enrolled_count'):
+    """尝试为课程抢占一个座位
+
+    执行 UPDATE ... SET <field> = <field> + 1
+    WHERE id = ? AND enrolled_count + held_count < max_students，
+    受影响行数为1表示抢占成功，为0表示课程已满或不存在；
+    行锁只在该语句到事务提交之间持有，不需要事先 select_for_update。
+    分片计数的课程改为在随机槽位上抢占，不再更新课程行
+
+    参数：
+    - field: 抢占成功后增加的计数字段，选课为 enrolled_count，座位预留为 held_count
+    """
+    while True:
+        shards = get_seat_shards(course_id)
+        if shards is None:
+            return False
+        if shards:
+            claimed = seat_slots.claim_slot_seat(course_id, shards, field)
+        else:
+            claimed = Course.objects.alias(
+                taken=F('enrolled_count') + F('held_count'),
+            ).filter(
+                pk=course_id,
+                seat_shards=0,
+                taken__lt=F('max_students'),
+            ).update(**{field: F(field) + 1}) == 1
+        # 抢占失败且分片状态未变化时课程确实已满
+        if claimed or get_seat_shards(course_id) == shards:
+            return claimed
+
+
+def claim_seat(course_id, field='enrolled_count'):
+    """抢占座位；课程已满时先回收该课程已过期的座位预留（名额优先转给候补学生），再重试一次"""
+    if try_claim_seat(course_id, field):
+        return True
+    return bool(reclaim_expired_holds(course_id)) and try_claim_seat(course_id, field)
+
+
+def release_expired_holds(course_id, now=None):
+    """回收课程中已过期的座位预留，返回回收的数量
+
+    通过 (course, expires_at) 索引定位过期记录；计数按DELETE实际删除的行数扣减，
+    并发回收同一批记录时每条预留只会被扣减一次
+    """
+    deleted, _ = SeatHold.objects.filter(
+        course_id=course_id,
+        expires_at__lte=now or timezone.now(),
+    ).delete()
+    adjust_held_count(course_id, -deleted)
+    return deleted
+
+
+def reclaim_expired_holds(course_id):
+    """回收课程中已过期的座位预留，回收的名额按候补顺序优先转给候补名单中的学生，返回回收的数量
+
+    当前请求只能使用转正后剩余的名额，不会越过候补名单抢占座位
+    """
+    # 候补模块通过 claim_seat 抢占座位，这里延迟导入
+    from .waitlist import promote_from_waitlist
+    with transaction.atomic():
+        released = release_expired_holds(course_id)
+        for _ in range(released):
+            if promote_from_waitlist(course_id) is None:
+                break
+    return released
+
+
+def load_seat_counts(course):
+    """分片计数的课程从各槽位汇总已选人数和预留人数，写入课程实例（不保存），返回课程实例"""
+    if course.seat_shards:
+        course.enrolled_count, course.held_count = seat_slots.get_slot_totals(course.pk)
+    return course
+
+
+def annotate_current_students(queryset):
+    """为课程查询集附加 current_students_count 注解（已选人数）
+
+    普通课程直接取冗余计数，分片计数的课程用相关子查询汇总各槽位，
+    列表渲染时不再逐门课程查询槽位
+    """
+    slot_enrolled = (
+        CourseSeatSlot.objects.filter(course=OuterRef('pk'))
+        .values('course')
+        .annotate(total=Sum('enrolled'))
+        .values('total')
+    )
+    return queryset.annotate(
+        current_students_count=Case(
+            When(seat_shards__gt=0, then=Coalesce(Subquery(slot_enrolled), 0)),
+            default=F('enrolled_count'),
+            output_field=IntegerField(),
+        )
+    )
+
+
+def refresh_available_seats(course):
+    """获取课程实例的剩余名额；名额已满且存在预留时先按需回收过期预留
+
+    分片计数的课程先从槽位汇总计数；回收的名额优先转给候补学生，回收后重新读取计数到传入的课程实例上，
+    读到的计数同时刷新本节点的座位预检查
+    """
+    load_seat_counts(course)
+    if course.available_seats <= 0 and course.held_count > 0 and reclaim_expired_holds(course.pk):
+        course.refresh_from_db(fields=['enrolled_count', 'held_count'])
+        load_seat_counts(course)
+    seat_precheck.record_course(course)
+    return course.available_seats
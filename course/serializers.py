@@ -6,13 +6,18 @@
 
 
 from rest_framework import serializers
-from .models import Course, Enrollment, TeachingAssignment, Classroom, Schedule
+from rest_framework.reverse import reverse
+from python_web_student_system.sparse_fields import SparseFieldsMixin
+from .models import (
+    Course, Enrollment, TeachingAssignment, Classroom, Schedule, AdmissionRequest, Waitlist, SeatHold, LotteryEntry,
+    TimetableJob,
+)
 from student.models import Student
 from teacher.models import Teacher
-from django.db import transaction
-from django.db.models import Q
+from .seats import load_seat_counts, refresh_available_seats
+from . import occupancy, room_finder
 
-class ClassroomSerializer(serializers.ModelSerializer):
+class ClassroomSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     """
     教室模型的序列化器
     根据课程表修复方案文档实现教室表字段定义
@@ -43,7 +48,32 @@ class ClassroomSerializer(serializers.ModelSerializer):
         
         return value
 
-class TeachingAssignmentSerializer(serializers.ModelSerializer):
+class ClassroomAvailabilitySerializer(serializers.Serializer):
+    """空闲教室查询参数的序列化器；星期几、开始节次、结束节次须同时提供或同时省略"""
+    # 单次查询最多返回的教室数
+    MAX_LIMIT = 500
+    
+    day_of_week = serializers.IntegerField(required=False, min_value=1, max_value=7)
+    start_section = serializers.IntegerField(required=False, min_value=1, max_value=occupancy.MAX_SECTION)
+    end_section = serializers.IntegerField(required=False, min_value=1, max_value=occupancy.MAX_SECTION)
+    week_pattern = serializers.ChoiceField(choices=Schedule.WEEK_PATTERN_CHOICES, default='all')
+    min_capacity = serializers.IntegerField(required=False, min_value=0, default=0)
+    # 所需设备，多项用逗号、顿号或空格分隔
+    equipment = serializers.CharField(required=False, allow_blank=True, default='')
+    ordering = serializers.ChoiceField(choices=room_finder.ORDER_CHOICES, default=room_finder.ORDER_BEST_FIT)
+    limit = serializers.IntegerField(required=False, min_value=1, max_value=MAX_LIMIT)
+    
+    def validate(self, data):
+        """时段参数须完整，开始节次不大于结束节次"""
+        given = [name for name in ('day_of_week', 'start_section', 'end_section') if name in data]
+        if given and len(given) < 3:
+            raise serializers.ValidationError('星期几、开始节次、结束节次须同时提供')
+        if given and data['start_section'] > data['end_section']:
+            raise serializers.ValidationError('开始节次不能大于结束节次')
+        data['equipment'] = room_finder.parse_equipment(data['equipment'])
+        return data
+
+class TeachingAssignmentSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     """教师授课模型的序列化器
     根据课程表修复方案文档实现教师-课程多对多关联
     """
@@ -101,25 +131,37 @@ class TeachingAssignmentSerializer(serializers.ModelSerializer):
         if qs.exists():
             raise serializers.ValidationError('该教师已经被分配到这门课程')
         
+        # 更换教师时，该授课记录的排课不能与新教师已有的排课冲突（新教师的占用位图合并了其全部授课记录）
+        if self.instance is not None and self.instance.teacher_id != teacher.pk:
+            schedules = list(self.instance.schedules.values_list(
+                'day_of_week', 'start_section', 'end_section', 'week_pattern'
+            ))
+            masks = occupancy.get_masks([(occupancy.TEACHER, teacher.pk, row[0]) for row in schedules])
+            for day_of_week, start_section, end_section, week_pattern in schedules:
+                if masks[(occupancy.TEACHER, teacher.pk, day_of_week)] & occupancy.slot_mask(
+                    start_section, end_section, week_pattern
+                ):
+                    raise serializers.ValidationError({'teacher_id': '该教师在该授课记录的排课时间已有排课'})
+        
         # 将教师和课程对象存入验证数据中
         data['teacher'] = teacher
         data['course'] = course
         
         return data
 
-class EnrollmentSerializer(serializers.ModelSerializer):
+class EnrollmentSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     """学生选课模型的序列化器
     根据课程表修复方案文档实现选课逻辑
     """
     # 嵌套序列化学生信息
     student_name = serializers.ReadOnlyField(source='student.name')
     student_id = serializers.ReadOnlyField(source='student.student_id')
-    student_pk = serializers.IntegerField(write_only=True, source='student')
+    student_pk = serializers.IntegerField(write_only=True, source='student', required=False)
     
     # 嵌套序列化课程信息
     course_name = serializers.ReadOnlyField(source='course.name')
     course_code = serializers.ReadOnlyField(source='course.code')
-    course_pk = serializers.IntegerField(write_only=True, source='course')
+    course_pk = serializers.IntegerField(write_only=True, source='course', required=False)
     
     class Meta:
         """序列化器的元数据配置"""
@@ -130,6 +172,8 @@ class EnrollmentSerializer(serializers.ModelSerializer):
             'enroll_date', 'score'
         ]
         read_only_fields = ['id', 'enroll_date']
+        # 重复选课由 (student, course) 唯一约束拦截，视图把 IntegrityError 转为400，不再预先查询
+        validators = []
     
     def validate_score(self, value):
         """验证成绩字段的有效性"""
@@ -137,40 +181,42 @@ class EnrollmentSerializer(serializers.ModelSerializer):
             raise serializers.ValidationError('成绩必须在0-100之间')
         return value
     
-    @transaction.atomic
     def validate(self, data):
         """验证选课数据的有效性
-        根据课程表修复方案文档实现并发控制和人数校验
+        只做存在性校验和不加锁的人数预检查；重复选课由唯一约束拦截，
+        最终的人数校验由视图在写入时完成（悲观锁或条件UPDATE），每个请求只校验一次
         """
-        student_pk = data.get('student')
-        course_pk = data.get('course')
-        
-        # 验证学生是否存在
-        try:
-            student = Student.objects.get(id=student_pk)
-        except Student.DoesNotExist:
-            raise serializers.ValidationError({
-                'student_pk': '学生不存在'
-            })
+        student = data.get('student')
+        course = data.get('course')
+        # 部分更新（如只修改成绩）未提交学生或课程时沿用原值
+        if self.instance is not None:
+            if student is None:
+                student = self.instance.student
+            if course is None:
+                course = self.instance.course
         
-        # 验证课程是否存在并加锁（悲观锁）
-        try:
-            course = Course.objects.select_for_update().get(id=course_pk)
-        except Course.DoesNotExist:
-            raise serializers.ValidationError({
-                'course_pk': '课程不存在'
-            })
+        # 验证学生是否存在（student_pk 传入的是主键，student 传入时已是模型实例）
+        if not isinstance(student, Student):
+            try:
+                student = Student.objects.get(id=student)
+            except Student.DoesNotExist:
+                raise serializers.ValidationError({
+                    'student_pk': '学生不存在'
+                })
         
-        # 验证学生是否已选该课程
-        qs = Enrollment.objects.filter(student=student, course=course)
-        if self.instance:
-            qs = qs.exclude(id=self.instance.pk)
-        if qs.exists():
-            raise serializers.ValidationError('该学生已经选过此课程')
+        # 验证课程是否存在
+        if not isinstance(course, Course):
+            try:
+                course = Course.objects.get(id=course)
+            except Course.DoesNotExist:
+                raise serializers.ValidationError({
+                    'course_pk': '课程不存在'
+                })
         
-        # 验证课程是否已满
-        current_students = Enrollment.objects.filter(course=course).count()
-        if current_students >= course.max_students:
+        # 预检查课程是否已满（读取冗余计数，无需COUNT选课表，座位预留同样占用名额）；
+        # 修改成绩等不换课的更新不受影响
+        changes_course = not self.instance or self.instance.course_id != course.id
+        if changes_course and refresh_available_seats(course) <= 0:
             raise serializers.ValidationError('该课程选课人数已达上限')
         
         # 将学生和课程对象存入验证数据中
@@ -178,8 +224,105 @@ class EnrollmentSerializer(serializers.ModelSerializer):
         data['course'] = course
         
         return data
+    
+    def create(self, validated_data):
+        """创建选课记录
+        seat_claimed 为真表示调用方已通过条件UPDATE抢占了座位，计数信号不再重复加一
+        """
+        seat_claimed = validated_data.pop('seat_claimed', False)
+        enrollment = Enrollment(**validated_data)
+        enrollment.seat_claimed = seat_claimed
+        enrollment.save()
+        return enrollment
+    
+    def update(self, instance, validated_data):
+        """更新选课记录
+        seat_claimed 为真表示调用方已在新课程上抢占了座位，修改所属课程时计数信号不再为新课程加一
+        """
+        instance.seat_claimed = validated_data.pop('seat_claimed', False)
+        return super().update(instance, validated_data)
 
-class CourseSerializer(serializers.ModelSerializer):
+class BulkEnrollmentItemSerializer(serializers.Serializer):
+    """批量选课中单条（学生, 课程）记录的序列化器"""
+    student = serializers.IntegerField()
+    course = serializers.IntegerField()
+
+class BulkEnrollmentSerializer(serializers.Serializer):
+    """批量选课请求的序列化器"""
+    # 单次批量选课的最大条数
+    MAX_ITEMS = 2000
+    
+    enrollments = BulkEnrollmentItemSerializer(many=True, allow_empty=False, max_length=MAX_ITEMS)
+
+class EnrollmentCartSerializer(serializers.Serializer):
+    """选课购物车提交请求的序列化器"""
+    # 单次提交的最大课程数量
+    MAX_COURSES = 20
+
+    student = serializers.IntegerField()
+    courses = serializers.ListField(
+        child=serializers.IntegerField(),
+        allow_empty=False,
+        max_length=MAX_COURSES
+    )
+    # 为真时任一课程无法选上则整单不提交，为假时尽量选上能选的课程
+    all_or_nothing = serializers.BooleanField(default=True)
+
+    def validate_courses(self, value):
+        """去除重复的课程ID，保留首次出现的顺序"""
+        return list(dict.fromkeys(value))
+
+class AdmissionRequestSerializer(SparseFieldsMixin, serializers.ModelSerializer):
+    """选课排队请求的序列化器，用于查询排队准入的处理状态"""
+    status_display = serializers.ReadOnlyField(source='get_status_display')
+    
+    class Meta:
+        """序列化器的元数据配置"""
+        model = AdmissionRequest
+        fields = [
+            'id', 'student', 'course', 'status', 'status_display',
+            'reason', 'created_at', 'processed_at'
+        ]
+        read_only_fields = fields
+
+class LotteryEntrySerializer(SparseFieldsMixin, serializers.ModelSerializer):
+    """选课抽签申请的序列化器，用于查询抽签结果"""
+    status_display = serializers.ReadOnlyField(source='get_status_display')
+    
+    class Meta:
+        """序列化器的元数据配置"""
+        model = LotteryEntry
+        fields = [
+            'id', 'window', 'student', 'course', 'priority', 'status',
+            'status_display', 'reason', 'created_at'
+        ]
+        read_only_fields = fields
+
+class WaitlistSerializer(SparseFieldsMixin, serializers.ModelSerializer):
+    """候补记录的序列化器"""
+    student_name = serializers.ReadOnlyField(source='student.name')
+    
+    class Meta:
+        """序列化器的元数据配置"""
+        model = Waitlist
+        fields = ['id', 'course', 'student', 'student_name', 'position', 'created_at']
+        read_only_fields = fields
+
+class SeatHoldSerializer(SparseFieldsMixin, serializers.ModelSerializer):
+    """座位预留的序列化器
+    (course, student) 的唯一性与名额检查在写入时完成，过期的旧预留会先被回收，
+    因此不使用自动生成的唯一性校验器
+    """
+    course_name = serializers.ReadOnlyField(source='course.name')
+    
+    class Meta:
+        """序列化器的元数据配置"""
+        model = SeatHold
+        fields = ['id', 'course', 'course_name', 'student', 'expires_at', 'created_at']
+        read_only_fields = ['expires_at', 'created_at']
+        validators = []
+
+class CourseSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     """课程模型的序列化器
     根据课程表修复方案文档实现课程信息字段定义
     """
@@ -272,23 +415,56 @@ class CourseSerializer(serializers.ModelSerializer):
     
     def get_teachers(self, obj):
         """获取教授该课程的教师信息"""
+        # 视图已预取 teaching_assignments__teacher 时不再产生额外查询
         teachers = [ta.teacher for ta in obj.teaching_assignments.all()]
         return [{'id': teacher.id, 'name': teacher.name, 'title': teacher.title} for teacher in teachers]
     
     def get_current_students(self, obj):
-        """获取选修该课程的学生数量"""
-        return obj.enrollments.count()
+        """获取选修该课程的学生数量
+        优先使用查询集上的 current_students_count 注解，没有注解时从冗余计数读取（分片计数的课程从各槽位汇总）
+        """
+        count = getattr(obj, 'current_students_count', None)
+        if count is not None:
+            return count
+        return load_seat_counts(obj).enrolled_count
 
 class CourseWithDetailsSerializer(CourseSerializer):
-    """扩展的课程序列化器，包含更多详细信息"""
+    """扩展的课程序列化器，包含更多详细信息
+    完整的选课名单通过分页的 roster 接口获取；只有上下文中 include_enrollments 为真时
+    才内嵌选课记录，且最多内嵌 MAX_NESTED_ENROLLMENTS 条，详情响应的大小与选课人数无关
+    """
+    # 内嵌选课记录的最大条数
+    MAX_NESTED_ENROLLMENTS = 20
+    
     # 包含选课和授课的详细信息
-    enrollments = EnrollmentSerializer(many=True, read_only=True)
+    enrollments = serializers.SerializerMethodField()
     teaching_assignments = TeachingAssignmentSerializer(many=True, read_only=True)
+    # 分页的选课名单地址
+    roster_url = serializers.SerializerMethodField()
     
     class Meta(CourseSerializer.Meta):
-        fields = CourseSerializer.Meta.fields + ['enrollments', 'teaching_assignments']
+        fields = CourseSerializer.Meta.fields + ['enrollments', 'teaching_assignments', 'roster_url']
+    
+    def get_fields(self):
+        """未要求内嵌选课记录时不输出 enrollments 字段"""
+        fields = super().get_fields()
+        if not self.context.get('include_enrollments'):
+            fields.pop('enrollments', None)
+        return fields
+    
+    def get_enrollments(self, obj):
+        """按选课顺序内嵌前 MAX_NESTED_ENROLLMENTS 条选课记录，学生和课程随选课记录一次查出"""
+        enrollments = (
+            obj.enrollments.select_related('student', 'course')
+            .order_by('enroll_date', 'id')[:self.MAX_NESTED_ENROLLMENTS]
+        )
+        return EnrollmentSerializer(enrollments, many=True).data
+    
+    def get_roster_url(self, obj):
+        """获取课程选课名单接口的地址"""
+        return reverse('course-roster', args=[obj.pk], request=self.context.get('request'))
 
-class ScheduleSerializer(serializers.ModelSerializer):
+class ScheduleSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     """排课序列化器，用于排课数据的序列化和反序列化"""
     # 添加课程、教室和教师的详细信息，方便前端显示
     course_name = serializers.ReadOnlyField(source='course.name')
@@ -317,9 +493,11 @@ class ScheduleSerializer(serializers.ModelSerializer):
         return value
     
     def validate_end_section(self, value):
-        """验证结束节次的有效性"""
+        """验证结束节次的有效性，节次不超过占用位图可表示的范围"""
         if value <= 0:
             raise serializers.ValidationError('结束节次必须为正数')
+        if value > occupancy.MAX_SECTION:
+            raise serializers.ValidationError(f'结束节次不能超过{occupancy.MAX_SECTION}')
         return value
     
     def validate(self, data):
@@ -329,51 +507,68 @@ class ScheduleSerializer(serializers.ModelSerializer):
             if data['start_section'] >= data['end_section']:
                 raise serializers.ValidationError('开始节次必须小于结束节次')
         
-        # 验证排课冲突
-        course_id = data.get('course')
-        classroom_id = data.get('classroom')
-        teaching_assignment_id = data.get('teaching_assignment')
+        # 验证排课冲突：读取教室和授课教师当天的占用位图按位与（含单双周重叠，教师的全部授课记录合并检查）
+        classroom = data.get('classroom')
+        teaching_assignment = data.get('teaching_assignment')
         day_of_week = data.get('day_of_week')
         start_section = data.get('start_section')
         end_section = data.get('end_section')
         week_pattern = data.get('week_pattern')
         
-        # 检查教室排课冲突
-        if classroom_id and day_of_week and start_section and end_section and week_pattern:
-            # 构建查询条件
-            query = Q(classroom=classroom_id) & Q(day_of_week=day_of_week) & Q(week_pattern=week_pattern)
-            
-            # 排除当前实例（更新操作）
-            if self.instance:
-                query = query & ~Q(id=self.instance.id)
-            
-            # 检查时间重叠
-            time_query = (
-                Q(start_section__lte=start_section) & Q(end_section__gte=start_section) |
-                Q(start_section__lte=end_section) & Q(end_section__gte=end_section) |
-                Q(start_section__gte=start_section) & Q(end_section__lte=end_section)
+        if day_of_week and start_section and end_section and week_pattern and (classroom or teaching_assignment):
+            conflicts = occupancy.find_conflicts(
+                classroom.pk if classroom else None,
+                teaching_assignment.teacher_id if teaching_assignment else None,
+                day_of_week,
+                start_section,
+                end_section,
+                week_pattern,
+                # 更新操作时扣除当前实例自身的占用
+                instance=self.instance,
             )
-            
-            if Schedule.objects.filter(query & time_query).exists():
+            if occupancy.CLASSROOM in conflicts:
                 raise serializers.ValidationError('该教室在该时间段已有排课')
-        
-        # 检查教师排课冲突
-        if teaching_assignment_id and day_of_week and start_section and end_section and week_pattern:
-            # 构建查询条件
-            query = Q(teaching_assignment=teaching_assignment_id) & Q(day_of_week=day_of_week) & Q(week_pattern=week_pattern)
-            
-            # 排除当前实例（更新操作）
-            if self.instance:
-                query = query & ~Q(id=self.instance.id)
-            
-            # 检查时间重叠
-            time_query = (
-                Q(start_section__lte=start_section) & Q(end_section__gte=start_section) |
-                Q(start_section__lte=end_section) & Q(end_section__gte=end_section) |
-                Q(start_section__gte=start_section) & Q(end_section__lte=end_section)
-            )
-            
-            if Schedule.objects.filter(query & time_query).exists():
+            if occupancy.TEACHER in conflicts:
                 raise serializers.ValidationError('该教师在该时间段已有排课')
         
-        return data
\ No newline at end of file
+        return data
+
+class BulkScheduleItemSerializer(serializers.Serializer):
+    """批量导入中单条排课的序列化器，只检查字段类型，取值和冲突由导入流程逐条检查"""
+    course = serializers.IntegerField()
+    classroom = serializers.IntegerField()
+    teaching_assignment = serializers.IntegerField()
+    day_of_week = serializers.IntegerField()
+    start_section = serializers.IntegerField()
+    end_section = serializers.IntegerField()
+    week_pattern = serializers.ChoiceField(choices=Schedule.WEEK_PATTERN_CHOICES, default='all')
+
+class BulkScheduleSerializer(serializers.Serializer):
+    """排课批量导入请求的序列化器"""
+    # 单次导入的最大条数
+    MAX_ITEMS = 5000
+    
+    schedules = BulkScheduleItemSerializer(many=True, allow_empty=False, max_length=MAX_ITEMS)
+
+class TimetableJobSerializer(SparseFieldsMixin, serializers.ModelSerializer):
+    """自动排课任务的序列化器，用于查询任务状态和结果"""
+    status_display = serializers.ReadOnlyField(source='get_status_display')
+    
+    class Meta:
+        """序列化器的元数据配置"""
+        model = TimetableJob
+        fields = [
+            'id', 'semester', 'time_budget', 'dry_run', 'status', 'status_display', 'placed_count',
+            'schedules', 'unplaced', 'error', 'created_at', 'started_at', 'finished_at'
+        ]
+        read_only_fields = fields
+
+class TimetableJobCreateSerializer(serializers.Serializer):
+    """提交自动排课任务请求的序列化器"""
+    # 单个任务的最长求解时间（秒）
+    MAX_TIME_BUDGET = 600
+    
+    semester = serializers.CharField(max_length=50)
+    time_budget = serializers.FloatField(required=False, min_value=0.1, max_value=MAX_TIME_BUDGET)
+    # 为真时只求解不写入排课，结果中的排课没有ID
+    dry_run = serializers.BooleanField(default=False)
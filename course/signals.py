@@ -0,0 +1,149 @@
+"""
+课程应用的信号处理
+在选课记录写入和删除时同步维护课程的冗余计数，并在释放座位时处理候补转正；
+课程保存后重建课程的搜索词元，排课写入和删除、授课记录更换教师后重算排课占用位图；
+课程目录相关的表写入后递增数据表版本号
+"""
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save, pre_delete
+from django.dispatch import receiver
+
+from student.models import Student
+from teacher.models import Teacher
+from user_auth.models import CustomUser
+
+from .holds import release_student_holds
+from . import occupancy, search_index, seat_precheck, seat_slots, versions
+from .models import Classroom, Course, Enrollment, Schedule, TeachingAssignment
+from .seats import adjust_enrolled_count, get_seat_shards
+from .waitlist import promote_from_waitlist
+
+
+@receiver(post_save, sender=Enrollment)
+def increment_enrolled_count(sender, instance, created, **kwargs):
+    """新增选课记录后，课程已选人数加一
+
+    已通过 claim_seat 抢占过座位或由座位预留转入的记录（seat_claimed 为真）不再重复计数；
+    修改选课记录所属课程时，同步调整原课程和新课程的计数，原课程释放的座位转给候补名单首位学生
+    """
+    if created:
+        if not getattr(instance, 'seat_claimed', False):
+            adjust_enrolled_count(instance.course_id, 1)
+        return
+    loaded_course_id = getattr(instance, '_loaded_course_id', None)
+    if loaded_course_id is not None and loaded_course_id != instance.course_id:
+        adjust_enrolled_count(loaded_course_id, -1)
+        if not getattr(instance, 'seat_claimed', False):
+            adjust_enrolled_count(instance.course_id, 1)
+        instance.seat_claimed = False
+        instance._loaded_course_id = instance.course_id
+        promote_from_waitlist(loaded_course_id)
+
+
+@receiver(post_delete, sender=Enrollment)
+def decrement_enrolled_count(sender, instance, origin=None, **kwargs):
+    """删除选课记录后（包括删除学生或课程时的级联删除），课程已选人数减一，
+    并在同一事务中将候补名单首位学生转为正式选课；课程本身被删除时不做候补转正
+    """
+    adjust_enrolled_count(instance.course_id, -1)
+    if isinstance(origin, Course) or getattr(origin, 'model', None) is Course:
+        return
+    promote_from_waitlist(instance.course_id)
+
+
+@receiver(pre_delete, sender=Student)
+def release_holds_of_deleted_student(sender, instance, **kwargs):
+    """删除学生前释放其座位预留；级联删除预留记录时不会扣减课程的预留人数"""
+    release_student_holds(instance.pk)
+
+
+@receiver(post_save, sender=Course)
+def refresh_course_capacity(sender, instance, created, **kwargs):
+    """课程保存后（人数上限可能已变化）使座位预检查条目失效；分片计数的课程按新的上限重新分配各槽位名额"""
+    if created:
+        return
+    # 人数上限可能已变化，本节点座位预检查中的条目在提交后失效
+    seat_precheck.invalidate(instance.pk)
+    if not get_seat_shards(instance.pk):
+        return
+    with transaction.atomic():
+        seat_slots.rebalance_slots(instance.pk)
+
+
+@receiver(post_save, sender=Course)
+def reindex_course(sender, instance, created, update_fields=None, **kwargs):
+    """课程保存后重建该课程的搜索词元；只更新计数等其他字段，或课程代码、名称、描述与加载时相同时跳过"""
+    if update_fields is not None and not set(update_fields) & set(search_index.FIELD_WEIGHTS):
+        return
+    current = instance.search_field_values()
+    loaded = getattr(instance, '_loaded_search_fields', None)
+    if not created and len(current) == len(instance.SEARCH_FIELDS) and loaded == current:
+        return
+    search_index.index_course(instance)
+    instance._loaded_search_fields = current
+
+
+@receiver(post_save, sender=Schedule)
+def refresh_occupancy_on_save(sender, instance, **kwargs):
+    """排课保存后重算所在教室、授课教师当天的占用位图；修改了教室、授课记录或星期几时同时重算原位置"""
+    teacher_id = occupancy.schedule_teacher_id(instance)
+    cells = occupancy.schedule_cells(instance.classroom_id, teacher_id, instance.day_of_week)
+    loaded = getattr(instance, '_loaded_cells', None)
+    if loaded is not None:
+        classroom_id, teaching_assignment_id, day_of_week = loaded
+        if teaching_assignment_id != instance.teaching_assignment_id:
+            teacher_id = occupancy.get_teacher_id(teaching_assignment_id)
+        cells += occupancy.schedule_cells(classroom_id, teacher_id, day_of_week)
+    occupancy.rebuild_cells(cells)
+    instance._loaded_cells = (instance.classroom_id, instance.teaching_assignment_id, instance.day_of_week)
+
+
+@receiver(post_delete, sender=Schedule)
+def refresh_occupancy_on_delete(sender, instance, **kwargs):
+    """排课删除后（包括删除教室、课程、授课记录时的级联删除）重算所在位置的占用位图"""
+    occupancy.rebuild_cells(occupancy.schedule_cells(
+        instance.classroom_id, occupancy.schedule_teacher_id(instance), instance.day_of_week
+    ))
+
+
+@receiver(post_save, sender=TeachingAssignment)
+def refresh_occupancy_on_teacher_change(sender, instance, created, **kwargs):
+    """授课记录更换教师后，重算原教师和新教师在该授课记录排课日的占用位图"""
+    loaded_teacher_id = getattr(instance, '_loaded_teacher_id', None)
+    if not created and loaded_teacher_id is not None and loaded_teacher_id != instance.teacher_id:
+        days = set(instance.schedules.values_list('day_of_week', flat=True))
+        occupancy.rebuild_cells([
+            (occupancy.TEACHER, teacher_id, day_of_week)
+            for teacher_id in (loaded_teacher_id, instance.teacher_id)
+            for day_of_week in days
+        ])
+    instance._loaded_teacher_id = instance.teacher_id
+
+
+# 写入后需要递增版本号的模型及对应的表名
+VERSIONED_MODELS = {
+    Course: versions.COURSE,
+    Classroom: versions.CLASSROOM,
+    Teacher: versions.TEACHER,
+    TeachingAssignment: versions.TEACHING_ASSIGNMENT,
+    Enrollment: versions.ENROLLMENT,
+    Student: versions.STUDENT,
+    Schedule: versions.SCHEDULE,
+}
+
+
+def bump_table_version(sender, **kwargs):
+    """课程目录相关的记录保存或删除后，在事务提交后递增对应表的版本号"""
+    versions.bump(VERSIONED_MODELS[sender])
+
+
+for model in VERSIONED_MODELS:
+    post_save.connect(bump_table_version, sender=model, dispatch_uid=f'bump_version_save_{model.__name__}')
+    post_delete.connect(bump_table_version, sender=model, dispatch_uid=f'bump_version_delete_{model.__name__}')
+
+
+@receiver(post_save, sender=CustomUser)
+def bump_user_version(sender, instance, update_fields=None, **kwargs):
+    """用户名变化时递增用户表版本号（教师列表显示用户名）；登录时只更新 last_login，不影响版本号"""
+    if update_fields is None or 'username' in update_fields:
+        versions.bump(versions.USER)
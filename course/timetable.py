@@ -0,0 +1,450 @@
+"""
+自动排课
+为一个学期尚未排课的线下课程生成不冲突的排课。每门课程由其第一条授课记录的教师授课，
+按总课时折算每周课次（每周上课的课次，余下不足一次的课时排为单周或双周课），同一课程的课次排在不同的天，
+教室容量不小于课程人数上限。已有排课（占用位图中的教室和教师占用）视为固定，不会被移动。
+
+求解在内存中的紧凑位图上进行：
+- 时段 p = 天序号 * 每天时段数 + 时段序号，每个时段分单周、双周两条线，每周上课的课次占两条线；
+- 每条线保存一个空闲教室位图，教室按容量升序编号，课程可用的教室是从第一个容量足够的教室开始的高位，
+  空闲且容量足够的最小教室即位图与运算后的最低位（best fit，把大教室留给人数多的课程）；
+- 教师的占用是一个覆盖整周各时段、单双周的整数位图，课程已排的天是一个按天的位图。
+课程按可用教室数从少到多依次排入（约束最紧的先排）；某个课次找不到空位时做局部调整：
+在教师空闲的时段上把挡住它的其他课次挪到别处（一步弹出），仍然排不下的课程整门放弃并记录原因。
+超过时间预算后剩下的课程不再求解，结果为部分解。
+
+生成的排课经 schedule_import.import_schedules 写入：在锁定的占用位图上复查冲突、批量写入并维护占用位图，
+写入时与其他人刚提交的排课冲突的课程整门不写入
+"""
+import logging
+import math
+import threading
+import time
+from collections import defaultdict
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from .models import Classroom, Course, ScheduleOccupancy, TeachingAssignment, TimetableJob
+from . import occupancy, schedule_import
+
+logger = logging.getLogger(__name__)
+
+# 未排入的原因
+NO_ASSIGNMENT = '没有授课记录'
+NO_ROOM = '没有容量足够的教室'
+TOO_MANY_SESSIONS = '每周课次超过可排课的天数'
+NO_SLOT = '教师或教室没有空闲时段'
+OUT_OF_TIME = '超出时间预算'
+WRITE_CONFLICT = '写入时与其他排课冲突'
+
+# 单周或双周课次，求解时选择占用哪条线
+HALF = 'half'
+
+# 线位 -> 上课周模式
+LANE_PATTERNS = {bits: pattern for pattern, bits in occupancy.WEEK_PATTERN_BITS.items()}
+
+
+def get_days():
+    """每周可排课的天数（从周一开始）"""
+    return getattr(settings, 'TIMETABLE_DAYS', 5)
+
+
+def get_slots():
+    """每天可排课的时段 [(开始节次, 结束节次)]，各时段节数相同"""
+    return tuple(getattr(settings, 'TIMETABLE_SLOTS', ((1, 2), (3, 4), (5, 6), (7, 8), (9, 10))))
+
+
+def get_weeks():
+    """学期周数，用于把总课时折算为每周课次"""
+    return getattr(settings, 'TIMETABLE_WEEKS', 16)
+
+
+def get_time_budget():
+    """默认的求解时间预算（秒）"""
+    return getattr(settings, 'TIMETABLE_TIME_BUDGET_SECONDS', 10)
+
+
+def worker_enabled():
+    """是否在Web进程内启动线程执行排课任务（关闭时需运行 generate_timetable --pending）"""
+    return getattr(settings, 'TIMETABLE_JOB_WORKER', True)
+
+
+def session_patterns(total_hours, sections, weeks):
+    """按总课时折算每周的课次，返回课次的周模式列表（'all' 或 HALF）
+
+    每个课次占一个时段（sections 节），每周上课的课次共 sections * weeks 课时，单周或双周课次为其一半
+    """
+    if total_hours <= 0:
+        return []
+    halves = math.ceil(total_hours / (sections * weeks / 2))
+    return ['all'] * (halves // 2) + [HALF] * (halves % 2)
+
+
+class Task:
+    """一门待排课程：课程信息、可用教室位图和已排的课次"""
+
+    def __init__(self, course_id, code, assignment_id, teacher_id, max_students, patterns):
+        self.course_id = course_id
+        self.code = code
+        self.assignment_id = assignment_id
+        self.teacher_id = teacher_id
+        self.max_students = max_students
+        self.patterns = patterns
+        # 容量足够的教室位图，由求解器按教室容量设置
+        self.fit = 0
+        # 已排课次的天位图
+        self.days = 0
+        # 课次序号 -> (时段, 线位, 教室序号)
+        self.placements = {}
+
+
+class Solver:
+    """在紧凑位图上求解排课，见模块说明"""
+
+    def __init__(self, rooms, days, slots, deadline):
+        """rooms 为 [(教室ID, 容量)]，deadline 为 time.monotonic() 的截止时间"""
+        rooms = sorted(rooms, key=lambda room: (room[1], room[0]))
+        self.room_ids = [room_id for room_id, _ in rooms]
+        self.capacities = [capacity for _, capacity in rooms]
+        self.room_index = {room_id: index for index, room_id in enumerate(self.room_ids)}
+        self.days = days
+        self.slots = slots
+        self.deadline = deadline
+        all_rooms = (1 << len(rooms)) - 1
+        # 每条线（时段 * 2 + 单双周）的空闲教室位图
+        self.free_rooms = [all_rooms] * (days * len(slots) * 2)
+        # 教师ID -> 整周的占用位图，第 时段*2 位为单周、时段*2+1 位为双周
+        self.teacher_busy = defaultdict(int)
+        # (教室序号, 线) -> 占用该线的课次 (Task, 课次序号)；固定的已有排课不在其中，不能挪动
+        self.occupants = {}
+
+    def out_of_time(self):
+        return time.monotonic() >= self.deadline
+
+    def fit_mask(self, max_students):
+        """容量不小于 max_students 的教室位图"""
+        first = next(
+            (index for index, capacity in enumerate(self.capacities) if capacity >= max_students),
+            len(self.capacities),
+        )
+        return ((1 << len(self.capacities)) - 1) & ~((1 << first) - 1)
+
+    def block_fixed(self, resource_type, resource_id, position, lanes):
+        """登记已有排课的占用"""
+        if resource_type == occupancy.TEACHER:
+            self.teacher_busy[resource_id] |= lanes << (position * 2)
+            return
+        index = self.room_index.get(resource_id)
+        if index is None:
+            return
+        for lane in (0, 1):
+            if lanes >> lane & 1:
+                self.free_rooms[position * 2 + lane] &= ~(1 << index)
+
+    def free_mask(self, position, lanes):
+        """在指定时段、线位上空闲的教室位图"""
+        mask = -1
+        for lane in (0, 1):
+            if lanes >> lane & 1:
+                mask &= self.free_rooms[position * 2 + lane]
+        return mask
+
+    def place(self, task, number, position, lanes, room):
+        for lane in (0, 1):
+            if lanes >> lane & 1:
+                self.free_rooms[position * 2 + lane] &= ~(1 << room)
+                self.occupants[(room, position * 2 + lane)] = (task, number)
+        self.teacher_busy[task.teacher_id] |= lanes << (position * 2)
+        task.days |= 1 << (position // len(self.slots))
+        task.placements[number] = (position, lanes, room)
+
+    def unplace(self, task, number):
+        position, lanes, room = task.placements.pop(number)
+        for lane in (0, 1):
+            if lanes >> lane & 1:
+                self.free_rooms[position * 2 + lane] |= 1 << room
+                del self.occupants[(room, position * 2 + lane)]
+        self.teacher_busy[task.teacher_id] &= ~(lanes << (position * 2))
+        task.days &= ~(1 << (position // len(self.slots)))
+
+    def _positions(self, task, pattern):
+        """课程可以使用的 (时段, 线位)：课程当天没有其他课次、教师空闲；按教师当天的课次数从少到多排列，尽量分散"""
+        per_day = len(self.slots)
+        busy = self.teacher_busy[task.teacher_id]
+        day_bits = (1 << (per_day * 2)) - 1
+        days = sorted(
+            (day for day in range(self.days) if not task.days >> day & 1),
+            key=lambda day: ((busy >> (day * per_day * 2)) & day_bits).bit_count(),
+        )
+        lane_options = (0b01, 0b10) if pattern == HALF else (occupancy.WEEK_PATTERN_BITS[pattern],)
+        for day in days:
+            for slot in range(per_day):
+                position = day * per_day + slot
+                for lanes in lane_options:
+                    if not busy >> (position * 2) & lanes:
+                        yield position, lanes
+
+    def _best_room(self, task, position, lanes):
+        """空闲且容量足够的最小教室；单双周课次优先放进另一条线已被占用的教室，与其拼成一整周"""
+        candidates = self.free_mask(position, lanes) & task.fit
+        if not candidates:
+            return None
+        if lanes != 0b11:
+            other_lane = 1 if lanes == 0b01 else 0
+            paired = candidates & ~self.free_rooms[position * 2 + other_lane]
+            if paired:
+                candidates = paired
+        return (candidates & -candidates).bit_length() - 1
+
+    def _find(self, task, pattern):
+        """贪心：第一个有空闲教室的 (时段, 线位, 教室)"""
+        for position, lanes in self._positions(task, pattern):
+            room = self._best_room(task, position, lanes)
+            if room is not None:
+                return position, lanes, room
+        return None
+
+    def place_session(self, task, number):
+        """排入课程的一个课次，返回是否成功"""
+        pattern = task.patterns[number]
+        found = self._find(task, pattern)
+        if found is not None:
+            self.place(task, number, *found)
+            return True
+        return self._repair(task, number, pattern)
+
+    def _repair(self, task, number, pattern):
+        """局部调整：在教师空闲的时段上，把挡住容量足够的教室的课次挪到别处后排入"""
+        for position, lanes in self._positions(task, pattern):
+            rooms = task.fit
+            while rooms:
+                if self.out_of_time():
+                    return False
+                room = (rooms & -rooms).bit_length() - 1
+                rooms &= rooms - 1
+                blockers = set()
+                for lane in (0, 1):
+                    if lanes >> lane & 1 and not self.free_rooms[position * 2 + lane] >> room & 1:
+                        blockers.add(self.occupants.get((room, position * 2 + lane)))
+                if None in blockers:
+                    # 被已有排课占用，不能挪动
+                    continue
+                if self._eject(task, number, position, lanes, room, blockers):
+                    return True
+        return False
+
+    def _eject(self, task, number, position, lanes, room, blockers):
+        """挪走 blockers 后把课次排在指定位置，挪走的课次都能重新排入时保留结果，否则还原"""
+        original = {(other, other_number): other.placements[other_number] for other, other_number in blockers}
+        for other, other_number in blockers:
+            self.unplace(other, other_number)
+        self.place(task, number, position, lanes, room)
+        moved = []
+        for other, other_number in blockers:
+            found = self._find(other, other.patterns[other_number])
+            if found is None:
+                break
+            self.place(other, other_number, *found)
+            moved.append((other, other_number))
+        else:
+            return True
+        for other, other_number in moved:
+            self.unplace(other, other_number)
+        self.unplace(task, number)
+        for (other, other_number), placement in original.items():
+            self.place(other, other_number, *placement)
+        return False
+
+    def solve(self, tasks):
+        """依次排入各门课程，返回 {课程ID: 未排入原因}，排入的课次保存在各 Task 的 placements 中"""
+        unplaced = {}
+        for task in tasks:
+            task.fit = self.fit_mask(task.max_students)
+        pending = []
+        for task in tasks:
+            if task.assignment_id is None:
+                unplaced[task.course_id] = NO_ASSIGNMENT
+            elif not task.fit:
+                unplaced[task.course_id] = NO_ROOM
+            elif len(task.patterns) > self.days:
+                unplaced[task.course_id] = TOO_MANY_SESSIONS
+            else:
+                pending.append(task)
+        # 约束最紧的先排：可用教室少、课次多的课程优先
+        pending.sort(key=lambda task: (task.fit.bit_count(), -len(task.patterns), task.course_id))
+        for task in pending:
+            if self.out_of_time():
+                unplaced[task.course_id] = OUT_OF_TIME
+                continue
+            for number in range(len(task.patterns)):
+                if not self.place_session(task, number):
+                    for placed in list(task.placements):
+                        self.unplace(task, placed)
+                    unplaced[task.course_id] = OUT_OF_TIME if self.out_of_time() else NO_SLOT
+                    break
+        return unplaced
+
+    def schedule_rows(self, task):
+        """课程已排课次对应的排课字段字典"""
+        rows = []
+        for number in sorted(task.placements):
+            position, lanes, room = task.placements[number]
+            start_section, end_section = self.slots[position % len(self.slots)]
+            rows.append({
+                'course': task.course_id,
+                'classroom': self.room_ids[room],
+                'teaching_assignment': task.assignment_id,
+                'day_of_week': position // len(self.slots) + 1,
+                'start_section': start_section,
+                'end_section': end_section,
+                'week_pattern': LANE_PATTERNS[lanes],
+            })
+        return rows
+
+
+def load_tasks(semester, sections, weeks):
+    """学期中尚未排课的线下课程"""
+    courses = list(
+        Course.objects.filter(semester=semester, teaching_method='offline', schedules__isnull=True)
+        .order_by('id')
+        .values_list('id', 'code', 'max_students', 'total_hours')
+    )
+    assignments = {}
+    for course_id, assignment_id, teacher_id in (
+        TeachingAssignment.objects.filter(course_id__in=[course[0] for course in courses])
+        .order_by('-id')
+        .values_list('course_id', 'id', 'teacher_id')
+    ):
+        # 按ID倒序遍历，保留每门课程的第一条授课记录
+        assignments[course_id] = (assignment_id, teacher_id)
+    return [
+        Task(course_id, code, *assignments.get(course_id, (None, None)), max_students,
+             session_patterns(total_hours, sections, weeks))
+        for course_id, code, max_students, total_hours in courses
+    ]
+
+
+def load_fixed(solver, teacher_ids):
+    """从占用位图读取已有排课对教室和教师的占用"""
+    slot_bits = [
+        (occupancy.slot_mask(start, end, 'odd'), occupancy.slot_mask(start, end, 'even'))
+        for start, end in solver.slots
+    ]
+    rows = ScheduleOccupancy.objects.filter(
+        Q(resource_type=occupancy.CLASSROOM) | Q(resource_type=occupancy.TEACHER, resource_id__in=teacher_ids),
+        day_of_week__gte=1,
+        day_of_week__lte=solver.days,
+    ).values_list('resource_type', 'resource_id', 'day_of_week', 'mask')
+    for resource_type, resource_id, day_of_week, mask in rows.iterator():
+        for slot, (odd_bits, even_bits) in enumerate(slot_bits):
+            lanes = (0b01 if mask & odd_bits else 0) | (0b10 if mask & even_bits else 0)
+            if lanes:
+                solver.block_fixed(resource_type, resource_id, (day_of_week - 1) * len(solver.slots) + slot, lanes)
+
+
+def solve(semester, time_budget=None):
+    """为学期求解排课（不写入），返回 (排课字段字典列表, [{course, code, reason}] 未排入的课程)"""
+    time_budget = get_time_budget() if time_budget is None else time_budget
+    deadline = time.monotonic() + time_budget
+    days, slots = get_days(), get_slots()
+    start_section, end_section = slots[0]
+    tasks = load_tasks(semester, end_section - start_section + 1, get_weeks())
+    solver = Solver(Classroom.objects.values_list('id', 'capacity'), days, slots, deadline)
+    load_fixed(solver, {task.teacher_id for task in tasks if task.teacher_id is not None})
+    unplaced = solver.solve(tasks)
+    schedules = []
+    for task in tasks:
+        if task.course_id not in unplaced:
+            schedules.extend(solver.schedule_rows(task))
+    return schedules, [
+        {'course': task.course_id, 'code': task.code, 'reason': unplaced[task.course_id]}
+        for task in tasks if task.course_id in unplaced
+    ]
+
+
+def commit(schedules, unplaced):
+    """通过批量导入写入生成的排课，返回更新后的 (排课, 未排入的课程)
+
+    按课程分组导入：写入时冲突的课程整门不写入，其排课、教室和人数上限都保持不变
+    """
+    codes = dict(Course.objects.filter(pk__in={row['course'] for row in schedules}).values_list('id', 'code'))
+    with transaction.atomic():
+        results = schedule_import.import_schedules(schedules, group=lambda row: row['course'])
+    failed = {row['course'] for row, result in zip(schedules, results) if result['error']}
+    written = [
+        {**row, 'id': result['id']}
+        for row, result in zip(schedules, results) if row['course'] not in failed
+    ]
+    unplaced = unplaced + [
+        {'course': course_id, 'code': codes.get(course_id, ''), 'reason': WRITE_CONFLICT}
+        for course_id in sorted(failed)
+    ]
+    return written, unplaced
+
+
+def run_job(job_id):
+    """执行一个等待中的排课任务，任务已被其他进程领取时返回None"""
+    claimed = TimetableJob.objects.filter(pk=job_id, status=TimetableJob.STATUS_PENDING).update(
+        status=TimetableJob.STATUS_RUNNING, started_at=timezone.now(),
+    )
+    if not claimed:
+        return None
+    job = TimetableJob.objects.get(pk=job_id)
+    try:
+        schedules, unplaced = solve(job.semester, job.time_budget)
+        if not job.dry_run and schedules:
+            schedules, unplaced = commit(schedules, unplaced)
+    except Exception as exc:
+        logger.exception('自动排课任务 %s 执行失败', job.pk)
+        job.status = TimetableJob.STATUS_FAILED
+        job.error = str(exc)[:200]
+    else:
+        job.status = TimetableJob.STATUS_COMPLETED
+        job.schedules = schedules
+        job.unplaced = unplaced
+        job.placed_count = len({row['course'] for row in schedules})
+    job.finished_at = timezone.now()
+    job.save(update_fields=['status', 'error', 'schedules', 'unplaced', 'placed_count', 'finished_at'])
+    return job
+
+
+def run_pending():
+    """按提交顺序执行全部等待中的排课任务，返回执行的任务数"""
+    total = 0
+    for job_id in TimetableJob.objects.filter(status=TimetableJob.STATUS_PENDING).order_by('id').values_list(
+        'id', flat=True
+    ):
+        if run_job(job_id) is not None:
+            total += 1
+    return total
+
+
+def submit(semester, time_budget=None, dry_run=False):
+    """提交排课任务；启用工作线程时在事务提交后由新线程执行，否则等待 generate_timetable --pending"""
+    job = TimetableJob.objects.create(
+        semester=semester,
+        time_budget=get_time_budget() if time_budget is None else time_budget,
+        dry_run=dry_run,
+    )
+    if worker_enabled():
+        transaction.on_commit(lambda: start_worker(job.pk))
+    return job
+
+
+def start_worker(job_id):
+    """在后台线程中执行排课任务"""
+    thread = threading.Thread(target=_work, args=(job_id,), name=f'timetable-job-{job_id}', daemon=True)
+    thread.start()
+    return thread
+
+
+def _work(job_id):
+    try:
+        run_job(job_id)
+    except Exception:
+        logger.exception('自动排课任务 %s 执行失败', job_id)
+    finally:
+        connection.close()
@@ -4,7 +4,10 @@
 """
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
-from .views import CourseViewSet, EnrollmentViewSet, TeachingAssignmentViewSet, ClassroomViewSet, ScheduleViewSet
+from .views import (
+    CourseViewSet, EnrollmentViewSet, TeachingAssignmentViewSet, ClassroomViewSet, ScheduleViewSet,
+    AdmissionRequestViewSet, SeatHoldViewSet, LotteryEntryViewSet, TimetableJobViewSet
+)
 
 # 创建路由器并注册视图集
 router = DefaultRouter()
@@ -13,6 +16,10 @@ router.register(r'enrollments', EnrollmentViewSet)
 router.register(r'teaching_assignments', TeachingAssignmentViewSet)
 router.register(r'classrooms', ClassroomViewSet)
 router.register(r'schedules', ScheduleViewSet)
+router.register(r'admission_requests', AdmissionRequestViewSet)
+router.register(r'seat_holds', SeatHoldViewSet)
+router.register(r'lottery_entries', LotteryEntryViewSet)
+router.register(r'timetable_jobs', TimetableJobViewSet)
 
 # 定义URL模式列表
 urlpatterns = [
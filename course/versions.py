@@ -0,0 +1,201 @@
+"""
+数据表版本号与条件请求
+课程、教室、教师等表的数据在事务提交后递增 TableVersion 中对应表的版本号。
+列表和详情接口用依赖表的版本号计算强 ETag 和 Last-Modified：读取几行版本号即可判断数据是否变化，
+客户端携带的 If-None-Match 与当前 ETag 一致时直接返回304，不查询数据、不运行序列化器。
+
+版本号在事务提交后递增（单条自动提交的UPDATE），不在选课等事务中持有版本号行的锁；
+提交与递增之间的极短时间内，请求可能仍拿到旧的 ETag，客户端下一次轮询即可看到新数据。
+Last-Modified 的精度为秒，客户端同时携带 If-None-Match 时只比较 ETag。
+写入频繁的表（如选课表）可在 TABLE_VERSION_BUMP_INTERVALS 中配置合并窗口，窗口内的多次写入只递增一次版本号。
+ETag 同时作为响应缓存（response_cache）的键，版本号变化后缓存自然失效
+"""
+import functools
+import hashlib
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+from django.utils.http import http_date, parse_http_date_safe, quote_etag
+from rest_framework import status
+from rest_framework.response import Response
+
+from . import response_cache
+from .models import TableVersion
+
+# 版本号表名
+COURSE = 'course'
+CLASSROOM = 'classroom'
+TEACHER = 'teacher'
+TEACHING_ASSIGNMENT = 'teaching_assignment'
+ENROLLMENT = 'enrollment'
+STUDENT = 'student'
+SCHEDULE = 'schedule'
+USER = 'user'
+
+
+# 合并递增使用的缓存键：窗口标记（窗口内已递增过）和待补做标记（窗口内有被跳过的递增）
+BUMP_WINDOW_KEY = 'table-version-window:{}'
+BUMP_PENDING_KEY = 'table-version-pending:{}'
+
+
+def get_bump_interval(name):
+    """数据表版本号的合并递增窗口（秒），0表示不合并"""
+    return getattr(settings, 'TABLE_VERSION_BUMP_INTERVALS', {}).get(name, 0)
+
+
+def bump(*names):
+    """在当前事务提交后递增数据表的版本号（不在事务中时立即执行）"""
+    transaction.on_commit(lambda: _bump_coalesced(names))
+
+
+def _open_window(name):
+    """尝试开启表的合并窗口，窗口已开启（本窗口内已递增过）时返回False"""
+    return cache.add(BUMP_WINDOW_KEY.format(name), 1, get_bump_interval(name))
+
+
+def _bump_coalesced(names):
+    """不合并的表和合并窗口已结束的表立即递增，其余表标记为待补做"""
+    due = []
+    for name in names:
+        if not get_bump_interval(name):
+            due.append(name)
+        elif _open_window(name):
+            cache.delete(BUMP_PENDING_KEY.format(name))
+            due.append(name)
+        else:
+            cache.set(BUMP_PENDING_KEY.format(name), 1, None)
+    if due:
+        _bump_now(due)
+
+
+def _flush_pending(names):
+    """读取版本号前补做合并窗口结束后仍未执行的递增（每个窗口最多一次）"""
+    pending = [name for name in names if get_bump_interval(name)]
+    if not pending:
+        return
+    flagged = cache.get_many([BUMP_PENDING_KEY.format(name) for name in pending])
+    due = []
+    for name in pending:
+        if BUMP_PENDING_KEY.format(name) in flagged and _open_window(name):
+            # 先清除标记再递增，递增期间新跳过的递增会重新标记，由下一个窗口补做
+            cache.delete(BUMP_PENDING_KEY.format(name))
+            due.append(name)
+    if due:
+        _bump_now(due)
+
+
+def _bump_now(names):
+    now = timezone.now()
+    updated = TableVersion.objects.filter(name__in=names).update(version=F('version') + 1, updated_at=now)
+    if updated < len(names):
+        # 首次写入的表没有版本号行，创建后版本号从1开始
+        TableVersion.objects.bulk_create(
+            [TableVersion(name=name, version=1, updated_at=now) for name in names],
+            ignore_conflicts=True,
+        )
+
+
+def get_versions(names):
+    """读取一组数据表的版本号，返回 ({表名: 版本号}, 最后修改时间)；从未写入的表版本号为0"""
+    _flush_pending(names)
+    rows = TableVersion.objects.filter(name__in=names).values_list('name', 'version', 'updated_at')
+    versions = dict.fromkeys(names, 0)
+    last_modified = None
+    for name, version, updated_at in rows:
+        versions[name] = version
+        if last_modified is None or updated_at > last_modified:
+            last_modified = updated_at
+    return versions, last_modified
+
+
+def _etag_matches(header, etag):
+    """If-None-Match 中任一 ETag（忽略弱校验前缀）与当前 ETag 相同时返回True"""
+    if header.strip() == '*':
+        return True
+    candidates = {tag.strip().removeprefix('W/') for tag in header.split(',')}
+    return etag in candidates
+
+
+def conditional_get(method):
+    """视图集方法的装饰器：按视图集的 version_tables 处理条件GET，用于列表、详情之外的只读操作"""
+    @functools.wraps(method)
+    def wrapper(self, request, *args, **kwargs):
+        return self.conditional_response(request, lambda: method(self, request, *args, **kwargs))
+    return wrapper
+
+
+class ConditionalGetMixin:
+    """为视图集的列表和详情接口提供条件GET
+
+    version_tables 为响应内容依赖的数据表，任一表的版本号变化都会改变 ETag；
+    ETag 由视图集、依赖表的版本号、请求路径和查询参数、响应格式计算，同一 ETag 对应相同的响应内容
+    """
+    version_tables = ()
+
+    @conditional_get
+    def list(self, request, *args, **kwargs):
+        return super().list(request, *args, **kwargs)
+
+    @conditional_get
+    def retrieve(self, request, *args, **kwargs):
+        return super().retrieve(request, *args, **kwargs)
+
+    def conditional_response(self, request, build_response):
+        """按当前版本号计算 ETag；命中客户端缓存时返回304，否则调用 build_response 生成响应并附上校验头"""
+        versions, last_modified = get_versions(self.version_tables)
+        # 供生成响应时复用（如搜索分面的缓存键），不必再次读取版本号
+        self.table_versions = versions
+        etag = self.compute_etag(request, versions)
+
+        if_none_match = request.headers.get('If-None-Match')
+        if if_none_match:
+            not_modified = _etag_matches(if_none_match, etag)
+        else:
+            since = parse_http_date_safe(request.headers.get('If-Modified-Since', ''))
+            not_modified = (
+                since is not None and last_modified is not None
+                and int(last_modified.timestamp()) <= since
+            )
+        if not_modified:
+            response = Response(status=status.HTTP_304_NOT_MODIFIED)
+        else:
+            response = self.cached_response(request, etag, build_response)
+
+        if response.status_code in (status.HTTP_200_OK, status.HTTP_304_NOT_MODIFIED):
+            response['ETag'] = etag
+            if last_modified is not None:
+                response['Last-Modified'] = http_date(last_modified.timestamp())
+            # 浏览器每次使用缓存前都需向服务器确认
+            response['Cache-Control'] = 'private, no-cache'
+        return response
+
+    def cached_response(self, request, etag, build_response):
+        """配置了响应缓存的操作先按 ETag 读取缓存的响应数据，未命中时生成响应并写入缓存"""
+        name = f'{self.basename}-{self.action}'
+        if not response_cache.get_ttl(name):
+            return build_response()
+        data = response_cache.get(name, request, etag)
+        if data is not None:
+            response = Response(data)
+            response['X-Cache'] = 'HIT'
+            return response
+        response = build_response()
+        if response.status_code == status.HTTP_200_OK:
+            response_cache.set(name, request, etag, response.data)
+        response['X-Cache'] = 'MISS'
+        return response
+
+    def compute_etag(self, request, versions):
+        """由视图集、依赖表版本号、请求路径和查询参数、响应格式计算强 ETag"""
+        accepted = getattr(request, 'accepted_media_type', '') or ''
+        parts = [
+            type(self).__name__,
+            ','.join(f'{name}:{versions[name]}' for name in sorted(versions)),
+            request.path,
+            '&'.join(sorted(f'{key}={value}' for key, values in request.query_params.lists() for value in values)),
+            accepted,
+        ]
+        return quote_etag(hashlib.sha1('|'.join(parts).encode()).hexdigest())
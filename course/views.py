@@ -5,23 +5,49 @@ from django.shortcuts import render
 根据课程表修复方案文档实现
 处理课程相关的API请求
 """
-from rest_framework import viewsets, permissions, status
+from rest_framework import mixins, viewsets, permissions, status
 from rest_framework.response import Response
 from rest_framework.decorators import action
+from rest_framework.parsers import JSONParser
+from rest_framework.reverse import reverse
+from django.conf import settings
 from django.db import IntegrityError, transaction
-from django.db.models import Q
+from django.db.models import Prefetch, Q
 
-from .models import Course, Enrollment, TeachingAssignment, Classroom, Schedule
+from .models import (
+    Course, Enrollment, TeachingAssignment, Classroom, Schedule, AdmissionRequest, Waitlist, SeatHold, LotteryEntry,
+    TimetableJob,
+)
 from .serializers import (
     CourseSerializer,
     EnrollmentSerializer,
     TeachingAssignmentSerializer,
     CourseWithDetailsSerializer,
     ClassroomSerializer,
-    ScheduleSerializer
+    ClassroomAvailabilitySerializer,
+    ScheduleSerializer,
+    AdmissionRequestSerializer,
+    BulkEnrollmentSerializer,
+    BulkScheduleSerializer,
+    EnrollmentCartSerializer,
+    WaitlistSerializer,
+    SeatHoldSerializer,
+    LotteryEntrySerializer,
+    TimetableJobSerializer,
+    TimetableJobCreateSerializer
 )
+from python_web_student_system.sparse_fields import is_field_requested
+from python_web_student_system.values_serializers import ValuesListMixin, ValuesSerializer, values_response
+from student.models import Student
+from . import admission_queue, facets, occupancy, room_finder, schedule_import, search_index, seat_precheck, timetable, versions
+from .admission import bulk_enroll
+from .waitlist import WaitlistError, get_waitlist_length, get_waitlist_rank, join_waitlist
+from .lottery import get_open_window
+from .holds import SeatHoldError, confirm_hold, create_hold, release_hold
+from .versions import ConditionalGetMixin, conditional_get
+from .seats import CourseFullError, annotate_current_students, claim_seat, refresh_available_seats
 
-class CourseViewSet(viewsets.ModelViewSet):
+class CourseViewSet(ConditionalGetMixin, viewsets.ModelViewSet):
     """课程视图集
     根据课程表修复方案文档实现课程信息管理的完整CRUD操作
     支持课程列表、详情、创建、更新和删除功能
@@ -32,6 +58,17 @@ class CourseViewSet(viewsets.ModelViewSet):
     serializer_class = CourseSerializer
     # 权限控制：要求用户必须登录
     permission_classes = [permissions.IsAuthenticated]
+    # 分页排序字段（末尾自动追加id），有对应的联合索引
+    keyset_ordering = ('code',)
+    # 响应内容依赖的数据表，任一表写入后列表和详情的 ETag 变化
+    version_tables = (
+        versions.COURSE,
+        versions.CLASSROOM,
+        versions.TEACHER,
+        versions.TEACHING_ASSIGNMENT,
+        versions.ENROLLMENT,
+        versions.STUDENT,
+    )
     
     def get_serializer_class(self):
         """根据请求操作选择合适的序列化器
@@ -41,6 +78,39 @@ class CourseViewSet(viewsets.ModelViewSet):
             return CourseWithDetailsSerializer
         return super().get_serializer_class()
     
+    def get_queryset(self):
+        """列表、搜索和详情使用的查询集
+        教室通过 select_related 随课程一次查出，授课教师通过预取 teaching_assignments__teacher 批量查出，
+        已选人数来自查询集注解，一页课程的查询次数与课程数量无关；
+        请求用 fields / omit 去掉的字段不再执行对应的关联查询和注解
+        """
+        queryset = super().get_queryset()
+        if self.action not in ('list', 'search', 'retrieve'):
+            return queryset
+        
+        request = self.request
+        if is_field_requested(request, 'classroom_name'):
+            queryset = queryset.select_related('classroom')
+        if is_field_requested(request, 'teachers') or (
+            self.action == 'retrieve' and is_field_requested(request, 'teaching_assignments')
+        ):
+            queryset = queryset.prefetch_related(
+                Prefetch(
+                    'teaching_assignments',
+                    queryset=TeachingAssignment.objects.select_related('teacher', 'course'),
+                )
+            )
+        if is_field_requested(request, 'current_students'):
+            queryset = annotate_current_students(queryset)
+        return queryset
+    
+    def get_serializer_context(self):
+        """详情接口通过 ?include=enrollments 选择内嵌前若干条选课记录"""
+        context = super().get_serializer_context()
+        include = self.request.query_params.get('include', '') if self.request else ''
+        context['include_enrollments'] = 'enrollments' in include.split(',')
+        return context
+    
     def perform_create(self, serializer):
         """创建课程前的处理逻辑
         根据课程表修复方案文档实现教室与课程的绑定逻辑
@@ -111,7 +181,9 @@ class CourseViewSet(viewsets.ModelViewSet):
         """重写删除方法，确保在删除课程前先删除相关的选课和授课记录
         维护数据的完整性
         """
-        # 先删除相关的选课记录
+        # 先删除候补名单，避免删除选课记录时触发候补转正
+        instance.waitlist_entries.all().delete()
+        # 再删除相关的选课记录
         instance.enrollments.all().delete()
         # 再删除相关的授课记录
         instance.teaching_assignments.all().delete()
@@ -124,26 +196,98 @@ class CourseViewSet(viewsets.ModelViewSet):
         返回课程的已选人数、剩余名额等信息
         """
         course = self.get_object()
-        current_students = course.enrollments.count()
-        available_slots = max(0, course.max_students - current_students)
+        # 名额已满时按需回收过期的座位预留
+        available_slots = refresh_available_seats(course)
         
         return Response({
             'course_id': course.id,
             'course_name': course.name,
-            'current_students': current_students,
+            'current_students': course.enrolled_count,
+            'held_seats': course.held_count,
             'max_students': course.max_students,
             'available_slots': available_slots,
-            'is_full': current_students >= course.max_students
+            'is_full': available_slots <= 0
+        })
+    
+    @action(detail=True, methods=['get'])
+    @conditional_get
+    def roster(self, request, pk=None):
+        """课程选课名单
+        按选课顺序分页返回选课记录，学生和课程信息随选课记录一次查出，按 values 行直接序列化
+        """
+        course = self.get_object()
+        queryset = (
+            Enrollment.objects.filter(course=course)
+            .order_by('enroll_date', 'id')
+        )
+        return values_response(self, ValuesSerializer(EnrollmentSerializer), queryset)
+    
+    @action(detail=True, methods=['get', 'post', 'delete'])
+    def waitlist(self, request, pk=None):
+        """课程候补名单
+        - GET：返回候补人数
+        - POST：学生加入候补名单，请求体 {"student": 学生ID}，仅课程满员时允许
+        - DELETE：学生退出候补名单，参数 ?student_id=学生ID
+        """
+        if request.method == 'GET':
+            return Response({
+                'course_id': int(pk),
+                'waitlist_length': get_waitlist_length(pk),
+            })
+        
+        if request.method == 'DELETE':
+            deleted, _ = Waitlist.objects.filter(
+                course_id=pk,
+                student_id=request.query_params.get('student_id'),
+            ).delete()
+            if not deleted:
+                return Response({"error": "该学生不在候补名单中"}, status=status.HTTP_404_NOT_FOUND)
+            return Response(status=status.HTTP_204_NO_CONTENT)
+        
+        try:
+            student = Student.objects.get(pk=request.data.get('student'))
+        except (Student.DoesNotExist, ValueError, TypeError):
+            return Response({"student": ["学生不存在"]}, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            entry = join_waitlist(pk, student)
+        except WaitlistError as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        
+        data = WaitlistSerializer(entry).data
+        data['rank'] = get_waitlist_rank(entry)
+        return Response(data, status=status.HTTP_201_CREATED)
+    
+    @action(detail=True, methods=['get'])
+    def waitlist_position(self, request, pk=None):
+        """查询学生在课程候补名单中的位次
+        参数：?student_id=学生ID
+        """
+        entry = Waitlist.objects.filter(
+            course_id=pk,
+            student_id=request.query_params.get('student_id'),
+        ).first()
+        if entry is None:
+            return Response({"error": "该学生不在候补名单中"}, status=status.HTTP_404_NOT_FOUND)
+        return Response({
+            'course_id': entry.course_id,
+            'student_id': entry.student_id,
+            'rank': get_waitlist_rank(entry),
+            'waitlist_length': get_waitlist_length(pk),
         })
     
     @action(detail=False, methods=['get'])
+    @conditional_get
     def search(self, request):
         """高级搜索课程
-        支持按名称、代码、类型、学期等多条件搜索
+        支持按名称、代码、类型、学期等多条件搜索，结果分页返回
+        - q：在名称、代码、描述中全文搜索（空白分隔的多个词须全部出现），按相关度降序排列
+        - name / code：名称、代码包含指定文本，经搜索索引缩小范围后匹配
+        - include=facets：附带当前筛选条件下按课程类型、授课方式、学期和学分区间的分面计数
         """
         queryset = self.get_queryset()
         
         # 获取搜索参数
+        q = request.query_params.get('q', '').strip()
         name = request.query_params.get('name')
         code = request.query_params.get('code')
         course_type = request.query_params.get('course_type')
@@ -154,9 +298,9 @@ class CourseViewSet(viewsets.ModelViewSet):
         
         # 构建查询条件
         if name:
-            queryset = queryset.filter(name__icontains=name)
+            queryset = search_index.filter_field(queryset, 'name', name)
         if code:
-            queryset = queryset.filter(code__icontains=code)
+            queryset = search_index.filter_field(queryset, 'code', code)
         if course_type:
             queryset = queryset.filter(course_type=course_type)
         if semester:
@@ -168,11 +312,25 @@ class CourseViewSet(viewsets.ModelViewSet):
         if max_credits:
             queryset = queryset.filter(credits__lte=float(max_credits))
         
-        # 序列化数据
-        serializer = self.get_serializer(queryset, many=True)
-        return Response(serializer.data)
+        # 有全文搜索词时按相关度排序，否则与列表使用相同的排序
+        if q:
+            queryset = search_index.search(queryset, q)
+        else:
+            queryset = queryset.order_by(*self.keyset_ordering, 'id')
+        
+        page = self.paginate_queryset(queryset)
+        if page is None:
+            response = Response(self.get_serializer(queryset, many=True).data)
+        else:
+            serializer = self.get_serializer(page, many=True)
+            response = self.get_paginated_response(serializer.data)
+        
+        include = request.query_params.get('include', '')
+        if 'facets' in include.split(',') and isinstance(response.data, dict):
+            response.data['facets'] = facets.get_facets(request, queryset, getattr(self, 'table_versions', None))
+        return response
 
-class EnrollmentViewSet(viewsets.ModelViewSet):
+class EnrollmentViewSet(ValuesListMixin, viewsets.ModelViewSet):
     """选课视图集
     根据课程表修复方案文档实现学生选课的完整CRUD操作
     支持选课记录的创建、查询、更新和删除
@@ -183,6 +341,8 @@ class EnrollmentViewSet(viewsets.ModelViewSet):
     serializer_class = EnrollmentSerializer
     # 权限控制：要求用户必须登录
     permission_classes = [permissions.IsAuthenticated]
+    # 分页排序字段（末尾自动追加id），有对应的联合索引
+    keyset_ordering = ('enroll_date',)
     
     def get_queryset(self):
         """根据请求参数过滤查询集
@@ -202,56 +362,529 @@ class EnrollmentViewSet(viewsets.ModelViewSet):
         if course_id:
             queryset = queryset.filter(course_id=course_id)
         
+        # 学生和课程信息随选课记录一次查出，请求未要求输出的关联不再查询
+        related = []
+        if is_field_requested(self.request, 'student_name') or is_field_requested(self.request, 'student_id'):
+            related.append('student')
+        if is_field_requested(self.request, 'course_name') or is_field_requested(self.request, 'course_code'):
+            related.append('course')
+        if related:
+            queryset = queryset.select_related(*related)
+        
         return queryset
     
-    @transaction.atomic
     def create(self, request, *args, **kwargs):
         """重写create方法，使用事务确保选课操作的原子性
         根据课程表修复方案文档实现并发控制和人数校验
+        准入方式由 settings.ENROLLMENT_ADMISSION_MODE 决定：
+        - locking：对课程行加悲观锁后检查人数再写入
+        - conditional：不加悲观锁，用条件UPDATE抢占座位后写入选课记录
+        - queued：写入持久化队列，由准入工作线程分批处理，
+          等待预算内处理完成则直接返回结果，否则返回202和状态查询地址
+        - lottery：只写入当前抽签批次的申请并返回202，批次截止后统一抽签分配名额
+        启用分片计数的课程不论准入方式，都在随机槽位上用条件UPDATE抢占座位，不锁定课程行
+        启用座位预检查时，本节点座位表中确定已满的课程在访问数据库前直接拒绝
         """
-        # 获取序列化器并验证数据
+        if seat_precheck.is_definitely_full(request.data.get('course', request.data.get('course_pk'))):
+            return self._course_full_response()
+        
+        # 获取序列化器并验证数据（每个请求只校验一次）
         serializer = self.get_serializer(data=request.data)
         serializer.is_valid(raise_exception=True)
         
-        # 提取学生和课程对象
+        admission_mode = getattr(settings, 'ENROLLMENT_ADMISSION_MODE', 'locking')
+        if admission_mode == 'lottery':
+            return self._admit_lottery(serializer)
+        if serializer.validated_data['course'].seat_shards:
+            admission_mode = 'conditional'
+        if admission_mode == 'queued':
+            return self._admit_queued(serializer)
+        if admission_mode == 'conditional':
+            error = self._admit_conditional(serializer)
+        else:
+            error = self._admit_locking(serializer)
+        if error:
+            return error
+        
+        headers = self.get_success_headers(serializer.data)
+        return Response(
+            serializer.data,
+            status=status.HTTP_201_CREATED,
+            headers=headers
+        )
+    
+    def _admit_locking(self, serializer):
+        """悲观锁准入：锁定课程行，检查加锁后的冗余计数，再写入选课记录
+        成功时返回None，失败时返回错误响应
+        """
+        course = serializer.validated_data.get('course')
+        try:
+            with transaction.atomic():
+                # 锁定课程记录，避免并发修改（悲观锁）
+                course = Course.objects.select_for_update().get(id=course.id)
+                
+                # 再次检查课程人数是否已满（双重检查，读取加锁后的冗余计数，座位预留同样占用名额）
+                if refresh_available_seats(course) <= 0:
+                    return self._course_full_response()
+                
+                # 创建选课记录，重复选课由(student, course)唯一约束拦截
+                serializer.save(course=course)
+        except Course.DoesNotExist:
+            return Response(
+                {"error": "课程不存在"},
+                status=status.HTTP_404_NOT_FOUND
+            )
+        except IntegrityError:
+            return self._integrity_error_response(serializer)
+        return None
+    
+    def _admit_conditional(self, serializer):
+        """条件UPDATE准入：不对课程行加悲观锁
+        先执行 UPDATE ... WHERE enrolled_count + held_count < max_students 抢占座位，再写入选课记录，
+        重复选课由(student, course)唯一约束拦截并回滚已抢占的座位；
+        先UPDATE再INSERT，避免INSERT的外键共享锁与随后的UPDATE在MySQL中形成死锁
+        成功时返回None，失败时返回错误响应
+        """
+        course = serializer.validated_data.get('course')
+        try:
+            with transaction.atomic():
+                if not claim_seat(course.id):
+                    raise CourseFullError()
+                serializer.save(seat_claimed=True)
+        except CourseFullError:
+            seat_precheck.record(course.id, course.max_students, course.max_students)
+            return self._course_full_response()
+        except IntegrityError:
+            return self._integrity_error_response(serializer)
+        return None
+    
+    def _admit_queued(self, serializer):
+        """排队准入：请求写入队列后在等待预算内等待工作线程的处理结果"""
         student = serializer.validated_data.get('student')
         course = serializer.validated_data.get('course')
+        admission_request = admission_queue.submit(
+            student,
+            course,
+            timeout=getattr(settings, 'ENROLLMENT_QUEUE_WAIT_SECONDS', 2),
+        )
         
-        try:
-            # 锁定课程记录，避免并发修改（悲观锁）
-            course = Course.objects.select_for_update().get(id=course.id)
-            
-            # 再次检查课程人数是否已满（双重检查）
-            current_students = Enrollment.objects.filter(course=course).count()
-            if current_students >= course.max_students:
+        if admission_request.status == AdmissionRequest.STATUS_ADMITTED:
+            enrollment = Enrollment.objects.get(student=student, course=course)
+            data = self.get_serializer(enrollment).data
+            return Response(data, status=status.HTTP_201_CREATED, headers=self.get_success_headers(data))
+        if admission_request.status == AdmissionRequest.STATUS_REJECTED:
+            return Response(
+                {"error": admission_request.reason},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        # 等待预算内未处理完成，返回状态查询地址供客户端轮询
+        status_url = reverse('admissionrequest-detail', args=[admission_request.pk], request=self.request)
+        data = AdmissionRequestSerializer(admission_request).data
+        data['status_url'] = status_url
+        return Response(data, status=status.HTTP_202_ACCEPTED, headers={'Location': status_url})
+    
+    def _admit_lottery(self, serializer):
+        """抽签准入：写入当前开放批次的抽签申请，不锁定课程行
+        管理员可以通过 priority 参数指定申请的优先级
+        """
+        window = get_open_window()
+        if window is None:
+            return Response(
+                {"error": "当前不在选课抽签时间内"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        priority = 0
+        if self.request.user.is_admin():
+            try:
+                priority = int(self.request.data.get('priority', 0))
+            except (TypeError, ValueError):
                 return Response(
-                    {"error": "该课程选课人数已达上限"},
+                    {"error": "优先级必须是整数"},
                     status=status.HTTP_400_BAD_REQUEST
                 )
-            
-            # 检查学生是否已经选过该课程
-            if Enrollment.objects.filter(student=student, course=course).exists():
-                return Response(
-                    {"error": "该学生已经选过此课程"},
-                    status=status.HTTP_400_BAD_REQUEST
+        
+        try:
+            with transaction.atomic():
+                entry = LotteryEntry.objects.create(
+                    window=window,
+                    student=serializer.validated_data['student'],
+                    course=serializer.validated_data['course'],
+                    priority=priority,
                 )
-            
-            # 创建选课记录
-            self.perform_create(serializer)
-        except Course.DoesNotExist:
+        except IntegrityError:
+            return Response(
+                {"error": "已提交过该课程的抽签申请"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        status_url = reverse('lotteryentry-detail', args=[entry.pk], request=self.request)
+        data = LotteryEntrySerializer(entry).data
+        data['status_url'] = status_url
+        return Response(data, status=status.HTTP_202_ACCEPTED, headers={'Location': status_url})
+    
+    @action(detail=False, methods=['post'], url_path='bulk', serializer_class=BulkEnrollmentSerializer)
+    def bulk(self, request):
+        """管理员批量选课
+        
+        请求体参数：
+        - enrollments: [{"student": 学生ID, "course": 课程ID}, ...]
+        
+        返回：
+        - 成功和失败的数量，以及与请求顺序一致的逐条结果
+        """
+        # 只有管理员才能批量选课
+        if not request.user.is_admin():
+            return Response(
+                {'error': '只有管理员才能批量选课'},
+                status=status.HTTP_403_FORBIDDEN
+            )
+        
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        pairs = [(item['student'], item['course']) for item in serializer.validated_data['enrollments']]
+        
+        # 整批在一个事务中完成，课程行按ID升序加锁
+        with transaction.atomic():
+            errors = bulk_enroll(pairs)
+        
+        results = [
+            {
+                'index': index,
+                'student': student_id,
+                'course': course_id,
+                'status': 'failed' if error else 'created',
+                'error': error,
+            }
+            for index, ((student_id, course_id), error) in enumerate(zip(pairs, errors))
+        ]
+        created_count = sum(1 for error in errors if error is None)
+        return Response({
+            'created_count': created_count,
+            'failed_count': len(errors) - created_count,
+            'results': results,
+        }, status=status.HTTP_200_OK)
+
+    @action(detail=False, methods=['post'], url_path='cart', serializer_class=EnrollmentCartSerializer)
+    def cart(self, request):
+        """选课购物车：一次提交一名学生的多门课程，在一个事务中完成准入
+
+        请求体参数：
+        - student: 学生ID
+        - courses: [课程ID, ...]
+        - all_or_nothing: 默认为真，任一课程无法选上时整单回滚；为假时尽量选上能选的课程
+
+        课程行按ID升序一次性加锁，两个同时提交的购物车不会互相死锁；
+        整单模式下返回400和逐条结果，未能提交的课程状态为 rolled_back
+        """
+        if getattr(settings, 'ENROLLMENT_ADMISSION_MODE', 'locking') == 'lottery':
+            return Response(
+                {"error": "抽签准入期间请逐门提交选课申请"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        student_id = serializer.validated_data['student']
+        course_ids = serializer.validated_data['courses']
+        all_or_nothing = serializer.validated_data['all_or_nothing']
+        pairs = [(student_id, course_id) for course_id in course_ids]
+
+        # 整单模式下座位表中确定已满的课程直接拒绝，不访问数据库
+        full_course_ids = {
+            course_id for course_id in course_ids
+            if seat_precheck.is_definitely_full(course_id)
+        }
+        if all_or_nothing and full_course_ids:
+            errors = [
+                "该课程选课人数已达上限" if course_id in full_course_ids else None
+                for course_id in course_ids
+            ]
+            return self._cart_response(pairs, errors, committed=False)
+
+        with transaction.atomic():
+            errors = bulk_enroll(pairs)
+            committed = not (all_or_nothing and any(errors))
+            if not committed:
+                transaction.set_rollback(True)
+        return self._cart_response(pairs, errors, committed)
+
+    def _cart_response(self, pairs, errors, committed):
+        """购物车提交结果：逐门课程的状态，整单回滚时返回400"""
+        results = []
+        for (student_id, course_id), error in zip(pairs, errors):
+            if error:
+                row_status = 'failed'
+            else:
+                row_status = 'created' if committed else 'rolled_back'
+            results.append({
+                'student': student_id,
+                'course': course_id,
+                'status': row_status,
+                'error': error,
+            })
+        created_count = sum(1 for row in results if row['status'] == 'created')
+        data = {
+            'committed': committed,
+            'created_count': created_count,
+            'failed_count': len(results) - created_count,
+            'results': results,
+        }
+        if not committed:
+            data['error'] = "部分课程无法选课，整单未提交"
+            return Response(data, status=status.HTTP_400_BAD_REQUEST)
+        return Response(data, status=status.HTTP_200_OK)
+
+    def update(self, request, *args, **kwargs):
+        """重写update方法，修改所属课程时与条件UPDATE准入一样先抢占新课程的座位
+        抢占和写入在同一事务中完成，课程已满时回滚，并发换课不会超出人数上限；
+        只修改成绩等不换课的更新不占用座位。换到已选过的课程由唯一约束拦截
+        """
+        partial = kwargs.pop('partial', False)
+        instance = self.get_object()
+        serializer = self.get_serializer(instance, data=request.data, partial=partial)
+        serializer.is_valid(raise_exception=True)
+        
+        course = serializer.validated_data['course']
+        changes_course = course.id != instance.course_id
+        try:
+            with transaction.atomic():
+                if changes_course and not claim_seat(course.id):
+                    raise CourseFullError()
+                serializer.save(seat_claimed=changes_course)
+        except CourseFullError:
+            seat_precheck.record(course.id, course.max_students, course.max_students)
+            return self._course_full_response()
+        except IntegrityError:
+            return self._integrity_error_response(serializer)
+        return Response(serializer.data)
+    
+    def _course_full_response(self):
+        """课程已满的错误响应"""
+        return Response(
+            {"error": "该课程选课人数已达上限"},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+    
+    def _duplicate_response(self):
+        """重复选课的错误响应"""
+        return Response(
+            {"error": "该学生已经选过此课程"},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+    
+    def _integrity_error_response(self, serializer):
+        """写入选课记录违反约束时的错误响应，必须在 except IntegrityError 中调用
+        同一学生和课程的其他选课记录已存在时为重复选课；学生或课程已被并发删除（外键约束）时返回不存在，
+        其他约束错误原样抛出
+        """
+        student = serializer.validated_data['student']
+        course = serializer.validated_data['course']
+        duplicates = Enrollment.objects.filter(student_id=student.pk, course_id=course.pk)
+        if serializer.instance is not None:
+            duplicates = duplicates.exclude(pk=serializer.instance.pk)
+        if duplicates.exists():
+            return self._duplicate_response()
+        if not Course.objects.filter(pk=course.pk).exists():
             return Response(
                 {"error": "课程不存在"},
                 status=status.HTTP_404_NOT_FOUND
             )
+        if not Student.objects.filter(pk=student.pk).exists():
+            return Response(
+                {"error": "学生不存在"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        raise
+
+class AdmissionRequestViewSet(viewsets.ReadOnlyModelViewSet):
+    """选课排队请求视图集
+    排队准入模式下，客户端通过该接口轮询选课请求的处理状态
+    """
+    # 查询集：获取所有排队请求
+    queryset = AdmissionRequest.objects.all()
+    # 序列化器
+    serializer_class = AdmissionRequestSerializer
+    # 权限控制：要求用户必须登录
+    permission_classes = [permissions.IsAuthenticated]
+    
+    def get_queryset(self):
+        """根据请求参数过滤查询集
+        支持按学生ID、课程ID或处理状态过滤
+        """
+        queryset = super().get_queryset()
         
-        headers = self.get_success_headers(serializer.data)
-        return Response(
-            serializer.data,
-            status=status.HTTP_201_CREATED,
-            headers=headers
+        # 获取请求中的过滤参数
+        student_id = self.request.query_params.get('student_id')
+        course_id = self.request.query_params.get('course_id')
+        request_status = self.request.query_params.get('status')
+        
+        if student_id:
+            queryset = queryset.filter(student_id=student_id)
+        if course_id:
+            queryset = queryset.filter(course_id=course_id)
+        if request_status:
+            queryset = queryset.filter(status=request_status)
+        
+        return queryset
+
+class LotteryEntryViewSet(viewsets.ReadOnlyModelViewSet):
+    """选课抽签申请视图集
+    抽签准入模式下，客户端通过该接口查询抽签申请的分配结果
+    """
+    # 查询集：获取所有抽签申请
+    queryset = LotteryEntry.objects.all()
+    # 序列化器
+    serializer_class = LotteryEntrySerializer
+    # 权限控制：要求用户必须登录
+    permission_classes = [permissions.IsAuthenticated]
+    
+    def get_queryset(self):
+        """根据请求参数过滤查询集
+        支持按抽签批次ID、学生ID、课程ID或抽签结果过滤
+        """
+        queryset = super().get_queryset()
+        
+        # 获取请求中的过滤参数
+        window_id = self.request.query_params.get('window_id')
+        student_id = self.request.query_params.get('student_id')
+        course_id = self.request.query_params.get('course_id')
+        entry_status = self.request.query_params.get('status')
+        
+        if window_id:
+            queryset = queryset.filter(window_id=window_id)
+        if student_id:
+            queryset = queryset.filter(student_id=student_id)
+        if course_id:
+            queryset = queryset.filter(course_id=course_id)
+        if entry_status:
+            queryset = queryset.filter(status=entry_status)
+        
+        return queryset
+
+class TimetableJobViewSet(mixins.CreateModelMixin,
+                          mixins.RetrieveModelMixin,
+                          mixins.ListModelMixin,
+                          viewsets.GenericViewSet):
+    """自动排课任务视图集
+    - POST：提交任务，请求体 {"semester": 学期, "time_budget": 求解时间预算（秒，可选）, "dry_run": 是否只试算}，
+      返回202和任务状态地址，任务在后台执行
+    - GET {id}/：查询任务状态、生成的排课和未排入的课程（部分解）
+    """
+    # 查询集：最近提交的任务在前
+    queryset = TimetableJob.objects.order_by('-id')
+    # 序列化器
+    serializer_class = TimetableJobSerializer
+    # 权限控制：要求用户必须登录
+    permission_classes = [permissions.IsAuthenticated]
+    
+    def get_queryset(self):
+        """根据请求参数过滤查询集
+        支持按学期或任务状态过滤
+        """
+        queryset = super().get_queryset()
+        
+        semester = self.request.query_params.get('semester')
+        job_status = self.request.query_params.get('status')
+        
+        if semester:
+            queryset = queryset.filter(semester=semester)
+        if job_status:
+            queryset = queryset.filter(status=job_status)
+        
+        return queryset
+    
+    def create(self, request, *args, **kwargs):
+        """提交自动排课任务，只有管理员可以提交"""
+        if not request.user.is_admin():
+            return Response(
+                {'error': '只有管理员才能自动排课'},
+                status=status.HTTP_403_FORBIDDEN
+            )
+        
+        serializer = TimetableJobCreateSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        job = timetable.submit(
+            serializer.validated_data['semester'],
+            time_budget=serializer.validated_data.get('time_budget'),
+            dry_run=serializer.validated_data['dry_run'],
         )
+        
+        status_url = reverse('timetablejob-detail', args=[job.pk], request=self.request)
+        data = TimetableJobSerializer(job).data
+        data['status_url'] = status_url
+        return Response(data, status=status.HTTP_202_ACCEPTED, headers={'Location': status_url})
 
-class ClassroomViewSet(viewsets.ModelViewSet):
+class SeatHoldViewSet(mixins.CreateModelMixin,
+                      mixins.RetrieveModelMixin,
+                      mixins.DestroyModelMixin,
+                      mixins.ListModelMixin,
+                      viewsets.GenericViewSet):
+    """座位预留视图集
+    学生在确认选课前预留课程座位，预留在 SEAT_HOLD_TTL_SECONDS 内占用课程名额：
+    - POST：预留座位，请求体 {"student": 学生ID, "course": 课程ID}
+    - POST {id}/confirm/：确认预留，转为正式选课
+    - DELETE {id}/：放弃预留，释放名额
+    """
+    # 查询集：获取所有座位预留
+    queryset = SeatHold.objects.select_related('course')
+    # 序列化器
+    serializer_class = SeatHoldSerializer
+    # 权限控制：要求用户必须登录
+    permission_classes = [permissions.IsAuthenticated]
+    
+    def get_queryset(self):
+        """根据请求参数过滤查询集
+        支持按学生ID或课程ID过滤
+        """
+        queryset = super().get_queryset()
+        
+        # 获取请求中的过滤参数
+        student_id = self.request.query_params.get('student_id')
+        course_id = self.request.query_params.get('course_id')
+        
+        if student_id:
+            queryset = queryset.filter(student_id=student_id)
+        if course_id:
+            queryset = queryset.filter(course_id=course_id)
+        
+        return queryset
+    
+    def create(self, request, *args, **kwargs):
+        """预留课程座位
+        名额按 enrolled_count + held_count < max_students 通过条件UPDATE抢占
+        """
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        try:
+            hold = create_hold(serializer.validated_data['student'], serializer.validated_data['course'])
+        except SeatHoldError as e:
+            return Response(
+                {"error": str(e)},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        data = self.get_serializer(hold).data
+        return Response(data, status=status.HTTP_201_CREATED, headers=self.get_success_headers(data))
+    
+    def perform_destroy(self, instance):
+        """放弃预留，释放占用的名额"""
+        release_hold(instance)
+    
+    @action(detail=True, methods=['post'])
+    def confirm(self, request, pk=None):
+        """确认座位预留，在同一事务中删除预留并创建选课记录"""
+        try:
+            enrollment = confirm_hold(pk)
+        except SeatHoldError as e:
+            return Response(
+                {"error": str(e)},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        return Response(EnrollmentSerializer(enrollment).data, status=status.HTTP_201_CREATED)
+
+class ClassroomViewSet(ConditionalGetMixin, viewsets.ModelViewSet):
     """教室视图集
     根据课程表修复方案文档实现教室管理的完整CRUD操作
     支持教室的创建、查询、更新和删除
@@ -262,19 +895,28 @@ class ClassroomViewSet(viewsets.ModelViewSet):
     serializer_class = ClassroomSerializer
     # 权限控制：要求用户必须登录
     permission_classes = [permissions.IsAuthenticated]
+    # 响应内容依赖的数据表，写入后列表和详情的 ETag 变化
+    version_tables = (versions.CLASSROOM,)
     
     @action(detail=False, methods=['get'])
     def available(self, request):
-        """获取当前可用的教室列表
-        返回未被占用或即将可用的教室
+        """查找空闲教室
+        
+        查询参数：
+        - day_of_week、start_section、end_section：要空闲的时段（须同时提供），省略时不检查占用
+        - week_pattern：上课周模式，默认每周；单周、双周只检查对应的周
+        - min_capacity：最小容量
+        - equipment：所需设备，多项用逗号、顿号或空格分隔，每项都须出现在教室的设备描述中
+        - ordering：best_fit（默认，容量刚好够用的在前）或 name
+        - limit：最多返回的教室数
+        
+        由占用位图和按容量排序的教室索引回答，不查询排课表，见 course.room_finder
         """
-        # 这里可以实现更复杂的可用教室查询逻辑
-        # 目前返回所有教室
-        queryset = self.get_queryset()
-        serializer = self.get_serializer(queryset, many=True)
-        return Response(serializer.data)
+        serializer = ClassroomAvailabilitySerializer(data=request.query_params)
+        serializer.is_valid(raise_exception=True)
+        return Response(room_finder.find(**serializer.validated_data))
 
-class ScheduleViewSet(viewsets.ModelViewSet):
+class ScheduleViewSet(ConditionalGetMixin, ValuesListMixin, viewsets.ModelViewSet):
     """排课视图集
     根据课程表修复方案文档实现排课管理的完整CRUD操作
     支持排课记录的创建、查询、更新和删除
@@ -285,6 +927,16 @@ class ScheduleViewSet(viewsets.ModelViewSet):
     serializer_class = ScheduleSerializer
     # 权限控制：要求用户必须登录
     permission_classes = [permissions.IsAuthenticated]
+    # 分页排序字段（末尾自动追加id），有对应的联合索引
+    keyset_ordering = ('day_of_week', 'start_section')
+    # 响应内容依赖的数据表（课程名称、教室名称、授课教师姓名），任一表写入后列表和详情的 ETag 变化
+    version_tables = (
+        versions.SCHEDULE,
+        versions.COURSE,
+        versions.CLASSROOM,
+        versions.TEACHING_ASSIGNMENT,
+        versions.TEACHER,
+    )
     
     def get_queryset(self):
         """根据请求参数过滤查询集
@@ -314,6 +966,17 @@ class ScheduleViewSet(viewsets.ModelViewSet):
         if day_of_week:
             queryset = queryset.filter(day_of_week=day_of_week)
         
+        # 课程、教室和授课教师信息随排课记录一次查出，请求未要求输出的关联不再查询
+        related = []
+        if is_field_requested(self.request, 'course_name') or is_field_requested(self.request, 'course_code'):
+            related.append('course')
+        if is_field_requested(self.request, 'classroom_name') or is_field_requested(self.request, 'classroom_location'):
+            related.append('classroom')
+        if is_field_requested(self.request, 'teacher_name'):
+            related.append('teaching_assignment__teacher')
+        if related:
+            queryset = queryset.select_related(*related)
+        
         return queryset
     
     @transaction.atomic
@@ -348,41 +1011,17 @@ class ScheduleViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_400_BAD_REQUEST
             )
         
-        # 检查教室排课冲突
-        conflicting_schedules = Schedule.objects.filter(
-            classroom=classroom,
-            day_of_week=day_of_week,
-            week_pattern=week_pattern
-        ).exclude(
-            # 排除时间上不重叠的排课
-            end_section__lte=start_section
-        ).exclude(
-            start_section__gte=end_section
+        # 锁定教室和授课教师当天的占用位图后再次检查冲突，并发的排课在同一资源、同一天上串行执行
+        conflict_response = self._check_conflicts(
+            classroom.pk if classroom else None,
+            teaching_assignment.teacher_id,
+            day_of_week,
+            start_section,
+            end_section,
+            week_pattern,
         )
-        
-        if conflicting_schedules.exists():
-            return Response(
-                {"error": "该教室在指定时间已被占用"},
-                status=status.HTTP_400_BAD_REQUEST
-            )
-        
-        # 检查教师排课冲突
-        conflicting_teacher_schedules = Schedule.objects.filter(
-            teaching_assignment=teaching_assignment,
-            day_of_week=day_of_week,
-            week_pattern=week_pattern
-        ).exclude(
-            # 排除时间上不重叠的排课
-            end_section__lte=start_section
-        ).exclude(
-            start_section__gte=end_section
-        )
-        
-        if conflicting_teacher_schedules.exists():
-            return Response(
-                {"error": "该教师在指定时间已有排课"},
-                status=status.HTTP_400_BAD_REQUEST
-            )
+        if conflict_response is not None:
+            return conflict_response
         
         # 使用事务确保数据一致性
         with transaction.atomic():
@@ -401,6 +1040,107 @@ class ScheduleViewSet(viewsets.ModelViewSet):
             status=status.HTTP_201_CREATED,
             headers=headers
         )
+    
+    @transaction.atomic
+    def update(self, request, *args, **kwargs):
+        """重写update方法，锁定占用位图后按教室和授课教师检查冲突（扣除排课自身原来的占用）
+        部分更新时未提交的字段取排课的原值
+        """
+        partial = kwargs.pop('partial', False)
+        instance = self.get_object()
+        serializer = self.get_serializer(instance, data=request.data, partial=partial)
+        serializer.is_valid(raise_exception=True)
+        
+        data = serializer.validated_data
+        classroom = data.get('classroom')
+        teaching_assignment = data.get('teaching_assignment')
+        conflict_response = self._check_conflicts(
+            classroom.pk if classroom else instance.classroom_id,
+            teaching_assignment.teacher_id if teaching_assignment
+            else occupancy.get_teacher_id(instance.teaching_assignment_id),
+            data.get('day_of_week', instance.day_of_week),
+            data.get('start_section', instance.start_section),
+            data.get('end_section', instance.end_section),
+            data.get('week_pattern', instance.week_pattern),
+            instance=instance,
+        )
+        if conflict_response is not None:
+            return conflict_response
+        
+        self.perform_update(serializer)
+        return Response(serializer.data)
+    
+    @action(
+        detail=False,
+        methods=['post'],
+        url_path='bulk',
+        serializer_class=BulkScheduleSerializer,
+        parser_classes=[JSONParser, schedule_import.ScheduleCSVParser],
+    )
+    def bulk(self, request):
+        """批量导入排课
+        
+        请求体（JSON）：
+        - schedules: [{"course", "classroom", "teaching_assignment", "day_of_week",
+          "start_section", "end_section", "week_pattern"}, ...]
+        也可以提交 Content-Type 为 text/csv 的请求体，首行为上述列名，每行一条排课
+        
+        整批按教室、教师和星期几排序后扫描一遍检查冲突（批次内部和与已有排课），
+        与已有排课或更早通过的行冲突的行不写入，其余行一次写入
+        
+        返回：
+        - 成功和失败的数量，以及与请求顺序一致的逐条结果，冲突的行列出冲突的对方（批次中的行号或已有排课ID）
+        """
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        items = serializer.validated_data['schedules']
+        
+        with transaction.atomic():
+            outcomes = schedule_import.import_schedules(items)
+        
+        results = [
+            {
+                'index': index,
+                'status': 'failed' if outcome['error'] else 'created',
+                **outcome,
+            }
+            for index, outcome in enumerate(outcomes)
+        ]
+        created_count = sum(1 for outcome in outcomes if outcome['error'] is None)
+        return Response({
+            'created_count': created_count,
+            'failed_count': len(outcomes) - created_count,
+            'results': results,
+        }, status=status.HTTP_200_OK)
+    
+    def _check_conflicts(self, classroom_id, teacher_id, day_of_week, start_section, end_section,
+                         week_pattern, instance=None):
+        """锁定教室和教师当天的占用位图并检查冲突，有冲突时返回错误响应，否则返回None
+        教师的位图合并了其全部授课记录，同一教师教多门课时也不能在同一时段重复排课
+        """
+        conflicts = occupancy.find_conflicts(
+            classroom_id,
+            teacher_id,
+            day_of_week,
+            start_section,
+            end_section,
+            week_pattern,
+            instance=instance,
+            lock=True,
+        )
+        
+        if occupancy.CLASSROOM in conflicts:
+            return Response(
+                {"error": "该教室在指定时间已被占用"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        if occupancy.TEACHER in conflicts:
+            return Response(
+                {"error": "该教师在指定时间已有排课"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        return None
 
 class TeachingAssignmentViewSet(viewsets.ModelViewSet):
     """授课视图集
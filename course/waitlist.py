@@ -0,0 +1,70 @@
+"""
+课程候补名单逻辑
+课程满员时学生加入候补名单；选课记录被删除释放座位后，
+在同一事务中将序号最小的候补学生转为正式选课
+"""
+from django.db import transaction
+from django.db.models import Max
+
+from .models import Course, Enrollment, Waitlist
+from .seats import claim_seat, refresh_available_seats
+
+
+class WaitlistError(Exception):
+    """加入候补名单失败"""
+
+
+def join_waitlist(course_id, student):
+    """学生加入课程候补名单，返回候补记录
+
+    在课程行锁内分配下一个序号，保证同一课程的序号唯一且递增
+    """
+    with transaction.atomic():
+        try:
+            course = Course.objects.select_for_update().get(pk=course_id)
+        except Course.DoesNotExist:
+            raise WaitlistError('课程不存在')
+        if refresh_available_seats(course) > 0:
+            raise WaitlistError('该课程尚有名额，请直接选课')
+        if Enrollment.objects.filter(course=course, student=student).exists():
+            raise WaitlistError('该学生已经选过此课程')
+        if Waitlist.objects.filter(course=course, student=student).exists():
+            raise WaitlistError('该学生已在候补名单中')
+
+        last_position = Waitlist.objects.filter(course=course).aggregate(last=Max('position'))['last'] or 0
+        return Waitlist.objects.create(course=course, student=student, position=last_position + 1)
+
+
+def get_waitlist_rank(entry):
+    """获取候补记录在课程候补名单中的位次（从1开始），利用 (course, position) 索引计数"""
+    return Waitlist.objects.filter(course_id=entry.course_id, position__lt=entry.position).count() + 1
+
+
+def get_waitlist_length(course_id):
+    """获取课程候补名单的人数，利用 (course, position) 索引计数"""
+    return Waitlist.objects.filter(course_id=course_id).count()
+
+
+def promote_from_waitlist(course_id):
+    """将课程候补名单中的首位学生转为正式选课
+
+    必须在释放座位的同一事务中调用；通过条件UPDATE抢占座位，
+    课程仍无空余名额时不做任何修改。已通过其他途径选上该课程的候补记录直接移除
+
+    返回：
+    - 新建的选课记录，没有可转正的候补学生时返回None
+    """
+    while True:
+        entry = Waitlist.objects.filter(course_id=course_id).order_by('position').first()
+        if entry is None:
+            return None
+        if Enrollment.objects.filter(course_id=course_id, student_id=entry.student_id).exists():
+            entry.delete()
+            continue
+        if not claim_seat(course_id):
+            return None
+        enrollment = Enrollment(course_id=course_id, student_id=entry.student_id)
+        enrollment.seat_claimed = True
+        enrollment.save()
+        entry.delete()
+        return enrollment
@@ -117,6 +117,22 @@ export const fetchEnrollments = async (params = {}) => {
   }
 };
 
+// 提交选课购物车：一次请求提交一名学生的多门课程
+// allOrNothing 为真时任一课程无法选上则整单不提交（返回400和逐门结果），为假时尽量选上能选的课程
+export const submitEnrollmentCart = async (studentId, courseIds, allOrNothing = true) => {
+  try {
+    const response = await axios.post('/enrollments/cart/', {
+      student: studentId,
+      courses: courseIds,
+      all_or_nothing: allOrNothing
+    });
+    return response.data;
+  } catch (error) {
+    console.error('提交选课购物车失败:', error);
+    throw error;
+  }
+};
+
 // 格式化课程类型显示
 export const formatCourseType = (courseType) => {
   const typeMap = {
@@ -0,0 +1,143 @@
+"""
+项目通用的分页类
+默认按页码分页，客户端可以通过 page_size 参数指定每页条数（不超过 max_page_size）；
+请求带 cursor 参数时改为键集分页：按 (排序字段..., id) 比较取下一页，
+不执行 COUNT(*)，也不用 OFFSET 跳过前面的记录，翻到很深的位置时耗时不变
+"""
+import base64
+import json
+from collections import OrderedDict
+
+from django.core.exceptions import FieldDoesNotExist, ValidationError
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+
+class KeysetPagination(PageNumberPagination):
+    """页码分页与键集分页
+
+    排序字段取自视图的 keyset_ordering 属性（只支持升序），末尾固定追加 id 保证顺序唯一；
+    查询集已显式排序时以查询集的排序为准。两种模式使用相同的排序，应为该排序建立联合索引。
+
+    排序中包含降序字段或注解（如搜索的相关度）时忽略 cursor 参数，仍按页码分页。
+
+    键集分页：
+    - 首页：?cursor=（空值）
+    - 后续页：使用响应中的 next 地址，cursor 为上一页最后一条记录的排序字段值
+    """
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+    cursor_query_param = 'cursor'
+    invalid_cursor_message = '无效的分页游标'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        """查询集未排序时按视图的键集排序；请求带 cursor 参数时使用键集分页"""
+        self.ordering = self.get_ordering(queryset, view)
+        if not queryset.ordered or self.ordering != self._explicit_ordering(queryset):
+            queryset = queryset.order_by(*self.ordering)
+
+        self.keyset = self.cursor_query_param in request.query_params and self._keyset_supported(queryset)
+        if not self.keyset:
+            return super().paginate_queryset(queryset, request, view)
+
+        self.request = request
+        self.page_model = queryset.model
+        page_size = self.get_page_size(request)
+        cursor = self.decode_cursor(queryset, request.query_params[self.cursor_query_param])
+        if cursor is not None:
+            queryset = queryset.filter(self._after(cursor))
+
+        # 多取一条用于判断是否还有下一页
+        rows = list(queryset[:page_size + 1])
+        self.has_next = len(rows) > page_size
+        self.page = rows[:page_size]
+        return self.page
+
+    def get_paginated_response(self, data):
+        if not self.keyset:
+            return super().get_paginated_response(data)
+        return Response(OrderedDict([
+            ('next', self.get_next_link()),
+            ('results', data),
+        ]))
+
+    def get_paginated_response_schema(self, schema):
+        schema = super().get_paginated_response_schema(schema)
+        schema['properties'].pop('previous', None)
+        return schema
+
+    def get_next_link(self):
+        if not self.keyset:
+            return super().get_next_link()
+        if not self.has_next:
+            return None
+        url = self.request.build_absolute_uri()
+        url = remove_query_param(url, self.page_query_param)
+        return replace_query_param(url, self.cursor_query_param, self.encode_cursor(self.page[-1]))
+
+    def get_ordering(self, queryset, view):
+        """返回排序字段元组，末尾为 id"""
+        ordering = self._explicit_ordering(queryset) or tuple(getattr(view, 'keyset_ordering', ()))
+        ordering = tuple(field for field in ordering if field not in ('id', 'pk'))
+        return ordering + ('id',)
+
+    @staticmethod
+    def _explicit_ordering(queryset):
+        """查询集上显式指定的排序，pk 统一写作 id"""
+        return tuple('id' if field == 'pk' else field for field in queryset.query.order_by)
+
+    def _keyset_supported(self, queryset):
+        """键集分页要求排序字段都是升序的模型字段；按相关度等注解排序时仍按页码分页"""
+        opts = queryset.model._meta
+        for field in self.ordering:
+            if field.startswith('-'):
+                return False
+            try:
+                opts.get_field(field)
+            except FieldDoesNotExist:
+                return False
+        return True
+
+    def encode_cursor(self, instance):
+        """把记录的排序字段值编码为游标，使用字段自身的字符串形式以保留完整精度
+
+        记录可以是模型实例，也可以是 values 查询集的字典行（需包含全部排序字段）
+        """
+        if isinstance(instance, dict):
+            opts = self.page_model._meta
+            instance = self.page_model(**{opts.get_field(field).attname: instance[field] for field in self.ordering})
+        values = [
+            instance._meta.get_field(field).value_to_string(instance)
+            for field in self.ordering
+        ]
+        return base64.urlsafe_b64encode(json.dumps(values).encode()).decode()
+
+    def decode_cursor(self, queryset, cursor):
+        """解析游标为排序字段值列表，空游标表示首页"""
+        if not cursor:
+            return None
+        try:
+            values = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+            if not isinstance(values, list) or len(values) != len(self.ordering):
+                raise ValueError(cursor)
+            return [
+                queryset.model._meta.get_field(field).to_python(value)
+                for field, value in zip(self.ordering, values)
+            ]
+        except (TypeError, ValueError, ValidationError):
+            raise NotFound(self.invalid_cursor_message)
+
+    def _after(self, values):
+        """构造 (a, b, id) > (x, y, z) 的条件：(a > x) 或 (a = x 且 b > y) 或 ...
+
+        外层再加上 a >= x，数据库可以直接在联合索引上从游标位置开始范围扫描
+        """
+        condition = Q()
+        equal = {}
+        for field, value in zip(self.ordering, values):
+            condition |= Q(**equal, **{f'{field}__gt': value})
+            equal[field] = value
+        return Q(**{f'{self.ordering[0]}__gte': values[0]}) & condition
@@ -10,6 +10,7 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/5.2/ref/settings/
 """
 
+import tempfile
 from pathlib import Path
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -186,7 +187,8 @@ REST_FRAMEWORK = {
     'DEFAULT_PERMISSION_CLASSES': (
         'rest_framework.permissions.AllowAny',  # 开发环境允许所有访问，生产环境可改为IsAuthenticatedOrReadOnly
     ),
-    'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.PageNumberPagination',
+    # 页码分页，支持 page_size 参数；带 cursor 参数时使用键集分页（见 python_web_student_system/pagination.py）
+    'DEFAULT_PAGINATION_CLASS': 'python_web_student_system.pagination.KeysetPagination',
     'PAGE_SIZE': 10,
 }
 
@@ -226,3 +228,76 @@ SIMPLE_JWT = {
 # 媒体文件配置，用于用户头像上传
 MEDIA_URL = '/media/'
 MEDIA_ROOT = BASE_DIR / 'media'
+
+# 选课准入模式
+# - 'locking'：对课程行加悲观锁（select_for_update）后检查人数再写入
+# - 'conditional'：不加悲观锁，先通过
+#   UPDATE ... WHERE enrolled_count + held_count < max_students 抢占座位再写入选课记录，依赖唯一约束判重
+# - 'queued'：请求写入持久化队列，由准入工作线程按课程FIFO分批处理，每批只加一次课程行锁
+# - 'lottery'：请求只写入当前开放的抽签批次（RegistrationWindow），
+#   批次截止后运行 python manage.py allocate_lottery 按带种子的抽签统一分配名额
+ENROLLMENT_ADMISSION_MODE = 'locking'
+
+# 排队准入配置
+# 每批处理的请求数量
+ENROLLMENT_QUEUE_BATCH_SIZE = 100
+# 选课请求在响应中等待处理结果的预算（秒），超时返回202由客户端轮询状态接口
+ENROLLMENT_QUEUE_WAIT_SECONDS = 2
+# 是否在Web进程内启动准入工作线程；关闭后需运行 python manage.py process_admission_queue
+ENROLLMENT_QUEUE_WORKER = True
+# 工作线程未被唤醒时的轮询间隔（秒），用于处理其他进程写入或重启前遗留的请求
+ENROLLMENT_QUEUE_POLL_SECONDS = 1.0
+
+# 自动排课配置（见 course/timetable.py）
+# 每周可排课的天数（从周一开始）
+TIMETABLE_DAYS = 5
+# 每天可排课的时段（开始节次, 结束节次），各时段节数相同、互不重叠
+TIMETABLE_SLOTS = ((1, 2), (3, 4), (5, 6), (7, 8), (9, 10))
+# 学期周数，用于把课程总课时折算为每周课次
+TIMETABLE_WEEKS = 16
+# 未指定时的求解时间预算（秒），超时后返回部分解
+TIMETABLE_TIME_BUDGET_SECONDS = 10
+# 是否在Web进程内启动线程执行排课任务；关闭后需运行 python manage.py generate_timetable --pending
+TIMETABLE_JOB_WORKER = True
+
+# 座位预留配置
+# 座位预留的有效期（秒），过期后预留的名额在读取课程名额时或由 sweep_seat_holds 命令回收
+SEAT_HOLD_TTL_SECONDS = 300
+
+# 选课座位预检查（同一节点上各工作进程通过 mmap 文件共享），只在有 fcntl 的平台上生效
+# 是否在选课接口访问数据库前，先快速拒绝座位表中已满的课程
+SEAT_PRECHECK_ENABLED = False
+# 座位表文件路径，同一节点上的所有工作进程必须使用同一路径
+SEAT_PRECHECK_PATH = str(Path(tempfile.gettempdir()) / 'student_system_seat_precheck.bin')
+# 座位表的条目数量（每条32字节），按 课程ID % 条目数量 定位
+SEAT_PRECHECK_SLOTS = 65536
+# 条目的有效期（秒），超过有效期的条目不再用于拒绝
+SEAT_PRECHECK_TTL_SECONDS = 2
+
+# 缓存配置：本地开发使用进程内存缓存；多进程部署时可改为文件缓存
+# （'django.core.cache.backends.filebased.FileBasedCache'）或 Redis/Memcached，使各工作进程共享响应缓存
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'student-system',
+    }
+}
+
+# 数据表版本号的合并递增窗口（秒），键为表名，未配置或为0的表每次写入提交后都递增版本号；
+# 窗口内第一次写入立即递增，其余写入只在缓存中标记，窗口结束后由下一次写入或读取版本号时补做一次递增，
+# 选课高峰期间不再逐条UPDATE同一个版本号行，依赖选课表的响应缓存最多每个窗口失效一次。
+# 多进程部署时须配置各进程共享的缓存，否则其他进程最多要等到本进程下次写入或读取时才能看到补做的递增
+TABLE_VERSION_BUMP_INTERVALS = {
+    'enrollment': 1,
+}
+
+# 列表和搜索接口的响应缓存有效期（秒），键为 "<路由basename>-<操作>"，未配置或为0的操作不缓存；
+# 相关表写入后缓存键的命名空间随表版本号变化，有效期只决定旧条目占用缓存的时间
+RESPONSE_CACHE_TTL = {
+    'course-list': 60,
+    'course-search': 60,
+    'classroom-list': 300,
+    'schedule-list': 120,
+    # 课程搜索的分面计数，按筛选条件签名缓存，翻页时复用
+    'course-facets': 300,
+}
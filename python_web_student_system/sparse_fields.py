@@ -0,0 +1,55 @@
+"""
+稀疏字段集：GET 请求通过 ?fields= 只返回指定字段，通过 ?omit= 去掉指定字段
+例如下拉框只需要 ?fields=id,name；两个参数都支持逗号分隔或重复传参，同时出现时先取 fields 再去掉 omit。
+
+SparseFieldsMixin 只作用于响应的顶层序列化器（列表中的每一行），嵌套序列化器保持完整；
+视图用 is_field_requested 判断代价较高的字段是否需要输出，未输出的字段不再执行对应的
+select_related / prefetch_related / 注解等查询
+"""
+from rest_framework.permissions import SAFE_METHODS
+from rest_framework.serializers import ListSerializer
+
+FIELDS_PARAM = 'fields'
+OMIT_PARAM = 'omit'
+
+
+def _parse(request, param):
+    names = set()
+    for value in request.query_params.getlist(param):
+        names.update(name.strip() for name in value.split(',') if name.strip())
+    return names
+
+
+def get_sparse_fields(request):
+    """解析请求中的稀疏字段参数，返回 (要输出的字段集合, 要去掉的字段集合)；非只读请求不做裁剪"""
+    if request is None or request.method not in SAFE_METHODS:
+        return set(), set()
+    return _parse(request, FIELDS_PARAM), _parse(request, OMIT_PARAM)
+
+
+def is_field_requested(request, name):
+    """响应中是否需要输出该字段"""
+    include, omit = get_sparse_fields(request)
+    return name not in omit and (not include or name in include)
+
+
+class SparseFieldsMixin:
+    """ModelSerializer 的稀疏字段支持，按请求中的 fields / omit 参数裁剪顶层序列化器的字段"""
+
+    def get_fields(self):
+        fields = super().get_fields()
+        if not self._is_top_level():
+            return fields
+        include, omit = get_sparse_fields(self.context.get('request'))
+        if include:
+            for name in list(fields):
+                if name not in include:
+                    fields.pop(name)
+        for name in omit:
+            fields.pop(name, None)
+        return fields
+
+    def _is_top_level(self):
+        """是否为响应的顶层序列化器（单个对象，或列表中的每一行）"""
+        parent = self.parent
+        return parent is None or (isinstance(parent, ListSerializer) and parent.parent is None)
@@ -0,0 +1,118 @@
+"""
+只读列表的快速序列化路径
+ModelSerializer 为每一行构造模型实例，再逐个字段调用 get_attribute / to_representation；
+导出几千行的选课名单时这部分开销远大于查询本身。ValuesSerializer 按对应 ModelSerializer 的
+可读字段（已按 fields / omit 裁剪）生成 .values() 的查找路径，一次查询带出所需的关联字段，
+直接用字典构造每一行，输出与 ModelSerializer 逐字节一致：
+- 字段顺序与 ModelSerializer 相同，值为 None 时输出 None
+- 外键主键、字符串、整数原样输出，其余字段（如时间）调用对应序列化器字段的 to_representation
+
+只支持由模型字段或非空外键路径（如 student.name）组成的序列化器；
+包含 SerializerMethodField、嵌套序列化器或可空外键路径时 supported 为假，视图回退到 ModelSerializer
+"""
+from rest_framework import fields as drf_fields
+from rest_framework import relations
+from rest_framework.response import Response
+from rest_framework.serializers import BaseSerializer
+
+# 数据库返回值与序列化结果相同、无需转换的序列化器字段类型
+PASSTHROUGH_FIELDS = (
+    drf_fields.CharField,
+    drf_fields.ChoiceField,
+    drf_fields.IntegerField,
+    drf_fields.ReadOnlyField,
+    relations.PrimaryKeyRelatedField,
+)
+
+
+def _identity(value):
+    return value
+
+
+class ValuesSerializer:
+    """按 ModelSerializer 的字段定义，从 .values() 的字典行直接构造输出"""
+
+    def __init__(self, serializer_class, context=None):
+        self.serializer = serializer_class(context=context or {})
+        self.columns = []
+        self.supported = True
+        model = self.serializer.Meta.model
+        for name, field in self.serializer.fields.items():
+            if field.write_only:
+                continue
+            lookup = self._lookup(model, field)
+            if lookup is None:
+                self.supported = False
+                return
+            if isinstance(field, PASSTHROUGH_FIELDS):
+                convert = _identity
+            else:
+                convert = field.to_representation
+            self.columns.append((name, lookup, convert))
+
+    @staticmethod
+    def _lookup(model, field):
+        """把字段的 source 转换为 .values() 的查找路径；无法用 .values() 表示时返回None"""
+        if isinstance(field, (BaseSerializer, drf_fields.SerializerMethodField)) or field.source == '*':
+            return None
+        # 路径上的外键必须非空，否则 ModelSerializer 会省略该字段而 .values() 得到 None
+        current = model
+        for attr in field.source_attrs[:-1]:
+            try:
+                model_field = current._meta.get_field(attr)
+            except Exception:
+                return None
+            if not model_field.many_to_one or model_field.null:
+                return None
+            current = model_field.related_model
+        try:
+            last = current._meta.get_field(field.source_attrs[-1])
+        except Exception:
+            return None
+        if last.many_to_many or last.one_to_many:
+            return None
+        return '__'.join(field.source_attrs)
+
+    def values(self, queryset, extra=()):
+        """返回只查询所需列（及分页排序等额外字段）的 values 查询集"""
+        lookups = dict.fromkeys([lookup for _, lookup, _ in self.columns] + list(extra))
+        return queryset.values(*lookups)
+
+    def to_representation(self, rows):
+        """把 values 查询集的字典行转换为与 ModelSerializer 一致的输出列表"""
+        columns = self.columns
+        data = []
+        for row in rows:
+            item = {}
+            for name, lookup, convert in columns:
+                value = row[lookup]
+                item[name] = None if value is None else convert(value)
+            data.append(item)
+        return data
+
+
+class ValuesListMixin:
+    """视图集的列表接口使用 ValuesSerializer 快速序列化，序列化器不支持时回退到默认实现
+
+    分页排序字段一并查询，供键集分页生成游标
+    """
+
+    def list(self, request, *args, **kwargs):
+        values_serializer = ValuesSerializer(self.get_serializer_class(), self.get_serializer_context())
+        if not values_serializer.supported:
+            return super().list(request, *args, **kwargs)
+        queryset = self.filter_queryset(self.get_queryset())
+        return values_response(self, values_serializer, queryset)
+
+
+def values_response(view, values_serializer, queryset):
+    """按视图的分页设置（如果启用）分页，并用 ValuesSerializer 生成列表响应"""
+    paginator = view.paginator
+    extra = ()
+    if paginator is not None and hasattr(paginator, 'get_ordering'):
+        extra = [field.lstrip('-') for field in paginator.get_ordering(queryset, view)]
+    rows = values_serializer.values(queryset, extra=extra)
+    page = view.paginate_queryset(rows)
+    if page is not None:
+        return view.get_paginated_response(values_serializer.to_representation(page))
+    return Response(values_serializer.to_representation(rows))
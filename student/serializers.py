@@ -2,9 +2,10 @@
 学生应用的序列化器定义
 """
 from rest_framework import serializers
+from python_web_student_system.sparse_fields import SparseFieldsMixin
 from .models import Student
 
-class StudentSerializer(serializers.ModelSerializer):
+class StudentSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     """
     学生序列化器，用于学生数据的序列化和反序列化
     - 序列化：将模型实例转换为JSON格式
@@ -8,10 +8,12 @@ from django.db import IntegrityError, transaction
 from rest_framework.viewsets import ModelViewSet
 from rest_framework.permissions import AllowAny
 
+from python_web_student_system.values_serializers import ValuesListMixin
+
 from .models import Student
 from .serializers import StudentSerializer
 
-class StudentViewSet(ModelViewSet):
+class StudentViewSet(ValuesListMixin, ModelViewSet):
     """
     学生视图集，提供完整的学生管理CRUD操作
     - GET /api/students/ - 获取学生列表
@@ -28,6 +30,9 @@ class StudentViewSet(ModelViewSet):
     
     # 权限控制：允许任何用户进行任何操作（适合开发环境）
     permission_classes = [AllowAny]
+    
+    # 分页排序字段（末尾自动追加id），学号上有唯一索引
+    keyset_ordering = ('student_id',)
 
     def create(self, request, *args, **kwargs):
         """
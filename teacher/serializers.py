@@ -3,9 +3,10 @@
 定义教师数据的序列化和反序列化规则
 """
 from rest_framework import serializers
+from python_web_student_system.sparse_fields import SparseFieldsMixin
 from .models import Teacher
 
-class TeacherSerializer(serializers.ModelSerializer):
+class TeacherSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     """教师序列化器，负责教师模型数据的序列化与反序列化
     
     字段说明：
@@ -5,10 +5,13 @@
 from rest_framework import viewsets, permissions, status
 from rest_framework_simplejwt.authentication import JWTAuthentication
 from rest_framework.response import Response
+from course import versions
+from course.versions import ConditionalGetMixin
+from python_web_student_system.sparse_fields import is_field_requested
 from .models import Teacher
 from .serializers import TeacherSerializer
 
-class TeacherViewSet(viewsets.ModelViewSet):
+class TeacherViewSet(ConditionalGetMixin, viewsets.ModelViewSet):
     """教师视图集，提供教师信息的CRUD操作
     
     支持的操作：
@@ -26,6 +29,15 @@ class TeacherViewSet(viewsets.ModelViewSet):
     serializer_class = TeacherSerializer
     authentication_classes = [JWTAuthentication]
     permission_classes = [permissions.IsAuthenticated]  # 要求用户必须登录
+    # 响应内容依赖的数据表（用户名来自用户表），写入后列表和详情的 ETag 变化
+    version_tables = (versions.TEACHER, versions.USER)
+    
+    def get_queryset(self):
+        """输出用户名时关联用户随教师一次查出，请求用 fields / omit 去掉用户名时不再关联"""
+        queryset = super().get_queryset()
+        if is_field_requested(self.request, 'username'):
+            queryset = queryset.select_related('user')
+        return queryset
     
     def create(self, request, *args, **kwargs):
         """创建新教师，处理邮箱唯一性错误并自动关联当前用户
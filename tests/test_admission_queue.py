@@ -0,0 +1,101 @@
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from course import admission_queue
+from course.models import AdmissionRequest, Enrollment
+from user_auth.models import CustomUser
+
+from tests.test_enrollment_admission import create_course, create_students
+
+
+@override_settings(ENROLLMENT_ADMISSION_MODE='queued', ENROLLMENT_QUEUE_WORKER=False)
+class QueuedAdmissionTest(TestCase):
+    """
+    测试排队准入：请求入队、按课程FIFO分批处理、状态查询
+    """
+    def setUp(self):
+        self.client = APIClient()
+        self.user = CustomUser.objects.create_user(username='queue', password='testpassword')
+        self.client.force_authenticate(user=self.user)
+        self.course = create_course('QUE001', 2)
+        self.students = create_students(3, 'QUE')
+
+    def _enroll(self, student):
+        data = {'student': student.id, 'course': self.course.id}
+        return self.client.post(reverse('enrollment-list'), data, format='json')
+
+    def test_requests_are_queued_and_processed_in_order(self):
+        """未在等待预算内处理的请求返回202，处理后按提交顺序准入"""
+        responses = [self._enroll(student) for student in self.students]
+        for response in responses:
+            self.assertEqual(response.status_code, status.HTTP_202_ACCEPTED)
+            self.assertEqual(response.data['status'], AdmissionRequest.STATUS_PENDING)
+            self.assertIn('status_url', response.data)
+        self.assertFalse(Enrollment.objects.exists())
+
+        # 每批只处理两条，验证跨批次仍保持FIFO
+        processed = admission_queue.drain(batch_size=2)
+        self.assertEqual(processed, 3)
+
+        statuses = [
+            self.client.get(response['Location']).data['status']
+            for response in responses
+        ]
+        self.assertEqual(statuses, [
+            AdmissionRequest.STATUS_ADMITTED,
+            AdmissionRequest.STATUS_ADMITTED,
+            AdmissionRequest.STATUS_REJECTED,
+        ])
+        rejected = AdmissionRequest.objects.get(pk=responses[2].data['id'])
+        self.assertEqual(rejected.reason, '该课程选课人数已达上限')
+
+        self.course.refresh_from_db()
+        self.assertEqual(self.course.enrolled_count, 2)
+        self.assertEqual(Enrollment.objects.filter(course=self.course).count(), 2)
+
+    def test_duplicate_requests_in_queue(self):
+        """同一学生重复排队时只准入一次"""
+        self._enroll(self.students[0])
+        self._enroll(self.students[0])
+        admission_queue.drain()
+
+        results = list(
+            AdmissionRequest.objects.order_by('id').values_list('status', 'reason')
+        )
+        self.assertEqual(results, [
+            (AdmissionRequest.STATUS_ADMITTED, ''),
+            (AdmissionRequest.STATUS_REJECTED, '该学生已经选过此课程'),
+        ])
+
+
+@override_settings(
+    ENROLLMENT_ADMISSION_MODE='queued',
+    ENROLLMENT_QUEUE_WORKER=True,
+    ENROLLMENT_QUEUE_WAIT_SECONDS=5,
+    ENROLLMENT_QUEUE_POLL_SECONDS=60,
+)
+class QueuedAdmissionWorkerTest(TransactionTestCase):
+    """
+    测试本进程准入工作线程在等待预算内处理请求并直接返回结果
+    """
+    def setUp(self):
+        self.client = APIClient()
+        self.user = CustomUser.objects.create_user(username='worker', password='testpassword')
+        self.client.force_authenticate(user=self.user)
+        self.course = create_course('QUE002', 1)
+        self.students = create_students(2, 'WRK')
+
+    def tearDown(self):
+        admission_queue.stop_worker()
+
+    def test_result_returned_within_wait_budget(self):
+        """工作线程及时处理时，响应直接返回准入结果"""
+        url = reverse('enrollment-list')
+        response = self.client.post(url, {'student': self.students[0].id, 'course': self.course.id}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(response.data['course'], self.course.id)
+
+        response = self.client.post(url, {'student': self.students[1].id, 'course': self.course.id}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
@@ -0,0 +1,105 @@
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from course.models import Course, Enrollment
+from student.models import Student
+from user_auth.models import CustomUser
+
+
+class BulkEnrollmentTest(TestCase):
+    """
+    测试管理员批量选课接口 POST /api/enrollments/bulk/
+    """
+    def setUp(self):
+        self.client = APIClient()
+        self.admin = CustomUser.objects.create_user(username='bulkadmin', password='testpassword', user_type='admin')
+        self.client.force_authenticate(user=self.admin)
+        self.url = reverse('enrollment-bulk')
+
+        self.courses = [
+            Course.objects.create(
+                name=f'批量选课课程{i}',
+                code=f'BULK{i:03d}',
+                credits=2,
+                total_hours=32,
+                semester='2024-2025-1',
+                teaching_method='offline',
+                max_students=capacity,
+            )
+            for i, capacity in enumerate([2, 100])
+        ]
+        self.students = [
+            Student.objects.create(
+                name=f'批量学生{i}',
+                age=20,
+                gender='男',
+                class_name='批量班',
+                student_id=f'BULK{i:04d}',
+                college='测试学院',
+                major='测试专业',
+                email=f'bulk{i}@example.com',
+            )
+            for i in range(60)
+        ]
+
+    def test_per_row_report(self):
+        """逐条返回结果，并保持容量和重复选课的约束"""
+        small, large = self.courses
+        Enrollment.objects.create(student=self.students[0], course=large)
+
+        payload = {'enrollments': [
+            {'student': self.students[1].id, 'course': small.id},
+            {'student': self.students[2].id, 'course': small.id},
+            {'student': self.students[3].id, 'course': small.id},   # 超出容量
+            {'student': self.students[0].id, 'course': large.id},   # 已选过
+            {'student': self.students[1].id, 'course': large.id},
+            {'student': self.students[1].id, 'course': large.id},   # 批次内重复
+            {'student': 999999, 'course': large.id},                # 学生不存在
+            {'student': self.students[4].id, 'course': 999999},     # 课程不存在
+        ]}
+        response = self.client.post(self.url, payload, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['created_count'], 3)
+        self.assertEqual(response.data['failed_count'], 5)
+        self.assertEqual([row['error'] for row in response.data['results']], [
+            None,
+            None,
+            '该课程选课人数已达上限',
+            '该学生已经选过此课程',
+            None,
+            '该学生已经选过此课程',
+            '学生不存在',
+            '课程不存在',
+        ])
+
+        small.refresh_from_db()
+        large.refresh_from_db()
+        self.assertEqual(small.enrolled_count, 2)
+        self.assertEqual(large.enrolled_count, 2)
+        self.assertEqual(Enrollment.objects.filter(course=small).count(), 2)
+
+    def test_query_count_independent_of_rows(self):
+        """查询次数与批量条数无关"""
+        _, large = self.courses
+
+        def post(students):
+            payload = {'enrollments': [{'student': s.id, 'course': large.id} for s in students]}
+            with CaptureQueriesContext(connection) as queries:
+                response = self.client.post(self.url, payload, format='json')
+            self.assertEqual(response.data['failed_count'], 0)
+            return len(queries)
+
+        self.assertEqual(post(self.students[:10]), post(self.students[10:60]))
+
+    def test_requires_admin(self):
+        """非管理员不能批量选课"""
+        user = CustomUser.objects.create_user(username='bulkstudent', password='testpassword')
+        self.client.force_authenticate(user=user)
+        payload = {'enrollments': [{'student': self.students[0].id, 'course': self.courses[0].id}]}
+        response = self.client.post(self.url, payload, format='json')
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+        self.assertFalse(Enrollment.objects.exists())
@@ -104,8 +104,7 @@ class ConcurrentEnrollmentTest(TestCase):
         response = self.client.post(reverse('enrollment-list'), data, format='json')
         self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
         # 检查错误信息
-        self.assertIn('non_field_errors', response.data)
-        self.assertEqual(response.data['non_field_errors'][0].code, 'unique')
+        self.assertEqual(response.data['error'], '该学生已经选过此课程')
     
     def tearDown(self):
         """
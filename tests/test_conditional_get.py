@@ -0,0 +1,139 @@
+from datetime import date
+
+from django.contrib.auth.models import update_last_login
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from course import versions
+from course.models import Classroom, Enrollment, TableVersion
+from teacher.models import Teacher
+from user_auth.models import CustomUser
+
+from tests.test_enrollment_admission import create_course, create_students
+
+
+class ConditionalGetTest(TestCase):
+    """
+    测试课程、教室、教师接口的条件GET：ETag 未变化时返回304，相关表写入后 ETag 变化
+    """
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.user = CustomUser.objects.create_user(username='etag', password='testpassword')
+        self.client.force_authenticate(user=self.user)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.course = create_course('ETAG001', 10)
+            self.classroom = Classroom.objects.create(name='ETag教室', location='二号楼', capacity=30)
+            self.student = create_students(1, 'ETG')[0]
+
+    def _get(self, url, etag=None, **params):
+        headers = {'HTTP_IF_NONE_MATCH': etag} if etag else {}
+        return self.client.get(url, params, **headers)
+
+    def test_not_modified_skips_serializer(self):
+        """ETag 一致时只读取版本号，不查询课程数据"""
+        for url in (
+            reverse('course-list'),
+            reverse('course-detail', args=[self.course.id]),
+            reverse('course-search'),
+            reverse('course-roster', args=[self.course.id]),
+        ):
+            response = self._get(url)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            self.assertEqual(response['Cache-Control'], 'private, no-cache')
+            self.assertIn('Last-Modified', response)
+
+            with self.assertNumQueries(1):
+                cached = self._get(url, response['ETag'])
+            self.assertEqual(cached.status_code, status.HTTP_304_NOT_MODIFIED)
+            self.assertEqual(cached['ETag'], response['ETag'])
+
+        # 查询参数不同的请求使用不同的 ETag
+        first = self._get(reverse('course-list'))
+        self.assertEqual(self._get(reverse('course-list'), first['ETag'], page_size=5).status_code, 200)
+
+    def test_enrollment_changes_course_etag(self):
+        """选课后课程列表的已选人数变化，ETag 随之变化"""
+        url = reverse('course-list')
+        etag = self._get(url)['ETag']
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Enrollment.objects.create(student=self.student, course=self.course)
+
+        response = self._get(url, etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(response['ETag'], etag)
+        self.assertEqual(response.data['results'][0]['current_students'], 1)
+
+    @override_settings(TABLE_VERSION_BUMP_INTERVALS={versions.ENROLLMENT: 60})
+    def test_enrollment_bumps_coalesced(self):
+        """合并窗口内的一批选课只递增一次选课表版本号，窗口结束后读取时补做一次递增"""
+        url = reverse('course-list')
+        students = create_students(5, 'BUR')
+        table = TableVersion._meta.db_table
+        with CaptureQueriesContext(connection) as queries:
+            for student in students:
+                with self.captureOnCommitCallbacks(execute=True):
+                    Enrollment.objects.create(student=student, course=self.course)
+        updates = [query for query in queries if query['sql'].startswith('UPDATE') and table in query['sql']]
+        self.assertEqual(len(updates), 1)
+
+        # 窗口内读到的是窗口开始时的版本号
+        etag = self._get(url)['ETag']
+        self.assertEqual(self._get(url, etag).status_code, status.HTTP_304_NOT_MODIFIED)
+
+        # 窗口结束后第一次读取补做递增，看到全部选课
+        cache.delete(versions.BUMP_WINDOW_KEY.format(versions.ENROLLMENT))
+        response = self._get(url, etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['results'][0]['current_students'], 5)
+        self.assertEqual(self._get(url, response['ETag']).status_code, status.HTTP_304_NOT_MODIFIED)
+
+    def test_classroom_update_and_if_modified_since(self):
+        """教室更新后 ETag 变化；If-Modified-Since 不早于最后修改时间时返回304"""
+        url = reverse('classroom-detail', args=[self.classroom.id])
+        response = self._get(url)
+        response = self.client.get(url, HTTP_IF_MODIFIED_SINCE=response['Last-Modified'])
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+        etag = response['ETag']
+        with self.captureOnCommitCallbacks(execute=True):
+            self.classroom.capacity = 40
+            self.classroom.save()
+        response = self._get(url, etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['capacity'], 40)
+
+    def test_teacher_etag_follows_username_only(self):
+        """教师列表显示用户名：改用户名时 ETag 变化，登录更新 last_login 时不变"""
+        teacher_user = CustomUser.objects.create_user(username='etagteacher', password='testpassword')
+        with self.captureOnCommitCallbacks(execute=True):
+            Teacher.objects.create(
+                user=teacher_user,
+                name='ETag教师',
+                age=40,
+                gender='男',
+                title='副教授',
+                department='测试学院',
+                email='etagteacher@example.com',
+                phone='13800000000',
+                hire_date=date(2020, 1, 1),
+            )
+        url = reverse('teacher-list')
+        etag = self._get(url)['ETag']
+
+        with self.captureOnCommitCallbacks(execute=True):
+            update_last_login(None, teacher_user)
+        self.assertEqual(self._get(url, etag).status_code, status.HTTP_304_NOT_MODIFIED)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            teacher_user.username = 'etagteacher2'
+            teacher_user.save()
+        response = self._get(url, etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['results'][0]['username'], 'etagteacher2')
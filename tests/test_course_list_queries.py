@@ -0,0 +1,151 @@
+from datetime import date
+from io import StringIO
+
+from django.core.management import call_command
+from django.core.cache import cache
+from django.test import TestCase
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from course import search_index
+from course.models import Classroom, Course, Enrollment, TeachingAssignment
+from teacher.models import Teacher
+from user_auth.models import CustomUser
+
+from tests.test_enrollment_admission import create_students
+
+
+class CourseListQueryCountTest(TestCase):
+    """
+    测试课程列表和搜索的查询次数与课程数量无关
+    """
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.user = CustomUser.objects.create_user(username='listqueries', password='testpassword')
+        self.client.force_authenticate(user=self.user)
+        self.classroom = Classroom.objects.create(name='查询测试教室', location='一号楼', capacity=100)
+        self.teachers = [
+            Teacher.objects.create(
+                name=f'查询教师{i}',
+                age=40,
+                gender='女',
+                title='讲师',
+                department='测试学院',
+                email=f'listteacher{i}@example.com',
+                phone='13800000000',
+                hire_date=date(2020, 1, 1),
+            )
+            for i in range(3)
+        ]
+
+    def _create_courses(self, count, prefix):
+        courses = Course.objects.bulk_create([
+            Course(
+                name=f'查询课程{prefix}{i}',
+                code=f'{prefix}{i:04d}',
+                credits=2,
+                total_hours=32,
+                semester='2024-2025-1',
+                teaching_method='offline',
+                classroom=self.classroom,
+                max_students=50,
+            )
+            for i in range(count)
+        ])
+        # 批量创建不触发信号，手动建立搜索索引
+        search_index.rebuild(Course.objects.filter(code__startswith=prefix))
+        TeachingAssignment.objects.bulk_create([
+            TeachingAssignment(teacher=teacher, course=course, teaching_hours=16)
+            for course in courses
+            for teacher in self.teachers[:2]
+        ])
+        return courses
+
+    def test_list_and_search_query_count(self):
+        """10门和500门课程的列表/搜索查询次数相同"""
+        small = self._create_courses(10, 'QS')
+        self._create_courses(490, 'QL')
+
+        # 列表分页：版本号（条件GET）、计数、课程（含教室）、预取授课教师
+        with self.assertNumQueries(4):
+            response = self.client.get(reverse('course-list'), {'page': 1})
+        self.assertEqual(len(response.data['results']), 10)
+
+        # 搜索分页：版本号、计数、课程（含教室）、预取授课教师
+        url = reverse('course-search')
+        with self.assertNumQueries(4):
+            response = self.client.get(url, {'semester': '2024-2025-1'})
+        self.assertEqual(response.data['count'], 500)
+        with self.assertNumQueries(4):
+            response = self.client.get(url, {'code': 'QS'})
+        self.assertEqual(response.data['count'], 10)
+
+        row = next(item for item in response.data['results'] if item['id'] == small[0].id)
+        self.assertEqual(row['classroom_name'], '查询测试教室')
+        self.assertEqual([t['name'] for t in row['teachers']], ['查询教师0', '查询教师1'])
+
+    def test_current_students_from_annotation(self):
+        """已选人数来自注解，分片计数的课程汇总槽位"""
+        plain, sharded = self._create_courses(2, 'QC')
+        students = create_students(3, 'QCS')
+        Enrollment.objects.create(student=students[0], course=plain)
+        call_command('configure_seat_shards', sharded.id, '--shards', '2', stdout=StringIO())
+        for student in students:
+            Enrollment.objects.create(student=student, course=sharded)
+
+        with self.assertNumQueries(4):
+            response = self.client.get(reverse('course-search'), {'code': 'QC'})
+        counts = {item['id']: item['current_students'] for item in response.data['results']}
+        self.assertEqual(counts, {plain.id: 1, sharded.id: 3})
+
+
+class CourseDetailTest(TestCase):
+    """
+    测试课程详情：默认不内嵌选课记录，选课名单通过分页的 roster 接口获取
+    """
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.user = CustomUser.objects.create_user(username='detailqueries', password='testpassword')
+        self.client.force_authenticate(user=self.user)
+        self.course = Course.objects.create(
+            name='详情测试课程',
+            code='DETAIL001',
+            credits=2,
+            total_hours=32,
+            semester='2024-2025-1',
+            teaching_method='online',
+            max_students=1000,
+        )
+        self.students = create_students(60, 'DTL')
+        Enrollment.objects.bulk_create([
+            Enrollment(student=student, course=self.course) for student in self.students
+        ])
+
+    def test_detail_bounded(self):
+        """默认详情不含选课记录；选择内嵌时最多内嵌固定条数，查询次数与人数无关"""
+        url = reverse('course-detail', args=[self.course.id])
+        with self.assertNumQueries(3):
+            response = self.client.get(url)
+        self.assertNotIn('enrollments', response.data)
+        self.assertTrue(response.data['roster_url'].endswith(f'/courses/{self.course.id}/roster/'))
+
+        with self.assertNumQueries(4):
+            response = self.client.get(url, {'include': 'enrollments'})
+        self.assertEqual(len(response.data['enrollments']), 20)
+        self.assertEqual(response.data['enrollments'][0]['student_name'], self.students[0].name)
+
+    def test_roster_paginated(self):
+        """选课名单分页返回，每页查询次数固定"""
+        url = reverse('course-roster', args=[self.course.id])
+        with self.assertNumQueries(4):
+            response = self.client.get(url, {'page': 2})
+        self.assertEqual(response.data['count'], 60)
+        self.assertEqual(
+            [row['student_id'] for row in response.data['results']],
+            [student.student_id for student in self.students[10:20]],
+        )
+
+        response = self.client.get(reverse('course-roster', args=[999999]))
+        self.assertEqual(response.status_code, 404)
@@ -0,0 +1,170 @@
+from io import StringIO
+
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from course import search_index
+from course.models import Course, CourseSearchToken
+from user_auth.models import CustomUser
+
+from tests.test_enrollment_admission import create_course
+
+
+class CourseSearchTest(TestCase):
+    """
+    测试课程全文搜索：n-gram 倒排索引、相关度排序、分页及结构化条件
+    """
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.user = CustomUser.objects.create_user(username='search', password='testpassword')
+        self.client.force_authenticate(user=self.user)
+        self.structures = create_course('DS101', 30)
+        self.structures.name = '数据结构'
+        self.structures.description = '线性表、树与图'
+        self.structures.save()
+        self.database = create_course('DB201', 30)
+        self.database.name = '数据库原理'
+        self.database.description = '关系模型与数据结构的存储'
+        self.database.course_type = 'elective'
+        self.database.save()
+        self.network = create_course('NET301', 30)
+        self.network.name = '计算机网络'
+        self.network.save()
+
+    def _search(self, params):
+        response = self.client.get(reverse('course-search'), params)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return response.data
+
+    def test_tokenize(self):
+        """按空白切分后生成二元词元，单字符片段保留为一元词元"""
+        self.assertEqual(search_index.tokenize('数据结构 C'), {'数据': 1, '据结': 1, '结构': 1, 'c': 1})
+        self.assertEqual(search_index.query_tokens('a DS'), {'ds'})
+
+    def test_ranked_and_paginated(self):
+        """名称命中的课程排在只有描述命中的课程之前，结果分页返回"""
+        data = self._search({'q': '数据结构'})
+        self.assertEqual(data['count'], 2)
+        self.assertEqual([row['id'] for row in data['results']], [self.structures.id, self.database.id])
+
+        data = self._search({'q': '数据 原理'})
+        self.assertEqual([row['id'] for row in data['results']], [self.database.id])
+
+        data = self._search({'q': 'ds101'})
+        self.assertEqual([row['id'] for row in data['results']], [self.structures.id])
+
+        data = self._search({'q': '数据', 'page_size': 1, 'cursor': ''})
+        self.assertEqual(data['count'], 2)
+        self.assertEqual(len(data['results']), 1)
+
+    def test_bigrams_are_verified(self):
+        """词元都命中但文本中不连续出现的课程不在结果中"""
+        course = create_course('CS1001', 30)
+        self.assertEqual(self._search({'q': '101'})['count'], 1)
+        self.assertEqual(self._search({'code': '100'})['results'][0]['id'], course.id)
+
+    def test_structured_filters_kept(self):
+        """名称、代码与类型等结构化条件照常生效"""
+        data = self._search({'name': '数据', 'course_type': 'elective'})
+        self.assertEqual([row['id'] for row in data['results']], [self.database.id])
+        data = self._search({'code': 'net'})
+        self.assertEqual([row['id'] for row in data['results']], [self.network.id])
+        data = self._search({'q': '数据', 'course_type': 'required'})
+        self.assertEqual([row['id'] for row in data['results']], [self.structures.id])
+
+    def test_index_follows_saves(self):
+        """课程改名后索引随之更新，删除课程时词元级联删除；命令可重建批量导入的课程"""
+        self.network.name = '操作系统'
+        self.network.save()
+        self.assertEqual(self._search({'q': '网络'})['count'], 0)
+        self.assertEqual(self._search({'q': '操作系统'})['count'], 1)
+
+        course_id = self.network.id
+        self.network.delete()
+        self.assertFalse(CourseSearchToken.objects.filter(course_id=course_id).exists())
+
+        Course.objects.filter(id=self.structures.id).update(name='编译原理')
+        call_command('rebuild_course_search_index', '--course', str(self.structures.id), stdout=StringIO())
+        data = self._search({'q': '编译'})
+        self.assertEqual([row['id'] for row in data['results']], [self.structures.id])
+
+
+    def test_unchanged_search_fields_skip_reindex(self):
+        """只修改学分、人数上限等字段时不重建词元，修改课程名称时重建"""
+        table = CourseSearchToken._meta.db_table
+        course = Course.objects.get(pk=self.network.pk)
+        course.credits = 4
+        with CaptureQueriesContext(connection) as queries:
+            course.save()
+        self.assertFalse([query for query in queries if table in query['sql']])
+
+        self.assertEqual(self._search({'q': '网络'})['count'], 1)
+
+        course.name = '计算机网络实验'
+        with CaptureQueriesContext(connection) as queries:
+            course.save()
+        self.assertTrue([query for query in queries if table in query['sql']])
+        self.assertEqual(self._search({'q': '实验'})['count'], 1)
+
+
+class CourseFacetTest(TestCase):
+    """
+    测试课程搜索的分面计数：一条分组查询统计，按筛选条件签名缓存
+    """
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.user = CustomUser.objects.create_user(username='facet', password='testpassword')
+        self.client.force_authenticate(user=self.user)
+        for i, (course_type, method, semester, credits) in enumerate([
+            ('required', 'offline', '2024-2025-1', 2),
+            ('required', 'online', '2024-2025-1', 3.5),
+            ('elective', 'offline', '2024-2025-2', 0.5),
+            ('elective', 'offline', '2024-2025-2', 6),
+        ]):
+            course = create_course(f'FACET{i}', 30)
+            course.course_type = course_type
+            course.teaching_method = method
+            course.semester = semester
+            course.credits = credits
+            course.save()
+
+    def _get(self, params):
+        response = self.client.get(reverse('course-search'), params)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return response.data
+
+    def test_counts_for_current_filters(self):
+        """统计全部筛选后的课程，不受分页影响"""
+        data = self._get({'include': 'facets', 'page_size': 1})
+        self.assertEqual(data['facets'], {
+            'course_type': {'required': 2, 'elective': 2},
+            'teaching_method': {'online': 1, 'offline': 3},
+            'semester': {'2024-2025-1': 2, '2024-2025-2': 2},
+            'credits': {'0-1': 1, '1-2': 0, '2-3': 1, '3-4': 1, '4+': 1},
+        })
+
+        data = self._get({'include': 'facets', 'course_type': 'elective', 'q': 'FACET'})
+        self.assertEqual(data['facets']['teaching_method'], {'online': 0, 'offline': 2})
+        self.assertEqual(data['facets']['semester'], {'2024-2025-2': 2})
+        self.assertNotIn('facets', self._get({}))
+
+    def test_cached_per_filter_signature(self):
+        """翻页复用同一筛选条件的分面；课程写入后重新统计"""
+        self._get({'include': 'facets', 'page': 1, 'page_size': 2})
+        with CaptureQueriesContext(connection) as queries:
+            data = self._get({'include': 'facets', 'page': 2, 'page_size': 2})
+        self.assertFalse(any('credit_bucket' in query['sql'] for query in queries))
+        self.assertEqual(data['facets']['course_type']['required'], 2)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            create_course('FACET9', 30)
+        data = self._get({'include': 'facets', 'page': 2, 'page_size': 2})
+        self.assertEqual(data['facets']['course_type']['required'], 3)
@@ -0,0 +1,203 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+from unittest import mock
+
+from django.db import connection
+from django.test import TestCase, TransactionTestCase, override_settings, skipUnlessDBFeature
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from course.models import Course, Enrollment
+from course.serializers import EnrollmentSerializer
+from student.models import Student
+from user_auth.models import CustomUser
+
+
+def create_students(count, prefix):
+    """批量创建测试学生"""
+    return [
+        Student.objects.create(
+            name=f'{prefix}学生{i}',
+            age=20,
+            gender='男',
+            class_name='准入测试班',
+            student_id=f'{prefix}{i:04d}',
+            college='测试学院',
+            major='测试专业',
+            email=f'{prefix.lower()}{i}@example.com',
+        )
+        for i in range(count)
+    ]
+
+
+def create_course(code, max_students):
+    """创建指定容量的线下课程（不关联教室，容量不随教室变化）"""
+    return Course.objects.create(
+        name=f'准入测试课程{code}',
+        code=code,
+        credits=2,
+        total_hours=32,
+        semester='2024-2025-1',
+        teaching_method='offline',
+        max_students=max_students,
+    )
+
+
+@override_settings(ENROLLMENT_ADMISSION_MODE='conditional')
+class ConditionalAdmissionTest(TestCase):
+    """
+    测试条件UPDATE准入模式的基本行为
+    """
+    def setUp(self):
+        self.client = APIClient()
+        self.user = CustomUser.objects.create_user(username='admission', password='testpassword')
+        self.client.force_authenticate(user=self.user)
+        self.course = create_course('ADM001', 2)
+        self.students = create_students(3, 'ADM')
+
+    def _enroll(self, student):
+        data = {'student': student.id, 'course': self.course.id}
+        return self.client.post(reverse('enrollment-list'), data, format='json')
+
+    def test_capacity_and_counter(self):
+        """座位抢占成功后计数只增加一次，满员后拒绝"""
+        self.assertEqual(self._enroll(self.students[0]).status_code, status.HTTP_201_CREATED)
+        self.assertEqual(self._enroll(self.students[1]).status_code, status.HTTP_201_CREATED)
+
+        response = self._enroll(self.students[2])
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+        self.course.refresh_from_db()
+        self.assertEqual(self.course.enrolled_count, 2)
+        self.assertEqual(Enrollment.objects.filter(course=self.course).count(), 2)
+
+    def test_duplicate_releases_claimed_seat(self):
+        """唯一约束拦截重复选课时，已抢占的座位随事务回滚"""
+        self.assertEqual(self._enroll(self.students[0]).status_code, status.HTTP_201_CREATED)
+
+        # 序列化器不预先查询重复选课，与并发请求同时通过校验的情况相同
+        response = self._enroll(self.students[0])
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(response.data['error'], '该学生已经选过此课程')
+
+        self.course.refresh_from_db()
+        self.assertEqual(self.course.enrolled_count, 1)
+
+    def test_update_claims_seat_when_changing_course(self):
+        """只修改成绩不占用座位；换课时抢占新课程的座位，新课程已满或已选过时拒绝"""
+        other_course = create_course('ADM002', 1)
+        for student in self.students[:2]:
+            self._enroll(student)
+        enrollment = Enrollment.objects.get(student=self.students[0], course=self.course)
+        url = reverse('enrollment-detail', args=[enrollment.id])
+
+        response = self.client.patch(url, {'score': 90}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(Enrollment.objects.get(pk=enrollment.id).score, 90)
+
+        response = self.client.patch(url, {'course': other_course.id}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        counts = dict(Course.objects.values_list('code', 'enrolled_count'))
+        self.assertEqual((counts['ADM001'], counts['ADM002']), (1, 1))
+
+        # 新课程已满
+        other = Enrollment.objects.get(student=self.students[1])
+        response = self.client.patch(
+            reverse('enrollment-detail', args=[other.id]), {'course': other_course.id}, format='json'
+        )
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('该课程选课人数已达上限', str(response.data))
+
+        # 换回已经选过的课程由唯一约束拦截，已抢占的座位随事务回滚
+        Course.objects.filter(pk=self.course.pk).update(max_students=5)
+        self.assertEqual(self._enroll(self.students[0]).status_code, status.HTTP_201_CREATED)
+        response = self.client.patch(url, {'course': self.course.id}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('该学生已经选过此课程', str(response.data))
+
+        counts = dict(Course.objects.values_list('code', 'enrolled_count'))
+        self.assertEqual((counts['ADM001'], counts['ADM002']), (2, 1))
+
+
+class AdmissionIntegrityErrorTest(TransactionTestCase):
+    """
+    测试写入选课记录违反外键约束时的错误响应（外键约束在事务提交时检查，需要真实提交的事务）
+    """
+    def setUp(self):
+        self.client = APIClient()
+        self.user = CustomUser.objects.create_user(username='fkerror', password='testpassword')
+        self.client.force_authenticate(user=self.user)
+        self.course = create_course('FKE001', 5)
+
+    def test_student_deleted_after_validation(self):
+        """学生在校验通过后被并发删除时返回学生不存在，而不是重复选课"""
+        validate = EnrollmentSerializer.validate
+
+        def validate_then_delete(serializer, data):
+            data = validate(serializer, data)
+            Student.objects.filter(pk=data['student'].pk).delete()
+            return data
+
+        for mode, student in zip(('locking', 'conditional'), create_students(2, 'FKE')):
+            with self.subTest(mode=mode), override_settings(ENROLLMENT_ADMISSION_MODE=mode), \
+                    mock.patch.object(EnrollmentSerializer, 'validate', validate_then_delete):
+                response = self.client.post(
+                    reverse('enrollment-list'), {'student': student.id, 'course': self.course.id}, format='json'
+                )
+                self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+                self.assertEqual(response.data['error'], '学生不存在')
+                self.assertFalse(Enrollment.objects.exists())
+                self.course.refresh_from_db()
+                self.assertEqual(self.course.enrolled_count, 0)
+
+
+@skipUnlessDBFeature('has_select_for_update')
+class ConcurrentAdmissionBenchmark(TransactionTestCase):
+    """
+    使用真实线程并发选课，对比悲观锁准入与条件UPDATE准入的吞吐量
+    SQLite 不支持行级锁，该测试仅在 MySQL/PostgreSQL 上运行
+    """
+    CAPACITY = 50
+    REQUESTS = 200
+    WORKERS = 16
+
+    def setUp(self):
+        self.user = CustomUser.objects.create_user(username='bench', password='testpassword')
+        self.students = create_students(self.REQUESTS, 'BEN')
+
+    def _run(self, mode, code):
+        course = create_course(code, self.CAPACITY)
+        url = reverse('enrollment-list')
+
+        def enroll(student_id):
+            client = APIClient()
+            client.force_authenticate(user=self.user)
+            try:
+                response = client.post(url, {'student': student_id, 'course': course.id}, format='json')
+                return response.status_code
+            finally:
+                connection.close()
+
+        # 在主线程中切换准入模式，override_settings 不是线程安全的
+        with override_settings(ENROLLMENT_ADMISSION_MODE=mode):
+            started = time.perf_counter()
+            with ThreadPoolExecutor(max_workers=self.WORKERS) as executor:
+                results = list(executor.map(enroll, [s.id for s in self.students]))
+            elapsed = time.perf_counter() - started
+
+        course.refresh_from_db()
+        self.assertEqual(results.count(status.HTTP_201_CREATED), self.CAPACITY)
+        self.assertEqual(results.count(status.HTTP_400_BAD_REQUEST), self.REQUESTS - self.CAPACITY)
+        self.assertEqual(Enrollment.objects.filter(course=course).count(), self.CAPACITY)
+        self.assertEqual(course.enrolled_count, self.CAPACITY)
+
+        print(f'\n[{mode}] {self.REQUESTS} 个请求 / {self.WORKERS} 线程：'
+              f'耗时 {elapsed:.3f}s，准入 {self.CAPACITY / elapsed:.1f} 次/秒，'
+              f'处理 {self.REQUESTS / elapsed:.1f} 请求/秒')
+        return elapsed
+
+    def test_locking_vs_conditional(self):
+        """两种准入方式在并发下都不超卖，并输出吞吐量"""
+        self._run('locking', 'BENCH-LOCK')
+        self._run('conditional', 'BENCH-COND')
@@ -0,0 +1,125 @@
+from concurrent.futures import ThreadPoolExecutor
+
+from django.db import connection
+from django.test import TestCase, TransactionTestCase, skipUnlessDBFeature
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from course.models import Enrollment
+from user_auth.models import CustomUser
+
+from tests.test_enrollment_admission import create_course, create_students
+
+
+class EnrollmentCartTest(TestCase):
+    """
+    测试选课购物车接口 POST /api/enrollments/cart/
+    """
+    def setUp(self):
+        self.client = APIClient()
+        self.user = CustomUser.objects.create_user(username='cart', password='testpassword')
+        self.client.force_authenticate(user=self.user)
+        self.url = reverse('enrollment-cart')
+        self.open_courses = [create_course(f'CART{i}', 5) for i in range(3)]
+        self.full_course = create_course('CARTFULL', 1)
+        self.students = create_students(2, 'CRT')
+        Enrollment.objects.create(student=self.students[1], course=self.full_course)
+
+    def _submit(self, courses, all_or_nothing=True):
+        payload = {
+            'student': self.students[0].id,
+            'courses': [course.id for course in courses],
+            'all_or_nothing': all_or_nothing,
+        }
+        return self.client.post(self.url, payload, format='json')
+
+    def test_all_or_nothing_commits_whole_cart(self):
+        """所有课程都能选上时整单提交，重复的课程ID只处理一次"""
+        response = self._submit(self.open_courses + self.open_courses[:1])
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response.data['committed'])
+        self.assertEqual(response.data['created_count'], 3)
+        self.assertEqual(Enrollment.objects.filter(student=self.students[0]).count(), 3)
+        for course in self.open_courses:
+            course.refresh_from_db()
+            self.assertEqual(course.enrolled_count, 1)
+
+    def test_all_or_nothing_rolls_back(self):
+        """任一课程已满时整单回滚，计数不变"""
+        response = self._submit(self.open_courses + [self.full_course])
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertFalse(response.data['committed'])
+        self.assertEqual(
+            [row['status'] for row in response.data['results']],
+            ['rolled_back', 'rolled_back', 'rolled_back', 'failed'],
+        )
+        self.assertEqual(response.data['results'][-1]['error'], '该课程选课人数已达上限')
+        self.assertFalse(Enrollment.objects.filter(student=self.students[0]).exists())
+        for course in self.open_courses:
+            course.refresh_from_db()
+            self.assertEqual(course.enrolled_count, 0)
+
+    def test_best_effort_keeps_successes(self):
+        """尽力模式下选上能选的课程，逐门返回失败原因"""
+        Enrollment.objects.create(student=self.students[0], course=self.open_courses[0])
+        response = self._submit(self.open_courses + [self.full_course], all_or_nothing=False)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['created_count'], 2)
+        self.assertEqual([row['error'] for row in response.data['results']], [
+            '该学生已经选过此课程',
+            None,
+            None,
+            '该课程选课人数已达上限',
+        ])
+        self.assertEqual(Enrollment.objects.filter(student=self.students[0]).count(), 3)
+
+    def test_query_count_independent_of_cart_size(self):
+        """一次提交的查询次数与课程数量无关"""
+        courses = [create_course(f'CARTQ{i}', 5) for i in range(6)]
+
+        def submit(student, cart):
+            payload = {'student': student.id, 'courses': [course.id for course in cart]}
+            with CaptureQueriesContext(connection) as queries:
+                response = self.client.post(self.url, payload, format='json')
+            self.assertEqual(response.data['created_count'], len(cart))
+            return len(queries)
+
+        self.assertEqual(submit(self.students[0], courses[:2]), submit(self.students[1], courses))
+
+
+@skipUnlessDBFeature('has_select_for_update')
+class EnrollmentCartConcurrencyTest(TransactionTestCase):
+    """
+    使用真实线程同时提交课程顺序相反的购物车，验证按课程ID升序加锁不会死锁
+    SQLite 不支持行级锁，该测试仅在 MySQL/PostgreSQL 上运行
+    """
+    CARTS = 24
+    WORKERS = 8
+
+    def test_opposite_orders_do_not_deadlock(self):
+        """课程顺序相反的购物车并发提交全部成功，计数与选课记录一致"""
+        user = CustomUser.objects.create_user(username='cartbench', password='testpassword')
+        courses = [create_course(f'CARTC{i}', self.CARTS) for i in range(5)]
+        students = create_students(self.CARTS, 'CRC')
+        url = reverse('enrollment-cart')
+
+        def submit(index):
+            client = APIClient()
+            client.force_authenticate(user=user)
+            cart = courses if index % 2 else courses[::-1]
+            try:
+                payload = {'student': students[index].id, 'courses': [course.id for course in cart]}
+                return client.post(url, payload, format='json').status_code
+            finally:
+                connection.close()
+
+        with ThreadPoolExecutor(max_workers=self.WORKERS) as executor:
+            results = list(executor.map(submit, range(self.CARTS)))
+
+        self.assertEqual(results, [status.HTTP_200_OK] * self.CARTS)
+        for course in courses:
+            course.refresh_from_db()
+            self.assertEqual(course.enrolled_count, self.CARTS)
+        self.assertEqual(Enrollment.objects.count(), self.CARTS * len(courses))
@@ -0,0 +1,118 @@
+from io import StringIO
+
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.db import DatabaseError, transaction
+from django.test import TestCase
+
+from course import versions
+from course.models import Course, Enrollment
+from student.models import Student
+
+
+class EnrollmentCounterTest(TestCase):
+    """
+    测试课程已选人数冗余计数（enrolled_count）的维护
+    """
+    def setUp(self):
+        self.course = Course.objects.create(
+            name='计数测试课程',
+            code='CNT001',
+            credits=2,
+            total_hours=32,
+            semester='2024-2025-1',
+            teaching_method='online',
+        )
+        self.students = [
+            Student.objects.create(
+                name=f'计数学生{i}',
+                age=20,
+                gender='男',
+                class_name='计数班',
+                student_id=f'CNT{i:03d}',
+                college='测试学院',
+                major='测试专业',
+                email=f'counter{i}@example.com',
+            )
+            for i in range(3)
+        ]
+
+    def _enrolled_count(self):
+        return Course.objects.values_list('enrolled_count', flat=True).get(pk=self.course.pk)
+
+    def test_insert_and_delete_update_counter(self):
+        """新增和删除选课记录时计数同步变化"""
+        enrollments = [Enrollment.objects.create(student=s, course=self.course) for s in self.students]
+        self.assertEqual(self._enrolled_count(), 3)
+
+        enrollments[0].delete()
+        self.assertEqual(self._enrolled_count(), 2)
+
+        Enrollment.objects.filter(course=self.course).delete()
+        self.assertEqual(self._enrolled_count(), 0)
+
+    def test_cascade_student_deletion_updates_counter(self):
+        """删除学生时级联删除的选课记录也会减少计数"""
+        for student in self.students:
+            Enrollment.objects.create(student=student, course=self.course)
+        self.students[1].delete()
+        self.assertEqual(self._enrolled_count(), 2)
+
+    def test_stale_course_save_keeps_counter(self):
+        """保存内存中过期的课程实例不会覆盖最新计数"""
+        stale_course = Course.objects.get(pk=self.course.pk)
+        Enrollment.objects.create(student=self.students[0], course=self.course)
+
+        stale_course.description = '更新描述'
+        stale_course.save()
+
+        self.assertEqual(self._enrolled_count(), 1)
+        self.assertEqual(Course.objects.get(pk=self.course.pk).description, '更新描述')
+
+    def test_save_of_deleted_course_requires_force_insert(self):
+        """已删除课程的实例保存时不会重新插入，需要显式传入 force_insert"""
+        Course.objects.filter(pk=self.course.pk).delete()
+        with self.assertRaises(DatabaseError), transaction.atomic():
+            self.course.save()
+        self.assertFalse(Course.objects.filter(pk=self.course.pk).exists())
+
+        self.course.save(force_insert=True)
+        self.assertTrue(Course.objects.filter(pk=self.course.pk).exists())
+
+    def test_sync_command_detects_and_fixes_drift(self):
+        """管理命令能够检测并修复计数漂移"""
+        Enrollment.objects.create(student=self.students[0], course=self.course)
+        Course.objects.filter(pk=self.course.pk).update(enrolled_count=7)
+
+        with self.assertRaises(CommandError):
+            call_command('sync_enrollment_counts', stdout=StringIO())
+        self.assertEqual(self._enrolled_count(), 7)
+
+        course_version = versions.get_versions([versions.COURSE])[0][versions.COURSE]
+        with self.captureOnCommitCallbacks(execute=True):
+            call_command('sync_enrollment_counts', '--fix', '--chunk-size', '1', stdout=StringIO())
+        self.assertEqual(self._enrolled_count(), 1)
+        # 计数保存在课程表中，修复后课程表版本号递增，缓存的课程列表失效
+        self.assertGreater(versions.get_versions([versions.COURSE])[0][versions.COURSE], course_version)
+
+        # 修复后再次检查不应报告漂移
+        call_command('sync_enrollment_counts', stdout=StringIO())
+
+    def test_moving_enrollment_updates_both_courses(self):
+        """修改选课记录所属课程时，原课程和新课程的计数同步调整"""
+        other_course = Course.objects.create(
+            name='计数测试课程2',
+            code='CNT002',
+            credits=2,
+            total_hours=32,
+            semester='2024-2025-1',
+            teaching_method='online',
+        )
+        Enrollment.objects.create(student=self.students[0], course=self.course)
+
+        enrollment = Enrollment.objects.get(student=self.students[0], course=self.course)
+        enrollment.course = other_course
+        enrollment.save()
+
+        self.assertEqual(self._enrolled_count(), 0)
+        self.assertEqual(Course.objects.get(pk=other_course.pk).enrolled_count, 1)
@@ -0,0 +1,154 @@
+import time
+from datetime import timedelta
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from course.lottery import LotteryError, allocate_window
+from course.models import Course, Enrollment, LotteryEntry, RegistrationWindow
+from student.models import Student
+from user_auth.models import CustomUser
+
+from tests.test_enrollment_admission import create_course, create_students
+
+
+def create_window(closes_in_seconds=3600):
+    """创建已开放的抽签批次"""
+    now = timezone.now()
+    return RegistrationWindow.objects.create(
+        name='抽签测试批次',
+        opens_at=now - timedelta(hours=1),
+        closes_at=now + timedelta(seconds=closes_in_seconds),
+    )
+
+
+@override_settings(ENROLLMENT_ADMISSION_MODE='lottery')
+class LotteryApiTest(TestCase):
+    """
+    测试抽签准入模式下的选课申请收集
+    """
+    def setUp(self):
+        self.client = APIClient()
+        self.user = CustomUser.objects.create_user(username='lottery', password='testpassword')
+        self.client.force_authenticate(user=self.user)
+        self.course = create_course('LOT001', 1)
+        self.student = create_students(1, 'LOT')[0]
+
+    def _enroll(self):
+        data = {'student': self.student.id, 'course': self.course.id}
+        return self.client.post(reverse('enrollment-list'), data, format='json')
+
+    def test_requests_collected_during_window(self):
+        """批次开放期间只写入申请，不创建选课记录"""
+        self.assertEqual(self._enroll().status_code, status.HTTP_400_BAD_REQUEST)
+
+        window = create_window()
+        response = self._enroll()
+        self.assertEqual(response.status_code, status.HTTP_202_ACCEPTED)
+        self.assertEqual(response.data['window'], window.id)
+        self.assertEqual(response.data['status'], LotteryEntry.STATUS_PENDING)
+        self.assertFalse(Enrollment.objects.exists())
+
+        # 重复申请被拒绝
+        self.assertEqual(self._enroll().status_code, status.HTTP_400_BAD_REQUEST)
+
+        status_response = self.client.get(response['Location'])
+        self.assertEqual(status_response.data['id'], response.data['id'])
+
+
+class LotteryAllocationTest(TestCase):
+    """
+    测试抽签分配：名额上限、优先级、相同种子结果可复现
+    """
+    def setUp(self):
+        self.courses = [create_course(f'LOTA{i}', 2) for i in range(3)]
+        self.students = create_students(8, 'LTA')
+        self.window = create_window()
+        LotteryEntry.objects.bulk_create([
+            LotteryEntry(window=self.window, student=student, course=course)
+            for student in self.students
+            for course in self.courses
+        ])
+        # 最后一名学生在第一门课程上优先
+        LotteryEntry.objects.filter(student=self.students[-1], course=self.courses[0]).update(priority=10)
+
+    def test_same_seed_reproduces_allocation(self):
+        """相同种子的预览和正式分配结果一致，分配结果通过校验"""
+        with self.assertRaises(LotteryError):
+            allocate_window(self.window.id, seed=42)
+
+        first = allocate_window(self.window.id, seed=42, dry_run=True, force=True)
+        second = allocate_window(self.window.id, seed=42, dry_run=True, force=True)
+        self.assertEqual(first['results'], second['results'])
+        self.assertFalse(Enrollment.objects.exists())
+
+        summary = allocate_window(self.window.id, seed=42, force=True)
+        self.assertEqual(summary['results'], first['results'])
+        self.assertEqual(summary['admitted'], 6)
+
+        for course in self.courses:
+            course.refresh_from_db()
+            self.assertEqual(course.enrolled_count, 2)
+        self.assertTrue(
+            Enrollment.objects.filter(student=self.students[-1], course=self.courses[0]).exists()
+        )
+        self.assertEqual(
+            LotteryEntry.objects.filter(status=LotteryEntry.STATUS_ADMITTED).count(), 6
+        )
+
+        self.window.refresh_from_db()
+        self.assertEqual((self.window.status, self.window.seed), (RegistrationWindow.STATUS_ALLOCATED, 42))
+        call_command('allocate_lottery', self.window.id, '--verify', stdout=StringIO())
+
+    def test_command_allocates_closed_windows(self):
+        """管理命令分配所有已截止的批次"""
+        RegistrationWindow.objects.filter(pk=self.window.pk).update(closes_at=timezone.now())
+        call_command('allocate_lottery', stdout=StringIO())
+        self.assertEqual(Enrollment.objects.count(), 6)
+
+
+class LotteryAllocationBenchmark(TestCase):
+    """
+    测试数万条申请的分配耗时
+    """
+    STUDENTS = 5000
+    COURSES = 20
+    CHOICES = 4
+
+    def test_allocate_twenty_thousand_entries(self):
+        """两万条申请在数秒内完成分配"""
+        students = Student.objects.bulk_create([
+            Student(
+                name=f'抽签学生{i}',
+                age=20,
+                gender='男',
+                class_name='抽签班',
+                student_id=f'LTB{i:05d}',
+                college='测试学院',
+                major='测试专业',
+                email=f'ltb{i}@example.com',
+            )
+            for i in range(self.STUDENTS)
+        ])
+        courses = [create_course(f'LOTB{i}', 300) for i in range(self.COURSES)]
+        window = create_window()
+        LotteryEntry.objects.bulk_create([
+            LotteryEntry(window=window, student=student, course=courses[(index + k) % self.COURSES])
+            for index, student in enumerate(students)
+            for k in range(self.CHOICES)
+        ], batch_size=2000)
+
+        started = time.perf_counter()
+        summary = allocate_window(window.id, seed=2024, force=True)
+        elapsed = time.perf_counter() - started
+
+        self.assertEqual(summary['admitted'], self.COURSES * 300)
+        self.assertEqual(summary['admitted'] + summary['rejected'], self.STUDENTS * self.CHOICES)
+        self.assertEqual(Enrollment.objects.count(), self.COURSES * 300)
+        self.assertEqual(sum(Course.objects.values_list('enrolled_count', flat=True)), self.COURSES * 300)
+        print(f'\n[抽签分配] {self.STUDENTS * self.CHOICES} 条申请 / {self.COURSES} 门课程：耗时 {elapsed:.2f}s')
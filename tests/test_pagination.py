@@ -0,0 +1,77 @@
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from course.models import Enrollment
+from student.models import Student
+from user_auth.models import CustomUser
+
+from tests.test_enrollment_admission import create_course, create_students
+
+
+class KeysetPaginationTest(TestCase):
+    """
+    测试列表接口的分页：page_size 参数、键集分页遍历、无效游标
+    """
+    def setUp(self):
+        self.client = APIClient()
+        self.user = CustomUser.objects.create_user(username='keyset', password='testpassword')
+        self.client.force_authenticate(user=self.user)
+        self.course = create_course('KEY001', 200)
+        self.students = create_students(25, 'KEY')
+        Enrollment.objects.bulk_create([
+            Enrollment(student=student, course=self.course) for student in self.students
+        ])
+
+    def _walk(self, url, params):
+        """沿 next 地址遍历键集分页，返回所有记录"""
+        rows = []
+        response = self.client.get(url, params)
+        while True:
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            self.assertNotIn('count', response.data)
+            rows.extend(response.data['results'])
+            if not response.data['next']:
+                return rows
+            response = self.client.get(response.data['next'])
+
+    def test_keyset_walk_visits_every_row_once(self):
+        """键集分页按 (排序字段, id) 遍历全部记录，不重复不遗漏"""
+        enrollments = self._walk(reverse('enrollment-list'), {'cursor': '', 'page_size': 7})
+        self.assertEqual(
+            [row['id'] for row in enrollments],
+            list(Enrollment.objects.order_by('enroll_date', 'id').values_list('id', flat=True)),
+        )
+
+        students = self._walk(reverse('student-list'), {'cursor': '', 'page_size': 10})
+        self.assertEqual(
+            [row['student_id'] for row in students],
+            sorted(Student.objects.values_list('student_id', flat=True)),
+        )
+
+    def test_keyset_page_skips_count(self):
+        """键集分页不执行 COUNT(*) 和 OFFSET"""
+        response = self.client.get(reverse('enrollment-list'), {'cursor': '', 'page_size': 5})
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get(response.data['next'])
+        sql = ' '.join(query['sql'] for query in queries).upper()
+        self.assertNotIn('COUNT(', sql)
+        self.assertNotIn('OFFSET', sql)
+
+    def test_page_size_parameter_capped(self):
+        """页码分页接受 page_size 参数，超过上限时按上限返回"""
+        response = self.client.get(reverse('enrollment-list'), {'page': 2, 'page_size': 20})
+        self.assertEqual(response.data['count'], 25)
+        self.assertEqual(len(response.data['results']), 5)
+
+        create_students(120, 'KEYX')
+        response = self.client.get(reverse('student-list'), {'page_size': 1000})
+        self.assertEqual(len(response.data['results']), 100)
+
+    def test_invalid_cursor(self):
+        """无效游标返回404"""
+        response = self.client.get(reverse('enrollment-list'), {'cursor': 'not-a-cursor'})
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
@@ -0,0 +1,30 @@
+from io import StringIO
+
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.test import TestCase
+
+from course import query_plans
+from student.models import Student
+
+
+class QueryPlanTest(TestCase):
+    """
+    测试关键查询的执行计划检查：全部关键查询使用索引，无索引的查询被识别为全表扫描
+    """
+    def test_key_queries_use_indexes(self):
+        """关键查询都不在目标表上做全表扫描"""
+        out = StringIO()
+        call_command('check_query_plans', verbosity=2, stdout=out)
+        for name in query_plans.KEY_QUERIES:
+            self.assertIn(f'{name}: 使用索引', out.getvalue())
+
+    def test_full_scan_detected(self):
+        """按无索引的字段筛选时识别为全表扫描"""
+        plan = query_plans.explain(Student.objects.filter(age=20))
+        self.assertTrue(query_plans.full_scans(plan, Student._meta.db_table))
+
+    def test_unknown_query_name(self):
+        """未知的查询名称报错"""
+        with self.assertRaises(CommandError):
+            call_command('check_query_plans', 'missing', stdout=StringIO())
@@ -0,0 +1,112 @@
+from datetime import date
+from io import StringIO
+
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from course import response_cache
+from course.models import Classroom, Enrollment, TeachingAssignment
+from teacher.models import Teacher
+from user_auth.models import CustomUser
+
+from tests.test_enrollment_admission import create_course, create_students
+
+
+@override_settings(RESPONSE_CACHE_TTL={
+    'course-list': 60,
+    'course-search': 60,
+    'classroom-list': 60,
+    'schedule-list': 60,
+})
+class ResponseCacheTest(TestCase):
+    """
+    测试列表和搜索接口的响应缓存：命中时不查询数据，相关表写入后缓存失效
+    """
+    def setUp(self):
+        # 测试之间数据库回滚后表版本号会重复，需清空缓存
+        cache.clear()
+        self.client = APIClient()
+        self.user = CustomUser.objects.create_user(username='respcache', password='testpassword')
+        self.client.force_authenticate(user=self.user)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.course = create_course('CACHE001', 10)
+            self.student = create_students(1, 'CCH')[0]
+
+    def test_hit_skips_queries(self):
+        """第二次请求命中缓存，只读取表版本号"""
+        url = reverse('course-list')
+        self.assertEqual(self.client.get(url)['X-Cache'], 'MISS')
+        with self.assertNumQueries(1):
+            response = self.client.get(url)
+        self.assertEqual(response['X-Cache'], 'HIT')
+        self.assertEqual(response.data['results'][0]['code'], 'CACHE001')
+
+        # 查询参数顺序不同视为同一请求
+        search = reverse('course-search')
+        self.client.get(search, {'code': 'CACHE', 'semester': '2024-2025-1'})
+        response = self.client.get(f'{search}?semester=2024-2025-1&code=CACHE')
+        self.assertEqual(response['X-Cache'], 'HIT')
+
+        stats = response_cache.get_stats(['course-list', 'course-search'])
+        self.assertEqual(stats['course-list'], {'hit': 1, 'miss': 1})
+        self.assertEqual(stats['course-search'], {'hit': 1, 'miss': 1})
+        out = StringIO()
+        call_command('response_cache_stats', '--reset', stdout=out)
+        self.assertIn('course-list: 命中 1，未命中 1', out.getvalue())
+        self.assertEqual(response_cache.get_stats(['course-list'])['course-list'], {'hit': 0, 'miss': 0})
+
+    def test_writes_invalidate(self):
+        """选课、授课记录写入后课程列表重新生成"""
+        url = reverse('course-list')
+        self.client.get(url)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Enrollment.objects.create(student=self.student, course=self.course)
+        response = self.client.get(url)
+        self.assertEqual(response['X-Cache'], 'MISS')
+        self.assertEqual(response.data['results'][0]['current_students'], 1)
+
+        teacher = Teacher.objects.create(
+            name='缓存教师',
+            age=40,
+            gender='男',
+            title='教授',
+            department='测试学院',
+            email='cacheteacher@example.com',
+            phone='13800000000',
+            hire_date=date(2020, 1, 1),
+        )
+        with self.captureOnCommitCallbacks(execute=True):
+            TeachingAssignment.objects.create(teacher=teacher, course=self.course, teaching_hours=32)
+        response = self.client.get(url)
+        self.assertEqual(response['X-Cache'], 'MISS')
+        self.assertEqual(response.data['results'][0]['teachers'][0]['name'], '缓存教师')
+
+    def test_classroom_and_schedule_lists(self):
+        """教室写入使教室列表失效；排课列表独立缓存"""
+        url = reverse('classroom-list')
+        self.client.get(url)
+        self.assertEqual(self.client.get(url)['X-Cache'], 'HIT')
+        with self.captureOnCommitCallbacks(execute=True):
+            Classroom.objects.create(name='缓存教室', location='三号楼', capacity=20)
+        response = self.client.get(url)
+        self.assertEqual(response['X-Cache'], 'MISS')
+        self.assertEqual(response.data['count'], 1)
+
+        schedules = reverse('schedule-list')
+        self.assertEqual(self.client.get(schedules)['X-Cache'], 'MISS')
+        self.assertEqual(self.client.get(schedules)['X-Cache'], 'HIT')
+
+    def test_scope_and_ttl(self):
+        """管理员与普通用户分别缓存；有效期为0的操作不缓存"""
+        url = reverse('course-list')
+        self.client.get(url)
+        admin = CustomUser.objects.create_user(username='respadmin', password='testpassword', user_type='admin')
+        self.client.force_authenticate(user=admin)
+        self.assertEqual(self.client.get(url)['X-Cache'], 'MISS')
+
+        with self.settings(RESPONSE_CACHE_TTL={'course-list': 0}):
+            self.assertNotIn('X-Cache', self.client.get(url))
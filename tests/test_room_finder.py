@@ -0,0 +1,180 @@
+import random
+import time
+
+from django.core.cache import cache
+from django.db.models import Q
+from django.test import TestCase
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from course import occupancy, room_finder
+from course.models import Classroom, Course, Schedule, TeachingAssignment
+from user_auth.models import CustomUser
+
+from tests.test_enrollment_admission import create_course
+from tests.test_schedule_occupancy import create_teacher
+
+
+class RoomFinderTest(TestCase):
+    """
+    测试空闲教室查找：按占用位图排除被占用的教室、容量和设备筛选、best fit 排序
+    """
+    def setUp(self):
+        cache.clear()
+        room_finder.clear()
+        self.client = APIClient()
+        self.user = CustomUser.objects.create_user(username='roomfinder', password='testpassword')
+        self.client.force_authenticate(user=self.user)
+        self.large = Classroom.objects.create(name='A大教室', location='四号楼', capacity=120, equipment='投影仪，音响')
+        self.medium = Classroom.objects.create(name='B中教室', location='四号楼', capacity=60, equipment='投影仪、白板')
+        self.small = Classroom.objects.create(name='C小教室', location='四号楼', capacity=30, equipment=None)
+        self.assignment = TeachingAssignment.objects.create(
+            teacher=create_teacher('查找教师', 'rfteacher@example.com'), course=create_course('RF001', 30),
+            teaching_hours=32,
+        )
+        # 中教室周一第3-4节单周有课
+        Schedule.objects.create(
+            course_id=self.assignment.course_id, classroom=self.medium, teaching_assignment=self.assignment,
+            day_of_week=1, start_section=3, end_section=4, week_pattern='odd',
+        )
+
+    def _available(self, **params):
+        response = self.client.get(reverse('classroom-available'), params)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return [room['name'] for room in response.data]
+
+    def test_free_rooms(self):
+        """被占用的教室不返回；单周占用不影响双周查询；相邻节次共用一节时视为占用"""
+        slot = {'day_of_week': 1, 'start_section': 4, 'end_section': 5}
+        self.assertEqual(self._available(**slot), ['C小教室', 'A大教室'])
+        self.assertEqual(self._available(**slot, week_pattern='even'), ['C小教室', 'B中教室', 'A大教室'])
+        self.assertEqual(
+            self._available(day_of_week=1, start_section=5, end_section=6), ['C小教室', 'B中教室', 'A大教室']
+        )
+        self.assertEqual(
+            self._available(day_of_week=2, start_section=3, end_section=4), ['C小教室', 'B中教室', 'A大教室']
+        )
+
+    def test_capacity_equipment_and_ordering(self):
+        """最小容量按 best fit 排序，所需设备须全部具备"""
+        self.assertEqual(self._available(min_capacity=50), ['B中教室', 'A大教室'])
+        self.assertEqual(self._available(min_capacity=50, limit=1), ['B中教室'])
+        self.assertEqual(self._available(equipment='投影'), ['B中教室', 'A大教室'])
+        self.assertEqual(self._available(equipment='投影仪 音响'), ['A大教室'])
+        self.assertEqual(self._available(ordering='name', limit=2), ['A大教室', 'B中教室'])
+        self.assertEqual(
+            self._available(day_of_week=1, start_section=3, end_section=3, min_capacity=31, equipment='投影仪'),
+            ['A大教室'],
+        )
+
+    def test_index_refreshed_after_classroom_change(self):
+        """教室表写入提交后教室索引重建"""
+        self.assertEqual(self._available(min_capacity=100), ['A大教室'])
+        with self.captureOnCommitCallbacks(execute=True):
+            Classroom.objects.create(name='D新教室', location='四号楼', capacity=100)
+        self.assertEqual(self._available(min_capacity=100), ['D新教室', 'A大教室'])
+
+    def test_invalid_params(self):
+        """时段参数不完整或取值错误时返回400"""
+        url = reverse('classroom-available')
+        for params in (
+            {'day_of_week': 1},
+            {'day_of_week': 8, 'start_section': 1, 'end_section': 2},
+            {'day_of_week': 1, 'start_section': 3, 'end_section': 2},
+            {'week_pattern': 'weekly'},
+            {'ordering': 'random'},
+        ):
+            self.assertEqual(self.client.get(url, params).status_code, status.HTTP_400_BAD_REQUEST, params)
+
+
+class RoomFinderBenchmark(TestCase):
+    """
+    微基准：200间教室、3000条排课上的空闲教室查询，排课表子查询与占用位图加教室索引对比
+    """
+    ROOMS = 200
+    CHECKS = 300
+
+    @classmethod
+    def setUpTestData(cls):
+        rng = random.Random(5)
+        equipment = ('投影仪', '投影仪，音响', '白板', '投影仪、白板、音响', None)
+        cls.rooms = Classroom.objects.bulk_create([
+            Classroom(
+                name=f'基准教室{i:03d}', location='基准楼', capacity=rng.choice((30, 45, 60, 90, 120, 200)),
+                equipment=equipment[i % len(equipment)],
+            )
+            for i in range(cls.ROOMS)
+        ])
+        teacher = create_teacher('基准教师', 'rfbench@example.com')
+        courses = Course.objects.bulk_create([
+            Course(
+                name=f'基准课程{i}', code=f'RFB{i:04d}', credits=2, total_hours=32,
+                semester='2024-2025-1', teaching_method='offline', max_students=30,
+            )
+            for i in range(cls.ROOMS)
+        ])
+        assignments = TeachingAssignment.objects.bulk_create([
+            TeachingAssignment(teacher=teacher, course=course, teaching_hours=32) for course in courses
+        ])
+        # 每间教室一门课程，只关心教室占用，不关心教师冲突
+        schedules = []
+        for room, assignment in zip(cls.rooms, assignments):
+            for day in range(1, 6):
+                for start in rng.sample((1, 3, 5, 7, 9, 11), 3):
+                    schedules.append(Schedule(
+                        course_id=assignment.course_id, classroom=room, teaching_assignment=assignment,
+                        day_of_week=day, start_section=start, end_section=start + 1,
+                        week_pattern=rng.choice(('all', 'all', 'odd', 'even')),
+                    ))
+        Schedule.objects.bulk_create(schedules)
+        occupancy.rebuild()
+
+    def setUp(self):
+        room_finder.clear()
+
+    def _schedule_query(self, day_of_week, start_section, end_section, week_pattern, min_capacity, equipment):
+        """在排课表上做区间重叠子查询，排除被占用的教室"""
+        overlapping = (
+            Q(start_section__lte=start_section) & Q(end_section__gte=start_section) |
+            Q(start_section__lte=end_section) & Q(end_section__gte=end_section) |
+            Q(start_section__gte=start_section) & Q(end_section__lte=end_section)
+        )
+        patterns = ['all', 'odd', 'even'] if week_pattern == 'all' else ['all', week_pattern]
+        busy = Schedule.objects.filter(
+            overlapping, day_of_week=day_of_week, week_pattern__in=patterns
+        ).values('classroom_id')
+        queryset = Classroom.objects.filter(capacity__gte=min_capacity).exclude(id__in=busy)
+        for item in equipment:
+            queryset = queryset.filter(equipment__icontains=item)
+        return list(queryset.order_by('capacity', 'id').values_list('name', flat=True))
+
+    def test_index_matches_schedule_query(self):
+        """两种方式结果相同；教室索引建好后每次查询只读取版本号和占用位图两次（耗时只打印，不作断言）"""
+        rng = random.Random(9)
+        probes = []
+        for _ in range(self.CHECKS):
+            start = rng.randint(1, 11)
+            probes.append((
+                rng.randint(1, 5), start, start + rng.randint(0, 2), rng.choice(('all', 'odd', 'even')),
+                rng.choice((0, 40, 80, 150)), rng.choice(([], ['投影仪'], ['白板', '音响'])),
+            ))
+
+        started = time.perf_counter()
+        expected = [self._schedule_query(*probe) for probe in probes]
+        query_time = time.perf_counter() - started
+
+        started = time.perf_counter()
+        actual = [
+            [room['name'] for room in room_finder.find(*probe[:4], min_capacity=probe[4], equipment=probe[5])]
+            for probe in probes
+        ]
+        index_time = time.perf_counter() - started
+
+        print(
+            f'\n[空闲教室查询] {self.CHECKS} 次：排课表子查询 {query_time * 1000:.0f}ms，'
+            f'占用位图加教室索引 {index_time * 1000:.0f}ms，加速 {query_time / index_time:.1f}x'
+        )
+        self.assertEqual(actual, expected)
+        with self.assertNumQueries(2):
+            room_finder.find(*probes[0][:4], min_capacity=probes[0][4], equipment=probes[0][5])
@@ -0,0 +1,228 @@
+import time
+
+from django.core.cache import cache
+from django.test import TestCase
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from course import occupancy, schedule_import
+from course.models import Classroom, Course, Schedule, TeachingAssignment
+from user_auth.models import CustomUser
+
+from tests.test_enrollment_admission import create_course
+from tests.test_schedule_occupancy import create_teacher
+
+
+class ScheduleImportTest(TestCase):
+    """
+    测试排课批量导入：扫描线冲突检查、冲突报告、CSV 导入、写入后维护占用位图
+    """
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.user = CustomUser.objects.create_user(username='importer', password='testpassword')
+        self.client.force_authenticate(user=self.user)
+        self.teacher = create_teacher('导入教师', 'impteacher@example.com')
+        self.other_teacher = create_teacher('导入教师2', 'impteacher2@example.com')
+        self.assignment = TeachingAssignment.objects.create(
+            teacher=self.teacher, course=create_course('IMP001', 30), teaching_hours=32
+        )
+        # 同一教师的第二门课
+        self.second_assignment = TeachingAssignment.objects.create(
+            teacher=self.teacher, course=create_course('IMP002', 30), teaching_hours=32
+        )
+        self.other_assignment = TeachingAssignment.objects.create(
+            teacher=self.other_teacher, course=create_course('IMP003', 30), teaching_hours=32
+        )
+        self.room = Classroom.objects.create(name='导入教室1', location='二号楼', capacity=60)
+        self.other_room = Classroom.objects.create(name='导入教室2', location='二号楼', capacity=80)
+        self.url = reverse('schedule-bulk')
+
+    def _row(self, classroom, assignment, start, end, week_pattern='all', day=1):
+        return {
+            'course': assignment.course_id,
+            'classroom': classroom.id,
+            'teaching_assignment': assignment.id,
+            'day_of_week': day,
+            'start_section': start,
+            'end_section': end,
+            'week_pattern': week_pattern,
+        }
+
+    def _import(self, rows):
+        return self.client.post(self.url, {'schedules': rows}, format='json')
+
+    def test_sweep(self):
+        """闭区间端点相接视为重叠，单双周互不冲突，每周与单双周都冲突"""
+        pairs = schedule_import.sweep([
+            (1, 2, 'all', 'a'),
+            (2, 3, 'odd', 'b'),
+            (3, 4, 'even', 'c'),
+            (5, 6, 'odd', 'd'),
+            (5, 6, 'even', 'e'),
+        ])
+        self.assertEqual(pairs, {('a', 'b')})
+        self.assertEqual(schedule_import.sweep([(1, 4, 'all', 'a'), (2, 3, 'all', 'b')]), {('a', 'b')})
+
+    def test_import_and_conflict_report(self):
+        """批次内部冲突按提交顺序处理，其余行写入并维护占用位图"""
+        existing = Schedule.objects.create(
+            course_id=self.other_assignment.course_id, classroom=self.other_room,
+            teaching_assignment=self.other_assignment, day_of_week=2, start_section=1, end_section=2,
+        )
+        updated_at = Course.objects.get(pk=self.assignment.course_id).updated_at
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self._import([
+                self._row(self.room, self.assignment, 1, 2),
+                # 同一教室重叠
+                self._row(self.room, self.other_assignment, 2, 3),
+                # 同一教师的另一门课在另一间教室同时上课
+                self._row(self.other_room, self.second_assignment, 1, 2),
+                # 单双周错开
+                self._row(self.other_room, self.other_assignment, 5, 6, 'odd'),
+                self._row(self.other_room, self.second_assignment, 5, 6, 'even'),
+                # 与已有排课冲突
+                self._row(self.other_room, self.assignment, 2, 3, day=2),
+                # 取值错误
+                self._row(self.room, self.assignment, 4, 3),
+            ])
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['created_count'], 3)
+        self.assertEqual(response.data['failed_count'], 4)
+        results = response.data['results']
+        self.assertEqual([row['status'] for row in results], [
+            'created', 'failed', 'failed', 'created', 'created', 'failed', 'failed',
+        ])
+        self.assertEqual(results[1]['error'], '该教室在该时间段已有排课')
+        self.assertEqual(results[1]['conflicts'], [{'resource': occupancy.CLASSROOM, 'row': 0}])
+        self.assertEqual(results[2]['error'], '该教师在该时间段已有排课')
+        self.assertEqual(results[2]['conflicts'], [{'resource': occupancy.TEACHER, 'row': 0}])
+        self.assertEqual(results[5]['conflicts'], [{'resource': occupancy.CLASSROOM, 'schedule': existing.id}])
+        self.assertEqual(results[6]['error'], schedule_import.SECTION_ORDER)
+
+        self.assertEqual(Schedule.objects.count(), 4)
+        self.assertTrue(Schedule.objects.filter(pk=results[0]['id'], classroom=self.room).exists())
+        masks = occupancy.get_masks([
+            (occupancy.CLASSROOM, self.other_room.id, 1),
+            (occupancy.TEACHER, self.teacher.id, 1),
+        ])
+        self.assertEqual(masks[(occupancy.CLASSROOM, self.other_room.id, 1)], occupancy.slot_mask(5, 6, 'all'))
+        self.assertEqual(
+            masks[(occupancy.TEACHER, self.teacher.id, 1)],
+            occupancy.slot_mask(1, 2, 'all') | occupancy.slot_mask(5, 6, 'even'),
+        )
+        # 线下课程的容量按教室容量设置，同时刷新课程的更新时间
+        course = Course.objects.get(pk=self.assignment.course_id)
+        self.assertEqual(course.max_students, 60)
+        self.assertGreater(course.updated_at, updated_at)
+
+        # 导入后单条排课的冲突检查看到新写入的排课
+        response = self.client.post(reverse('schedule-list'), self._row(self.room, self.other_assignment, 2, 3))
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_csv_import(self):
+        """CSV 请求体首行为列名，未填写的上课周模式按每周处理"""
+        lines = [','.join(schedule_import.CSV_COLUMNS)]
+        lines.append(f'{self.assignment.course_id},{self.room.id},{self.assignment.id},3,1,2,')
+        lines.append(f'{self.other_assignment.course_id},{self.room.id},{self.other_assignment.id},3,2,4,odd')
+        response = self.client.post(self.url, '\n'.join(lines), content_type='text/csv')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([row['status'] for row in response.data['results']], ['created', 'failed'])
+        self.assertEqual(Schedule.objects.get(pk=response.data['results'][0]['id']).week_pattern, 'all')
+
+        response = self.client.post(self.url, 'course,classroom\n1,2', content_type='text/csv')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_invalid_payload(self):
+        """字段类型错误或空批次整批拒绝"""
+        self.assertEqual(self._import([]).status_code, status.HTTP_400_BAD_REQUEST)
+        row = self._row(self.room, self.assignment, 1, 2)
+        row['week_pattern'] = 'weekly'
+        self.assertEqual(self._import([row]).status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertFalse(Schedule.objects.exists())
+
+
+class ScheduleImportBenchmark(TestCase):
+    """
+    微基准：逐条提交排课与批量导入对比
+    """
+    ROOMS = 10
+    SLOTS = (1, 3, 5, 7, 9)
+    DAYS = 5
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = CustomUser.objects.create_user(username='importbench', password='testpassword')
+        cls.assignments = []
+        for i in range(cls.ROOMS * 2):
+            teacher = create_teacher(f'基准教师{i}', f'impbench{i}@example.com')
+            cls.assignments.append(TeachingAssignment.objects.create(
+                teacher=teacher, course=create_course(f'IMPB{i:03d}', 30), teaching_hours=32
+            ))
+        cls.rooms = Classroom.objects.bulk_create([
+            Classroom(name=f'基准教室{i}', location='基准楼', capacity=50) for i in range(cls.ROOMS)
+        ])
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+
+    def _rows(self, assignments):
+        """每间教室每天5个时段，两位教师轮流上课，互不冲突"""
+        rows = []
+        for i, room in enumerate(self.rooms):
+            for day in range(1, self.DAYS + 1):
+                for j, start in enumerate(self.SLOTS):
+                    assignment = assignments[i * 2 + j % 2]
+                    rows.append({
+                        'course': assignment.course_id,
+                        'classroom': room.id,
+                        'teaching_assignment': assignment.id,
+                        'day_of_week': day,
+                        'start_section': start,
+                        'end_section': start + 1,
+                        'week_pattern': 'all',
+                    })
+        return rows
+
+    def test_bulk_faster(self):
+        """两种方式写入相同的排课和占用位图，批量导入更快"""
+        rows = self._rows(self.assignments)
+
+        started = time.perf_counter()
+        for row in rows:
+            response = self.client.post(reverse('schedule-list'), row)
+            self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        single_time = time.perf_counter() - started
+        expected = sorted(Schedule.objects.values_list(
+            'classroom_id', 'teaching_assignment_id', 'day_of_week', 'start_section', 'end_section', 'week_pattern'
+        ))
+        expected_masks = occupancy.get_masks(self._cells(rows))
+        Schedule.objects.all().delete()
+
+        started = time.perf_counter()
+        response = self.client.post(reverse('schedule-bulk'), {'schedules': rows}, format='json')
+        bulk_time = time.perf_counter() - started
+
+        print(
+            f'\n[排课导入] {len(rows)} 条：逐条提交 {single_time * 1000:.0f}ms，'
+            f'批量导入 {bulk_time * 1000:.0f}ms，加速 {single_time / bulk_time:.1f}x'
+        )
+        self.assertEqual(response.data['created_count'], len(rows))
+        self.assertEqual(sorted(Schedule.objects.values_list(
+            'classroom_id', 'teaching_assignment_id', 'day_of_week', 'start_section', 'end_section', 'week_pattern'
+        )), expected)
+        self.assertEqual(occupancy.get_masks(self._cells(rows)), expected_masks)
+        self.assertLess(bulk_time, single_time)
+
+    def _cells(self, rows):
+        assignments = {assignment.id: assignment.teacher_id for assignment in self.assignments}
+        return [
+            cell
+            for row in rows
+            for cell in occupancy.schedule_cells(
+                row['classroom'], assignments[row['teaching_assignment']], row['day_of_week']
+            )
+        ]
@@ -0,0 +1,297 @@
+import random
+import time
+from datetime import date
+from io import StringIO
+
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db.models import Q
+from django.test import TestCase
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from course import occupancy
+from course.models import Classroom, Course, Schedule, ScheduleOccupancy, TeachingAssignment
+from teacher.models import Teacher
+from user_auth.models import CustomUser
+
+from tests.test_enrollment_admission import create_course
+
+
+def create_teacher(name, email):
+    """创建测试教师及其用户账号"""
+    return Teacher.objects.create(
+        user=CustomUser.objects.create_user(username=email.split('@')[0], password='testpassword'),
+        name=name,
+        age=40,
+        gender='男',
+        title='讲师',
+        department='测试学院',
+        email=email,
+        phone='13800000000',
+        hire_date=date(2020, 1, 1),
+    )
+
+
+class ScheduleOccupancyTest(TestCase):
+    """
+    测试排课占用位图：单双周重叠判断、随排课写入维护、冲突检查
+    """
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.user = CustomUser.objects.create_user(username='occupancy', password='testpassword')
+        self.client.force_authenticate(user=self.user)
+        self.course = create_course('OCC001', 30)
+        self.teacher = create_teacher('位图教师', 'occteacher@example.com')
+        self.assignment = TeachingAssignment.objects.create(teacher=self.teacher, course=self.course, teaching_hours=32)
+        self.room = Classroom.objects.create(name='位图教室1', location='一号楼', capacity=40)
+        self.other_room = Classroom.objects.create(name='位图教室2', location='一号楼', capacity=40)
+        other_course = create_course('OCC002', 30)
+        self.other_assignment = TeachingAssignment.objects.create(
+            teacher=create_teacher('其他教师', 'occteacher2@example.com'),
+            course=other_course,
+            teaching_hours=32,
+        )
+
+    def _post(self, classroom, assignment, start, end, week_pattern='all', day=1):
+        return self.client.post(reverse('schedule-list'), {
+            'course': assignment.course_id,
+            'classroom': classroom.id,
+            'teaching_assignment': assignment.id,
+            'day_of_week': day,
+            'start_section': start,
+            'end_section': end,
+            'week_pattern': week_pattern,
+        })
+
+    def _mask(self, resource_type, resource_id, day=1):
+        return occupancy.get_masks([(resource_type, resource_id, day)])[(resource_type, resource_id, day)]
+
+    def test_slot_mask(self):
+        """每节两位，每周占用单双周两位"""
+        self.assertEqual(occupancy.slot_mask(1, 2, 'all'), 0b1111)
+        self.assertEqual(occupancy.slot_mask(2, 3, 'odd'), 0b010100)
+        self.assertEqual(occupancy.slot_mask(1, 1, 'even'), 0b10)
+        self.assertFalse(occupancy.slot_mask(1, 4, 'odd') & occupancy.slot_mask(1, 4, 'even'))
+        self.assertTrue(occupancy.slot_mask(1, 4, 'all') & occupancy.slot_mask(3, 3, 'even'))
+
+    def test_week_pattern_overlap(self):
+        """每周与单周冲突，单周与双周不冲突；相邻节次共用一节时冲突"""
+        self.assertEqual(self._post(self.room, self.assignment, 1, 2, 'odd').status_code, status.HTTP_201_CREATED)
+        self.assertEqual(
+            self._post(self.room, self.other_assignment, 1, 2, 'even').status_code, status.HTTP_201_CREATED
+        )
+        response = self._post(self.other_room, self.assignment, 2, 3, 'all')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('该教师在该时间段已有排课', str(response.data))
+        response = self._post(self.room, self.other_assignment, 2, 4, 'odd')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('该教室在该时间段已有排课', str(response.data))
+        self.assertEqual(self._post(self.room, self.assignment, 3, 4, 'all').status_code, status.HTTP_201_CREATED)
+        self.assertEqual(
+            self._post(self.room, self.assignment, 1, 1, 'all', day=32).status_code, status.HTTP_400_BAD_REQUEST
+        )
+        self.assertEqual(
+            self._post(self.room, self.assignment, 1, occupancy.MAX_SECTION + 1).status_code,
+            status.HTTP_400_BAD_REQUEST,
+        )
+
+    def test_maintained_on_update_and_delete(self):
+        """修改排课时扣除自身占用并重算原位置，删除后释放占用"""
+        response = self._post(self.room, self.assignment, 1, 2)
+        schedule_id = response.data['id']
+        self.assertEqual(self._mask(occupancy.CLASSROOM, self.room.id), 0b1111)
+
+        # 原地调整节次不与自身冲突
+        response = self.client.patch(
+            reverse('schedule-detail', args=[schedule_id]), {'start_section': 2, 'end_section': 3}
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(self._mask(occupancy.CLASSROOM, self.room.id), 0b111100)
+
+        # 换到另一天后原位置的占用清空
+        response = self.client.patch(reverse('schedule-detail', args=[schedule_id]), {'day_of_week': 2})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(self._mask(occupancy.CLASSROOM, self.room.id), 0)
+        self.assertEqual(self._mask(occupancy.TEACHER, self.teacher.id, day=2), 0b111100)
+
+        self.client.delete(reverse('schedule-detail', args=[schedule_id]))
+        self.assertFalse(ScheduleOccupancy.objects.filter(mask__gt=0).exists())
+
+    def test_teacher_wide_conflicts(self):
+        """同一教师的不同授课记录不能排在同一时段；更换授课教师后位图随之转移"""
+        second_course = create_course('OCC003', 30)
+        second_assignment = TeachingAssignment.objects.create(
+            teacher=self.teacher, course=second_course, teaching_hours=32
+        )
+        self.assertEqual(self._post(self.room, self.assignment, 1, 2).status_code, status.HTTP_201_CREATED)
+        response = self._post(self.other_room, second_assignment, 2, 3)
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('该教师在该时间段已有排课', str(response.data))
+        self.assertEqual(self._post(self.other_room, second_assignment, 3, 4).status_code, status.HTTP_201_CREATED)
+        self.assertEqual(self._mask(occupancy.TEACHER, self.teacher.id), occupancy.slot_mask(1, 4, 'all'))
+
+        other_teacher = self.other_assignment.teacher
+        second_assignment.teacher = other_teacher
+        second_assignment.save()
+        self.assertEqual(self._mask(occupancy.TEACHER, self.teacher.id), occupancy.slot_mask(1, 2, 'all'))
+        self.assertEqual(self._mask(occupancy.TEACHER, other_teacher.id), occupancy.slot_mask(3, 4, 'all'))
+
+    def test_teacher_change_rejected_on_conflict(self):
+        """更换授课教师时，授课记录的排课与新教师已有排课冲突则拒绝"""
+        self._post(self.room, self.assignment, 1, 2)
+        other_schedule = self._post(self.other_room, self.other_assignment, 2, 3, 'odd').data['id']
+        url = reverse('teachingassignment-detail', args=[self.assignment.id])
+        new_teacher_id = self.other_assignment.teacher_id
+        data = {
+            'teacher': new_teacher_id, 'teacher_id': new_teacher_id,
+            'course': self.course.id, 'course_id': self.course.id, 'teaching_hours': 32,
+        }
+
+        response = self.client.put(url, data)
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('teacher_id', response.data)
+        self.assertEqual(TeachingAssignment.objects.get(pk=self.assignment.id).teacher_id, self.teacher.id)
+        self.assertEqual(self._mask(occupancy.TEACHER, self.teacher.id), occupancy.slot_mask(1, 2, 'all'))
+
+        # 错开到不冲突的时段后可以更换
+        self.client.patch(reverse('schedule-detail', args=[other_schedule]), {'start_section': 3, 'end_section': 4})
+        response = self.client.put(url, data)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            self._mask(occupancy.TEACHER, self.other_assignment.teacher_id),
+            occupancy.slot_mask(1, 2, 'all') | occupancy.slot_mask(3, 4, 'odd'),
+        )
+
+    def test_locked_update_check(self):
+        """视图更新排课时在锁定的位图上复查冲突"""
+        first = self._post(self.room, self.assignment, 1, 2).data['id']
+        self._post(self.other_room, self.other_assignment, 3, 4)
+        response = self.client.patch(
+            reverse('schedule-detail', args=[first]), {'classroom': self.other_room.id, 'start_section': 3, 'end_section': 4}
+        )
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        response = self.client.put(reverse('schedule-detail', args=[first]), {
+            'course': self.course.id,
+            'classroom': self.room.id,
+            'teaching_assignment': self.assignment.id,
+            'day_of_week': 1,
+            'start_section': 3,
+            'end_section': 5,
+            'week_pattern': 'all',
+        })
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(self._mask(occupancy.CLASSROOM, self.room.id), occupancy.slot_mask(3, 5, 'all'))
+
+    def test_rebuild_command(self):
+        """批量导入后重建占用位图"""
+        Schedule.objects.bulk_create([
+            Schedule(
+                course=self.course, classroom=self.room, teaching_assignment=self.assignment,
+                day_of_week=3, start_section=5, end_section=6, week_pattern='even',
+            ),
+        ])
+        self.assertEqual(self._mask(occupancy.CLASSROOM, self.room.id, day=3), 0)
+        call_command('rebuild_schedule_occupancy', stdout=StringIO())
+        self.assertEqual(self._mask(occupancy.CLASSROOM, self.room.id, day=3), occupancy.slot_mask(5, 6, 'even'))
+        self.assertEqual(
+            occupancy.find_conflicts(self.other_room.id, self.teacher.id, 3, 6, 7, 'all'),
+            [occupancy.TEACHER],
+        )
+
+
+class ScheduleOccupancyBenchmark(TestCase):
+    """
+    微基准：3000 条排课上的冲突检查，区间重叠查询（教师维度需关联授课记录）与占用位图对比
+    """
+    ROOMS = 100
+    COURSES_PER_TEACHER = 3
+    DAYS = 5
+    CHECKS = 1000
+
+    @classmethod
+    def setUpTestData(cls):
+        users = CustomUser.objects.bulk_create([
+            CustomUser(username=f'occbench{i}', password='!') for i in range(cls.ROOMS)
+        ])
+        cls.teachers = Teacher.objects.bulk_create([
+            Teacher(
+                user=user, name=f'基准教师{i}', age=40, gender='男', title='讲师', department='测试学院',
+                email=f'occbench{i}@example.com', phone='13800000000', hire_date=date(2020, 1, 1),
+            )
+            for i, user in enumerate(users)
+        ])
+        courses = Course.objects.bulk_create([
+            Course(
+                name=f'基准课程{i}', code=f'OCCB{i:04d}', credits=2, total_hours=32,
+                semester='2024-2025-1', teaching_method='offline', max_students=30,
+            )
+            for i in range(cls.ROOMS * cls.COURSES_PER_TEACHER)
+        ])
+        assignments = TeachingAssignment.objects.bulk_create([
+            TeachingAssignment(teacher=teacher, course=course, teaching_hours=32)
+            for i, teacher in enumerate(cls.teachers)
+            for course in courses[i * cls.COURSES_PER_TEACHER:(i + 1) * cls.COURSES_PER_TEACHER]
+        ])
+        cls.rooms = Classroom.objects.bulk_create([
+            Classroom(name=f'基准教室{i}', location='基准楼', capacity=50) for i in range(cls.ROOMS)
+        ])
+        # 每位教师固定在一间教室上课，每天6个时段轮流安排其3门课
+        schedules = []
+        for i, room in enumerate(cls.rooms):
+            teacher_assignments = assignments[i * cls.COURSES_PER_TEACHER:(i + 1) * cls.COURSES_PER_TEACHER]
+            for day in range(1, cls.DAYS + 1):
+                for j, start in enumerate((1, 3, 5, 7, 9, 11)):
+                    assignment = teacher_assignments[j % cls.COURSES_PER_TEACHER]
+                    schedules.append(Schedule(
+                        course_id=assignment.course_id, classroom=room, teaching_assignment=assignment,
+                        day_of_week=day, start_section=start, end_section=start + 1, week_pattern='all',
+                    ))
+        Schedule.objects.bulk_create(schedules)
+        occupancy.rebuild()
+
+    def _overlap_query(self, room_id, teacher_id, day, start, end, week_pattern):
+        """区间重叠检查：教室和教师各一条三分支 OR 查询，教师维度关联其全部授课记录"""
+        time_query = (
+            Q(start_section__lte=start) & Q(end_section__gte=start) |
+            Q(start_section__lte=end) & Q(end_section__gte=end) |
+            Q(start_section__gte=start) & Q(end_section__lte=end)
+        )
+        conflicts = []
+        for resource, field, resource_id in (
+            (occupancy.CLASSROOM, 'classroom', room_id),
+            (occupancy.TEACHER, 'teaching_assignment__teacher', teacher_id),
+        ):
+            query = Q(**{field: resource_id}) & Q(day_of_week=day) & Q(week_pattern=week_pattern)
+            if Schedule.objects.filter(query & time_query).exists():
+                conflicts.append(resource)
+        return conflicts
+
+    def test_bitmap_matches_overlap_query(self):
+        """两种方式结果相同；占用位图的一次检查只读取一次位图（耗时只打印，不作断言）"""
+        rng = random.Random(7)
+        probes = []
+        for _ in range(self.CHECKS):
+            start = rng.randint(1, 13)
+            probes.append((
+                rng.choice(self.rooms).id, rng.choice(self.teachers).id,
+                rng.randint(1, 7), start, start + rng.randint(0, 2), 'all',
+            ))
+
+        started = time.perf_counter()
+        expected = [self._overlap_query(*probe) for probe in probes]
+        query_time = time.perf_counter() - started
+
+        started = time.perf_counter()
+        actual = [occupancy.find_conflicts(*probe) for probe in probes]
+        bitmap_time = time.perf_counter() - started
+
+        print(
+            f'\n[排课冲突检查] {self.CHECKS} 次：区间查询 {query_time * 1000:.0f}ms，'
+            f'占用位图 {bitmap_time * 1000:.0f}ms，加速 {query_time / bitmap_time:.1f}x'
+        )
+        self.assertEqual(actual, expected)
+        with self.assertNumQueries(1):
+            occupancy.find_conflicts(*probes[0])
@@ -0,0 +1,155 @@
+from datetime import timedelta
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from course.models import Course, Enrollment, SeatHold, Waitlist
+from student.models import Student
+from user_auth.models import CustomUser
+
+
+@override_settings(SEAT_HOLD_TTL_SECONDS=300)
+class SeatHoldTest(TestCase):
+    """
+    测试座位预留：预留占用名额、确认转为选课、过期后按需回收和定期回收
+    """
+    def setUp(self):
+        self.client = APIClient()
+        self.user = CustomUser.objects.create_user(username='seathold', password='testpassword')
+        self.client.force_authenticate(user=self.user)
+        self.course = Course.objects.create(
+            name='预留测试课程',
+            code='HOLD001',
+            credits=2,
+            total_hours=32,
+            semester='2024-2025-1',
+            teaching_method='offline',
+            max_students=2,
+        )
+        self.students = [
+            Student.objects.create(
+                name=f'预留学生{i}',
+                age=20,
+                gender='男',
+                class_name='预留班',
+                student_id=f'HOLD{i:03d}',
+                college='测试学院',
+                major='测试专业',
+                email=f'hold{i}@example.com',
+            )
+            for i in range(4)
+        ]
+
+    def _hold(self, student):
+        data = {'student': student.id, 'course': self.course.id}
+        return self.client.post(reverse('seathold-list'), data, format='json')
+
+    def _enroll(self, student):
+        data = {'student': student.id, 'course': self.course.id}
+        return self.client.post(reverse('enrollment-list'), data, format='json')
+
+    def _expire_all(self):
+        SeatHold.objects.update(expires_at=timezone.now() - timedelta(seconds=1))
+
+    def _counts(self):
+        return Course.objects.values_list('enrolled_count', 'held_count').get(pk=self.course.pk)
+
+    def test_holds_count_against_capacity(self):
+        """有效预留占用名额，重复预留和超出容量的预留及选课都会被拒绝"""
+        self.assertEqual(self._hold(self.students[0]).status_code, status.HTTP_201_CREATED)
+        self.assertEqual(self._hold(self.students[0]).status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(self._enroll(self.students[1]).status_code, status.HTTP_201_CREATED)
+
+        self.assertEqual(self._hold(self.students[2]).status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(self._enroll(self.students[2]).status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(self._counts(), (1, 1))
+
+        response = self.client.get(reverse('course-current-status', args=[self.course.id]))
+        self.assertEqual(response.data['held_seats'], 1)
+        self.assertTrue(response.data['is_full'])
+
+    def test_confirm_moves_seat_to_enrollment(self):
+        """确认预留后名额从预留人数转到已选人数"""
+        hold_id = self._hold(self.students[0]).data['id']
+
+        response = self.client.post(reverse('seathold-confirm', args=[hold_id]))
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertTrue(Enrollment.objects.filter(student=self.students[0], course=self.course).exists())
+        self.assertFalse(SeatHold.objects.exists())
+        self.assertEqual(self._counts(), (1, 0))
+
+        # 预留已被确认，再次确认返回错误
+        response = self.client.post(reverse('seathold-confirm', args=[hold_id]))
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_release_frees_seat(self):
+        """放弃预留后名额立即释放"""
+        hold_id = self._hold(self.students[0]).data['id']
+        response = self.client.delete(reverse('seathold-detail', args=[hold_id]))
+        self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
+        self.assertEqual(self._counts(), (0, 0))
+
+    def test_expired_holds_reclaimed_on_read(self):
+        """名额被过期预留占满时，选课请求按需回收过期预留"""
+        self._hold(self.students[0])
+        self._hold(self.students[1])
+        self._expire_all()
+
+        self.assertEqual(self._enroll(self.students[2]).status_code, status.HTTP_201_CREATED)
+        self.assertEqual(self._counts(), (1, 0))
+        self.assertFalse(SeatHold.objects.exists())
+
+    def test_reclaimed_seats_go_to_waitlist_first(self):
+        """回收的过期预留名额先转给候补学生，后来的选课请求不能越过候补名单"""
+        for mode in ('locking', 'conditional'):
+            with self.subTest(mode=mode), override_settings(ENROLLMENT_ADMISSION_MODE=mode):
+                Enrollment.objects.all().delete()
+                self._hold(self.students[0])
+                self._enroll(self.students[1])
+                response = self.client.post(
+                    reverse('course-waitlist', args=[self.course.id]), {'student': self.students[2].id}, format='json'
+                )
+                self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+                self._expire_all()
+
+                self.assertEqual(self._enroll(self.students[3]).status_code, status.HTTP_400_BAD_REQUEST)
+                self.assertEqual(
+                    set(Enrollment.objects.values_list('student_id', flat=True)),
+                    {self.students[1].id, self.students[2].id},
+                )
+                self.assertFalse(Waitlist.objects.exists())
+                self.assertEqual(self._counts(), (2, 0))
+
+    def test_expired_hold_cannot_be_confirmed(self):
+        """过期预留确认失败，且名额被回收"""
+        hold_id = self._hold(self.students[0]).data['id']
+        self._expire_all()
+
+        response = self.client.post(reverse('seathold-confirm', args=[hold_id]))
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(self._counts(), (0, 0))
+        self.assertFalse(Enrollment.objects.exists())
+
+        # 同一学生可以重新预留
+        self.assertEqual(self._hold(self.students[0]).status_code, status.HTTP_201_CREATED)
+
+    def test_sweeper_reclaims_only_expired_holds(self):
+        """定期回收命令只回收过期预留"""
+        self._hold(self.students[0])
+        self._expire_all()
+        self._hold(self.students[1])
+
+        call_command('sweep_seat_holds', '--chunk-size', '1', stdout=StringIO())
+        self.assertEqual(self._counts(), (0, 1))
+        self.assertEqual(list(SeatHold.objects.values_list('student_id', flat=True)), [self.students[1].id])
+
+    def test_deleting_student_releases_hold(self):
+        """删除学生时释放其座位预留"""
+        self._hold(self.students[0])
+        self.students[0].delete()
+        self.assertEqual(self._counts(), (0, 0))
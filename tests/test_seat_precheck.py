@@ -0,0 +1,88 @@
+import os
+import tempfile
+import time
+import unittest
+
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from course import seat_precheck
+from course.models import Course, Enrollment
+from user_auth.models import CustomUser
+
+from tests.test_enrollment_admission import create_course, create_students
+
+
+@unittest.skipIf(seat_precheck.fcntl is None, '当前平台没有 fcntl，座位预检查不可用')
+class SeatPrecheckTest(TestCase):
+    """
+    测试选课座位预检查：已满课程在访问数据库前被拒绝，释放名额后条目失效
+    """
+    def setUp(self):
+        handle, self.path = tempfile.mkstemp(suffix='.bin')
+        os.close(handle)
+        self.settings_override = override_settings(
+            SEAT_PRECHECK_ENABLED=True,
+            SEAT_PRECHECK_PATH=self.path,
+            SEAT_PRECHECK_SLOTS=64,
+            SEAT_PRECHECK_TTL_SECONDS=60,
+        )
+        self.settings_override.enable()
+        self.addCleanup(self.settings_override.disable)
+        self.addCleanup(os.remove, self.path)
+
+        self.client = APIClient()
+        self.user = CustomUser.objects.create_user(username='precheck', password='testpassword')
+        self.client.force_authenticate(user=self.user)
+        self.course = create_course('PRE001', 1)
+        self.students = create_students(3, 'PRE')
+
+    def _enroll(self, student):
+        data = {'student': student.id, 'course': self.course.id}
+        return self.client.post(reverse('enrollment-list'), data, format='json')
+
+    def test_full_course_rejected_without_queries(self):
+        """课程满员被数据库确认后，后续请求不再访问数据库"""
+        self.assertEqual(self._enroll(self.students[0]).status_code, status.HTTP_201_CREATED)
+        self.assertEqual(self._enroll(self.students[1]).status_code, status.HTTP_400_BAD_REQUEST)
+
+        with self.assertNumQueries(0):
+            response = self._enroll(self.students[2])
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_release_invalidates_entry(self):
+        """退课释放名额后条目失效，新的选课请求进入数据库"""
+        enrollment = Enrollment.objects.create(student=self.students[0], course=self.course)
+        self.assertEqual(self._enroll(self.students[1]).status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertTrue(seat_precheck.is_definitely_full(self.course.id))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            enrollment.delete()
+        self.assertFalse(seat_precheck.is_definitely_full(self.course.id))
+        self.assertEqual(self._enroll(self.students[1]).status_code, status.HTTP_201_CREATED)
+
+    def test_capacity_change_invalidates_entry(self):
+        """调整课程人数上限后条目失效"""
+        Enrollment.objects.create(student=self.students[0], course=self.course)
+        self._enroll(self.students[1])
+
+        course = Course.objects.get(pk=self.course.pk)
+        course.max_students = 2
+        with self.captureOnCommitCallbacks(execute=True):
+            course.save()
+        self.assertEqual(self._enroll(self.students[1]).status_code, status.HTTP_201_CREATED)
+
+    def test_entries_shared_and_expire(self):
+        """同一文件的不同映射（模拟不同工作进程）看到相同条目，过期条目不用于拒绝"""
+        other = seat_precheck.SeatTable(self.path, 64)
+        self.addCleanup(other.close)
+
+        other.write(self.course.id, 10, 10, time.time())
+        self.assertTrue(seat_precheck.is_definitely_full(self.course.id))
+        # 取模后落在同一位置的其他课程不会误用该条目
+        self.assertFalse(seat_precheck.is_definitely_full(self.course.id + 64))
+
+        other.write(self.course.id, 10, 10, time.time() - 120)
+        self.assertFalse(seat_precheck.is_definitely_full(self.course.id))
@@ -0,0 +1,149 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+from io import StringIO
+from unittest import mock
+
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase, TransactionTestCase, override_settings, skipUnlessDBFeature
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from course.models import Course, CourseSeatSlot, Enrollment
+from course.seat_slots import get_slot_totals
+from user_auth.models import CustomUser
+
+from tests.test_enrollment_admission import create_course, create_students
+
+
+class SeatShardTest(TestCase):
+    """
+    测试分片座位计数：启用/关闭时计数转移、容量保证、槽位名额用尽时重新分配
+    """
+    def setUp(self):
+        self.client = APIClient()
+        self.user = CustomUser.objects.create_user(username='shards', password='testpassword')
+        self.client.force_authenticate(user=self.user)
+        self.course = create_course('SHD001', 4)
+        self.students = create_students(6, 'SHD')
+
+    def _enroll(self, student):
+        data = {'student': student.id, 'course': self.course.id}
+        return self.client.post(reverse('enrollment-list'), data, format='json')
+
+    def _configure(self, shards):
+        call_command('configure_seat_shards', self.course.id, '--shards', str(shards), stdout=StringIO())
+
+    def test_enable_and_disable_move_counts(self):
+        """启用分片时计数转入槽位，关闭时汇总回课程行"""
+        Enrollment.objects.create(student=self.students[0], course=self.course)
+        self._configure(3)
+
+        self.course.refresh_from_db()
+        self.assertEqual((self.course.seat_shards, self.course.enrolled_count), (3, 0))
+        slots = CourseSeatSlot.objects.filter(course=self.course)
+        self.assertEqual(slots.count(), 3)
+        self.assertEqual(sum(slot.capacity for slot in slots), 4)
+        self.assertEqual(get_slot_totals(self.course.id), (1, 0))
+
+        response = self.client.get(reverse('course-current-status', args=[self.course.id]))
+        self.assertEqual(response.data['current_students'], 1)
+
+        self._configure(0)
+        self.course.refresh_from_db()
+        self.assertEqual((self.course.seat_shards, self.course.enrolled_count), (0, 1))
+        self.assertFalse(CourseSeatSlot.objects.exists())
+
+    def test_capacity_holds_and_dry_slot_rebalances(self):
+        """随机槽位名额用尽时重新分配剩余名额，总人数不超过上限"""
+        self._configure(4)
+
+        # 固定选中0号槽位，第2个请求起都需要重新分配名额
+        with mock.patch('course.seat_slots.random.randrange', return_value=0):
+            results = [self._enroll(student).status_code for student in self.students[:5]]
+        self.assertEqual(results.count(status.HTTP_201_CREATED), 4)
+        self.assertEqual(results[-1], status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(get_slot_totals(self.course.id), (4, 0))
+
+        # 退课后名额回到槽位，可以再次选课
+        Enrollment.objects.filter(student=self.students[0]).delete()
+        self.assertEqual(get_slot_totals(self.course.id), (3, 0))
+        self.assertEqual(self._enroll(self.students[5]).status_code, status.HTTP_201_CREATED)
+
+        call_command('sync_enrollment_counts', stdout=StringIO())
+
+    def test_lowering_capacity_rebalances_slots(self):
+        """分片课程调小人数上限后，槽位名额按新上限重新分配"""
+        self._configure(2)
+        self.assertEqual(self._enroll(self.students[0]).status_code, status.HTTP_201_CREATED)
+
+        course = Course.objects.get(pk=self.course.pk)
+        course.max_students = 1
+        course.save()
+
+        self.assertEqual(sum(CourseSeatSlot.objects.values_list('capacity', flat=True)), 1)
+        self.assertEqual(self._enroll(self.students[1]).status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_sync_command_fixes_slot_drift(self):
+        """管理命令能够检测并修复槽位计数漂移"""
+        self._configure(2)
+        Enrollment.objects.create(student=self.students[0], course=self.course)
+        CourseSeatSlot.objects.filter(course=self.course).update(enrolled=3)
+
+        call_command('sync_enrollment_counts', '--fix', stdout=StringIO())
+        self.assertEqual(get_slot_totals(self.course.id), (1, 0))
+
+
+@skipUnlessDBFeature('has_select_for_update')
+class SeatShardBenchmark(TransactionTestCase):
+    """
+    使用真实线程并发选课，对比单计数行与分片计数的吞吐量
+    SQLite 不支持行级锁，该测试仅在 MySQL/PostgreSQL 上运行
+    """
+    CAPACITY = 150
+    REQUESTS = 200
+    WORKERS = 16
+    SHARDS = 8
+
+    def setUp(self):
+        self.user = CustomUser.objects.create_user(username='shardbench', password='testpassword')
+        self.students = create_students(self.REQUESTS, 'SHB')
+
+    def _run(self, code, shards):
+        course = create_course(code, self.CAPACITY)
+        if shards:
+            call_command('configure_seat_shards', course.id, '--shards', str(shards), stdout=StringIO())
+        url = reverse('enrollment-list')
+
+        def enroll(student_id):
+            client = APIClient()
+            client.force_authenticate(user=self.user)
+            try:
+                response = client.post(url, {'student': student_id, 'course': course.id}, format='json')
+                return response.status_code
+            finally:
+                connection.close()
+
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=self.WORKERS) as executor:
+            results = list(executor.map(enroll, [s.id for s in self.students]))
+        elapsed = time.perf_counter() - started
+
+        course.refresh_from_db()
+        enrolled = get_slot_totals(course.id)[0] if shards else course.enrolled_count
+        self.assertEqual(results.count(status.HTTP_201_CREATED), self.CAPACITY)
+        self.assertEqual(Enrollment.objects.filter(course=course).count(), self.CAPACITY)
+        self.assertEqual(enrolled, self.CAPACITY)
+
+        label = f'{shards} 槽位' if shards else '单计数行'
+        print(f'\n[{label}] {self.REQUESTS} 个请求 / {self.WORKERS} 线程：'
+              f'耗时 {elapsed:.3f}s，处理 {self.REQUESTS / elapsed:.1f} 请求/秒')
+        return elapsed
+
+    def test_single_counter_vs_sharded(self):
+        """单计数行与分片计数在并发下都不超卖，并输出吞吐量"""
+        # 在主线程中切换准入模式，override_settings 不是线程安全的
+        with override_settings(ENROLLMENT_ADMISSION_MODE='conditional'):
+            self._run('SHB-SINGLE', 0)
+            self._run('SHB-SHARDED', self.SHARDS)
@@ -0,0 +1,103 @@
+from datetime import date
+
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from course.models import Enrollment, TeachingAssignment
+from teacher.models import Teacher
+from user_auth.models import CustomUser
+
+from tests.test_enrollment_admission import create_course, create_students
+
+
+class SparseFieldsTest(TestCase):
+    """
+    测试 ?fields= / ?omit= 稀疏字段集：只输出指定字段，去掉的代价较高字段不再查询
+    """
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.user = CustomUser.objects.create_user(username='sparse', password='testpassword')
+        self.client.force_authenticate(user=self.user)
+        self.course = create_course('SPARSE001', 10)
+        self.teacher = Teacher.objects.create(
+            user=self.user,
+            name='字段教师',
+            age=40,
+            gender='男',
+            title='教授',
+            department='测试学院',
+            email='sparseteacher@example.com',
+            phone='13800000000',
+            hire_date=date(2020, 1, 1),
+        )
+        TeachingAssignment.objects.create(teacher=self.teacher, course=self.course, teaching_hours=32)
+        self.student = create_students(1, 'SPS')[0]
+        Enrollment.objects.create(student=self.student, course=self.course)
+
+    def _get(self, name, params, args=None):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse(name, args=args), params)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return response, ' '.join(query['sql'] for query in queries)
+
+    def test_course_fields_skip_queries(self):
+        """课程列表只输出 id 和 name 时不预取教师、不关联教室、不附加人数注解"""
+        response, sql = self._get('course-list', {'fields': 'id,name'})
+        self.assertEqual(list(response.data['results'][0]), ['id', 'name'])
+        self.assertNotIn('course_teachingassignment', sql)
+        self.assertNotIn('course_classroom', sql)
+        self.assertNotIn('course_courseseatslot', sql)
+
+        response, sql = self._get('course-search', {'omit': 'teachers,current_students', 'code': 'SPARSE'})
+        self.assertNotIn('teachers', response.data['results'][0])
+        self.assertNotIn('current_students', response.data['results'][0])
+        self.assertIn('description', response.data['results'][0])
+        self.assertNotIn('course_teachingassignment', sql)
+
+        response, _ = self._get('course-list', {})
+        self.assertEqual(response.data['results'][0]['teachers'][0]['name'], '字段教师')
+        self.assertEqual(response.data['results'][0]['current_students'], 1)
+
+    def test_nested_serializers_kept_whole(self):
+        """稀疏字段只作用于顶层，嵌套的授课记录保持完整"""
+        response, _ = self._get('course-detail', {'fields': 'id,teaching_assignments'}, args=[self.course.id])
+        self.assertEqual(list(response.data), ['id', 'teaching_assignments'])
+        self.assertEqual(response.data['teaching_assignments'][0]['teacher_name'], '字段教师')
+
+    def test_related_joins_follow_fields(self):
+        """教师、选课列表按输出字段决定是否关联查询"""
+        response, sql = self._get('teacher-list', {'fields': 'id,name'})
+        self.assertEqual(list(response.data['results'][0]), ['id', 'name'])
+        self.assertNotIn('auth_users', sql)
+        response, sql = self._get('teacher-list', {'fields': 'id,username'})
+        self.assertEqual(response.data['results'][0]['username'], 'sparse')
+        self.assertIn('auth_users', sql)
+
+        with self.assertNumQueries(2):
+            response = self.client.get(reverse('enrollment-list'), {'fields': 'id,score'})
+        self.assertEqual(list(response.data['results'][0]), ['id', 'score'])
+        with self.assertNumQueries(2):
+            response = self.client.get(reverse('enrollment-list'))
+        self.assertEqual(response.data['results'][0]['student_name'], self.student.name)
+
+    def test_writes_ignore_sparse_params(self):
+        """写请求不裁剪字段"""
+        payload = {
+            'name': '写入学生',
+            'age': 20,
+            'gender': '男',
+            'class_name': '字段班',
+            'student_id': 'SPSW0001',
+            'college': '测试学院',
+            'major': '测试专业',
+            'email': 'spsw@example.com',
+        }
+        response = self.client.post(f"{reverse('student-list')}?fields=id", payload, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(response.data['email'], 'spsw@example.com')
@@ -0,0 +1,283 @@
+import random
+import time
+from datetime import date
+from io import StringIO
+
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from course import occupancy, schedule_import, timetable
+from course.models import Classroom, Course, Schedule, TeachingAssignment, TimetableJob
+from teacher.models import Teacher
+from user_auth.models import CustomUser
+
+from tests.test_schedule_occupancy import create_teacher
+
+SEMESTER = '2025-2026-1'
+
+
+def create_timetable_course(code, max_students, total_hours=32):
+    """创建待自动排课的线下课程"""
+    return Course.objects.create(
+        name=f'排课测试课程{code}',
+        code=code,
+        credits=2,
+        total_hours=total_hours,
+        semester=SEMESTER,
+        teaching_method='offline',
+        max_students=max_students,
+    )
+
+
+def assert_conflict_free(testcase, rows, teachers):
+    """生成的排课在教室和教师上两两不冲突（按批量导入的扫描线检查）"""
+    groups = {}
+    for index, row in enumerate(rows):
+        interval = (row['start_section'], row['end_section'], row['week_pattern'], index)
+        for cell in occupancy.schedule_cells(row['classroom'], teachers[row['teaching_assignment']], row['day_of_week']):
+            groups.setdefault(cell, []).append(interval)
+    for cell, intervals in groups.items():
+        testcase.assertEqual(schedule_import.sweep(intervals), set(), cell)
+
+
+@override_settings(TIMETABLE_JOB_WORKER=False, TIMETABLE_DAYS=1, TIMETABLE_SLOTS=((1, 2), (3, 4)), TIMETABLE_WEEKS=16)
+class TimetableSolverTest(TestCase):
+    """
+    测试自动排课：课时折算、容量约束、已有排课视为固定、局部调整、部分解
+    """
+    def setUp(self):
+        cache.clear()
+        self.teacher = create_teacher('排课教师', 'ttteacher@example.com')
+        self.other_teacher = create_teacher('排课教师2', 'ttteacher2@example.com')
+        self.room = Classroom.objects.create(name='排课教室大', location='三号楼', capacity=60)
+        self.small_room = Classroom.objects.create(name='排课教室小', location='三号楼', capacity=10)
+
+    def _assign(self, course, teacher):
+        return TeachingAssignment.objects.create(teacher=teacher, course=course, teaching_hours=course.total_hours)
+
+    def test_session_patterns(self):
+        """每周课次按总课时折算，不足一整次的部分排为单双周课"""
+        self.assertEqual(timetable.session_patterns(32, 2, 16), ['all'])
+        self.assertEqual(timetable.session_patterns(48, 2, 16), ['all', timetable.HALF])
+        self.assertEqual(timetable.session_patterns(16, 2, 16), [timetable.HALF])
+        self.assertEqual(timetable.session_patterns(64, 2, 16), ['all', 'all'])
+        self.assertEqual(timetable.session_patterns(0, 2, 16), [])
+
+    def test_repair_moves_blocking_session(self):
+        """贪心先排的课程挡住了只能在该时段上课的课程时，把它挪到别的时段"""
+        first = create_timetable_course('TT001', 30)
+        second = create_timetable_course('TT002', 30)
+        self._assign(first, self.teacher)
+        second_assignment = self._assign(second, self.other_teacher)
+        # 第二位教师第3-4节已在小教室上课
+        fixed_course = create_timetable_course('TTFIX', 5)
+        fixed_course.semester = 'other'
+        fixed_course.save()
+        Schedule.objects.create(
+            course=fixed_course, classroom=self.small_room,
+            teaching_assignment=self._assign(fixed_course, self.other_teacher),
+            day_of_week=1, start_section=3, end_section=4,
+        )
+
+        schedules, unplaced = timetable.solve(SEMESTER, time_budget=5)
+        self.assertEqual(unplaced, [])
+        slots = {row['course']: (row['classroom'], row['start_section']) for row in schedules}
+        self.assertEqual(slots[first.id], (self.room.id, 3))
+        self.assertEqual(slots[second.id], (self.room.id, 1))
+        self.assertEqual(
+            [row['teaching_assignment'] for row in schedules if row['course'] == second.id], [second_assignment.id]
+        )
+
+    def test_partial_solution(self):
+        """排不下的课程整门放弃，结果中列出原因；单双周课次共用同一时段的教室"""
+        courses = [create_timetable_course(f'TTP{i}', 30, total_hours=16) for i in range(4)]
+        for course in courses:
+            self._assign(course, create_teacher(f'教师{course.code}', f'tt{course.code.lower()}@example.com'))
+        too_big = create_timetable_course('TTBIG', 100)
+        self._assign(too_big, self.teacher)
+        create_timetable_course('TTNOA', 30)
+        heavy = create_timetable_course('TTHVY', 30, total_hours=64)
+        self._assign(heavy, self.other_teacher)
+        full = create_timetable_course('TTFUL', 30)
+        self._assign(full, self.teacher)
+
+        schedules, unplaced = timetable.solve(SEMESTER, time_budget=5)
+        reasons = {item['code']: item['reason'] for item in unplaced}
+        self.assertEqual(reasons, {
+            'TTBIG': timetable.NO_ROOM,
+            'TTNOA': timetable.NO_ASSIGNMENT,
+            'TTHVY': timetable.TOO_MANY_SESSIONS,
+            'TTFUL': timetable.NO_SLOT,
+        })
+        # 4门单双周课在大教室的两个时段上两两拼成整周
+        self.assertEqual(len(schedules), 4)
+        self.assertEqual({row['week_pattern'] for row in schedules}, {'odd', 'even'})
+        self.assertEqual({row['classroom'] for row in schedules}, {self.room.id})
+        teachers = dict(TeachingAssignment.objects.values_list('id', 'teacher_id'))
+        assert_conflict_free(self, schedules, teachers)
+
+        # 时间预算为0时不求解，全部作为部分解返回
+        schedules, unplaced = timetable.solve(SEMESTER, time_budget=0)
+        self.assertEqual(schedules, [])
+        self.assertIn(timetable.OUT_OF_TIME, {item['reason'] for item in unplaced})
+
+    def test_write_conflict_leaves_course_unchanged(self):
+        """写入时有一条排课冲突的课程整门不写入，教室和人数上限保持原值"""
+        course = create_timetable_course('TTWC', 30, total_hours=64)
+        assignment = self._assign(course, self.teacher)
+        fixed_course = create_timetable_course('TTWCF', 5)
+        Schedule.objects.create(
+            course=fixed_course, classroom=self.small_room,
+            teaching_assignment=self._assign(fixed_course, self.other_teacher),
+            day_of_week=1, start_section=3, end_section=4,
+        )
+        rows = [
+            {
+                'course': course.id, 'classroom': classroom.id, 'teaching_assignment': assignment.id,
+                'day_of_week': 1, 'start_section': start, 'end_section': start + 1, 'week_pattern': 'all',
+            }
+            for classroom, start in ((self.room, 1), (self.small_room, 3))
+        ]
+
+        written, unplaced = timetable.commit(rows, [])
+        self.assertEqual(written, [])
+        self.assertEqual(unplaced, [{'course': course.id, 'code': 'TTWC', 'reason': timetable.WRITE_CONFLICT}])
+        self.assertFalse(Schedule.objects.filter(course=course).exists())
+        course.refresh_from_db()
+        self.assertEqual((course.classroom_id, course.max_students), (None, 30))
+        mask = occupancy.get_masks([(occupancy.CLASSROOM, self.room.id, 1)])[(occupancy.CLASSROOM, self.room.id, 1)]
+        self.assertEqual(mask, 0)
+
+    def test_command_writes_schedules(self):
+        """命令写入排课并维护占用位图，已排课的课程不再重复排课"""
+        course = create_timetable_course('TTCMD', 30, total_hours=16)
+        self._assign(course, self.teacher)
+        out = StringIO()
+        call_command('generate_timetable', semester=SEMESTER, dry_run=True, stdout=out)
+        self.assertIn('试算 1 条排课', out.getvalue())
+        self.assertFalse(Schedule.objects.exists())
+
+        call_command('generate_timetable', semester=SEMESTER, stdout=out)
+        schedule = Schedule.objects.get(course=course)
+        self.assertEqual((schedule.classroom_id, schedule.start_section, schedule.week_pattern), (self.room.id, 1, 'odd'))
+        mask = occupancy.get_masks([(occupancy.TEACHER, self.teacher.id, 1)])[(occupancy.TEACHER, self.teacher.id, 1)]
+        self.assertEqual(mask, occupancy.slot_mask(1, 2, 'odd'))
+        job = TimetableJob.objects.latest('id')
+        self.assertEqual(job.schedules[0]['id'], schedule.id)
+
+        call_command('generate_timetable', semester=SEMESTER, stdout=out)
+        self.assertEqual(Schedule.objects.count(), 1)
+
+
+@override_settings(TIMETABLE_JOB_WORKER=False)
+class TimetableJobApiTest(TestCase):
+    """
+    测试自动排课任务接口：管理员提交、后台执行、轮询结果
+    """
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.admin = CustomUser.objects.create_user(username='ttadmin', password='testpassword', user_type='admin')
+        course = create_timetable_course('TTAPI', 30)
+        TeachingAssignment.objects.create(
+            teacher=create_teacher('接口教师', 'ttapi@example.com'), course=course, teaching_hours=32
+        )
+        Classroom.objects.create(name='接口教室', location='三号楼', capacity=40)
+
+    def test_submit_and_poll(self):
+        """提交后返回202和状态地址，任务执行后可查到生成的排课"""
+        user = CustomUser.objects.create_user(username='ttuser', password='testpassword')
+        self.client.force_authenticate(user=user)
+        response = self.client.post(reverse('timetablejob-list'), {'semester': SEMESTER}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+        self.client.force_authenticate(user=self.admin)
+        response = self.client.post(
+            reverse('timetablejob-list'), {'semester': SEMESTER, 'time_budget': 0}, format='json'
+        )
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        response = self.client.post(
+            reverse('timetablejob-list'), {'semester': SEMESTER, 'time_budget': 5}, format='json'
+        )
+        self.assertEqual(response.status_code, status.HTTP_202_ACCEPTED)
+        self.assertEqual(response.data['status'], TimetableJob.STATUS_PENDING)
+        status_url = response['Location']
+
+        call_command('generate_timetable', pending=True, stdout=StringIO())
+        response = self.client.get(status_url)
+        self.assertEqual(response.data['status'], TimetableJob.STATUS_COMPLETED)
+        self.assertEqual(response.data['placed_count'], 1)
+        self.assertEqual(response.data['unplaced'], [])
+        self.assertEqual(Schedule.objects.get().id, response.data['schedules'][0]['id'])
+
+        # 已领取的任务不会重复执行
+        self.assertIsNone(timetable.run_job(response.data['id']))
+
+
+class TimetableBenchmark(TestCase):
+    """
+    基准：500门课程、100间教室、200位教师的学期自动排课
+    """
+    COURSES = 500
+    ROOMS = 100
+    TEACHERS = 200
+    TIME_BUDGET = 30
+
+    @classmethod
+    def setUpTestData(cls):
+        rng = random.Random(11)
+        users = CustomUser.objects.bulk_create([
+            CustomUser(username=f'ttbench{i}', password='!') for i in range(cls.TEACHERS)
+        ])
+        teachers = Teacher.objects.bulk_create([
+            Teacher(
+                user=user, name=f'排课基准教师{i}', age=40, gender='男', title='讲师', department='测试学院',
+                email=f'ttbench{i}@example.com', phone='13800000000', hire_date=date(2020, 1, 1),
+            )
+            for i, user in enumerate(users)
+        ])
+        Classroom.objects.bulk_create([
+            Classroom(name=f'排课基准教室{i}', location='基准楼', capacity=(40, 60, 80, 120, 200)[i % 5])
+            for i in range(cls.ROOMS)
+        ])
+        courses = Course.objects.bulk_create([
+            Course(
+                name=f'排课基准课程{i}', code=f'TTB{i:04d}', credits=2, total_hours=rng.choice((32, 48, 64)),
+                semester=SEMESTER, teaching_method='offline', max_students=rng.randint(20, 180),
+            )
+            for i in range(cls.COURSES)
+        ])
+        TeachingAssignment.objects.bulk_create([
+            TeachingAssignment(teacher=teachers[i % cls.TEACHERS], course=course, teaching_hours=course.total_hours)
+            for i, course in enumerate(courses)
+        ])
+
+    def test_solve_semester(self):
+        """在时间预算内排入全部课程，生成的排课互不冲突"""
+        max_students = dict(Course.objects.values_list('id', 'max_students'))
+        started = time.perf_counter()
+        schedules, unplaced = timetable.solve(SEMESTER, time_budget=self.TIME_BUDGET)
+        solve_time = time.perf_counter() - started
+
+        started = time.perf_counter()
+        with self.captureOnCommitCallbacks(execute=True):
+            written, unplaced = timetable.commit(schedules, unplaced)
+        write_time = time.perf_counter() - started
+
+        print(
+            f'\n[自动排课] {self.COURSES} 门课程、{self.ROOMS} 间教室、{self.TEACHERS} 位教师：'
+            f'求解 {solve_time * 1000:.0f}ms，写入 {len(written)} 条排课 {write_time * 1000:.0f}ms，'
+            f'未排入 {len(unplaced)} 门'
+        )
+        self.assertEqual(unplaced, [])
+        self.assertLess(solve_time, self.TIME_BUDGET)
+        self.assertEqual(Schedule.objects.count(), len(schedules))
+        teachers = dict(TeachingAssignment.objects.values_list('id', 'teacher_id'))
+        assert_conflict_free(self, written, teachers)
+        capacities = dict(Classroom.objects.values_list('id', 'capacity'))
+        for row in written:
+            self.assertGreaterEqual(capacities[row['classroom']], max_students[row['course']])
@@ -0,0 +1,158 @@
+import time
+from datetime import date
+
+from django.core.cache import cache
+from django.test import TestCase
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.renderers import JSONRenderer
+from rest_framework.request import Request
+from rest_framework.test import APIClient, APIRequestFactory
+
+from course.models import Classroom, Enrollment, Schedule, TeachingAssignment
+from course.serializers import CourseSerializer, EnrollmentSerializer, ScheduleSerializer
+from python_web_student_system.values_serializers import ValuesSerializer
+from student.models import Student
+from student.serializers import StudentSerializer
+from teacher.models import Teacher
+from user_auth.models import CustomUser
+
+from tests.test_enrollment_admission import create_course, create_students
+
+
+def render(data):
+    return JSONRenderer().render(data)
+
+
+class ValuesSerializerTest(TestCase):
+    """
+    测试 values 快速序列化路径：输出与 ModelSerializer 逐字节一致
+    """
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.user = CustomUser.objects.create_user(username='values', password='testpassword')
+        self.client.force_authenticate(user=self.user)
+        self.course = create_course('VALUES001', 10)
+        self.students = create_students(3, 'VAL')
+        Enrollment.objects.create(student=self.students[0], course=self.course, score=87.5)
+        Enrollment.objects.create(student=self.students[1], course=self.course)
+        Enrollment.objects.create(student=self.students[2], course=self.course, score=60)
+        teacher = Teacher.objects.create(
+            user=self.user,
+            name='快速教师',
+            age=40,
+            gender='男',
+            title='教授',
+            department='测试学院',
+            email='valuesteacher@example.com',
+            phone='13800000000',
+            hire_date=date(2020, 1, 1),
+        )
+        assignment = TeachingAssignment.objects.create(teacher=teacher, course=self.course, teaching_hours=32)
+        classroom = Classroom.objects.create(name='快速教室', location='三号楼', capacity=30)
+        for day in (3, 1):
+            Schedule.objects.create(
+                course=self.course,
+                classroom=classroom,
+                teaching_assignment=assignment,
+                day_of_week=day,
+                start_section=1,
+                end_section=2,
+            )
+
+    def _expected(self, serializer_class, queryset, params=None):
+        """用 ModelSerializer 序列化同一查询集得到的 JSON"""
+        request = Request(APIRequestFactory().get('/', params or {}))
+        return render(serializer_class(queryset, many=True, context={'request': request}).data)
+
+    def test_byte_identical_list_endpoints(self):
+        """选课、学生、排课列表的输出与 ModelSerializer 完全相同，稀疏字段同样生效"""
+        cases = [
+            ('enrollment-list', EnrollmentSerializer, Enrollment.objects.order_by('enroll_date', 'id')),
+            ('student-list', StudentSerializer, Student.objects.order_by('student_id', 'id')),
+            ('schedule-list', ScheduleSerializer, Schedule.objects.order_by('day_of_week', 'start_section', 'id')),
+        ]
+        for name, serializer_class, queryset in cases:
+            for params in ({}, {'fields': 'id,course_name'}, {'omit': 'id'}):
+                with self.subTest(name=name, params=params):
+                    response = self.client.get(reverse(name), params)
+                    self.assertEqual(response.status_code, status.HTTP_200_OK)
+                    self.assertEqual(
+                        render(response.data['results']),
+                        self._expected(serializer_class, queryset, params),
+                    )
+
+    def test_roster_and_cursor_pages(self):
+        """选课名单与 ModelSerializer 输出一致；键集分页按 values 行生成游标"""
+        response = self.client.get(reverse('course-roster', args=[self.course.id]))
+        queryset = Enrollment.objects.filter(course=self.course).order_by('enroll_date', 'id')
+        self.assertEqual(render(response.data['results']), render(EnrollmentSerializer(queryset, many=True).data))
+
+        ids = []
+        url = reverse('enrollment-list') + '?cursor=&page_size=2'
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            ids.extend(row['id'] for row in response.data['results'])
+            url = response.data['next']
+        self.assertEqual(ids, list(queryset.values_list('id', flat=True)))
+
+    def test_unsupported_serializer_falls_back(self):
+        """包含方法字段或嵌套序列化器的序列化器不走快速路径"""
+        self.assertFalse(ValuesSerializer(CourseSerializer).supported)
+        self.assertTrue(ValuesSerializer(EnrollmentSerializer).supported)
+
+
+class ValuesSerializerBenchmark(TestCase):
+    """
+    微基准：5000 条选课记录分别用 ModelSerializer 和 ValuesSerializer 序列化
+    """
+    ROWS = 5000
+
+    @classmethod
+    def setUpTestData(cls):
+        course = create_course('VALBENCH', cls.ROWS)
+        students = Student.objects.bulk_create([
+            Student(
+                name=f'基准学生{i}',
+                age=20,
+                gender='男',
+                class_name='基准班',
+                student_id=f'VB{i:05d}',
+                college='测试学院',
+                major='测试专业',
+                email=f'vb{i}@example.com',
+            )
+            for i in range(cls.ROWS)
+        ])
+        Enrollment.objects.bulk_create([
+            Enrollment(student=student, course=course, score=i % 100 if i % 3 else None)
+            for i, student in enumerate(students)
+        ])
+
+    def _best_of(self, build, rounds=3):
+        best = None
+        for _ in range(rounds):
+            started = time.perf_counter()
+            output = render(build())
+            elapsed = time.perf_counter() - started
+            best = elapsed if best is None else min(best, elapsed)
+        return output, best
+
+    def test_values_path_matches(self):
+        """两种方式输出相同（耗时只打印，不作断言）"""
+        queryset = Enrollment.objects.order_by('enroll_date', 'id')
+        values_serializer = ValuesSerializer(EnrollmentSerializer)
+
+        slow, slow_time = self._best_of(
+            lambda: EnrollmentSerializer(queryset.select_related('student', 'course'), many=True).data
+        )
+        fast, fast_time = self._best_of(
+            lambda: values_serializer.to_representation(values_serializer.values(queryset))
+        )
+        print(
+            f'\n[values 序列化] {self.ROWS} 条选课记录：ModelSerializer {slow_time * 1000:.0f}ms，'
+            f'ValuesSerializer {fast_time * 1000:.0f}ms，加速 {slow_time / fast_time:.1f}x'
+        )
+        self.assertEqual(fast, slow)
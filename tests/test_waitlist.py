@@ -0,0 +1,116 @@
+from django.test import TestCase
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from course.models import Course, Enrollment, Waitlist
+from student.models import Student
+from user_auth.models import CustomUser
+
+
+class WaitlistTest(TestCase):
+    """
+    测试课程候补名单：满员后加入候补、位次查询、退课后自动转正
+    """
+    def setUp(self):
+        self.client = APIClient()
+        self.user = CustomUser.objects.create_user(username='waitlist', password='testpassword')
+        self.client.force_authenticate(user=self.user)
+        self.course = Course.objects.create(
+            name='候补测试课程',
+            code='WAIT001',
+            credits=2,
+            total_hours=32,
+            semester='2024-2025-1',
+            teaching_method='offline',
+            max_students=1,
+        )
+        self.students = [
+            Student.objects.create(
+                name=f'候补学生{i}',
+                age=20,
+                gender='女',
+                class_name='候补班',
+                student_id=f'WAIT{i:03d}',
+                college='测试学院',
+                major='测试专业',
+                email=f'wait{i}@example.com',
+            )
+            for i in range(4)
+        ]
+        self.enrollment = Enrollment.objects.create(student=self.students[0], course=self.course)
+        self.waitlist_url = reverse('course-waitlist', args=[self.course.id])
+
+    def _join(self, student):
+        return self.client.post(self.waitlist_url, {'student': student.id}, format='json')
+
+    def test_join_and_position(self):
+        """满员课程可加入候补，位次和候补人数正确"""
+        self.assertEqual(self._join(self.students[1]).data['rank'], 1)
+        self.assertEqual(self._join(self.students[2]).data['rank'], 2)
+
+        # 重复加入和已选课学生加入都会被拒绝
+        self.assertEqual(self._join(self.students[1]).status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(self._join(self.students[0]).status_code, status.HTTP_400_BAD_REQUEST)
+
+        response = self.client.get(self.waitlist_url)
+        self.assertEqual(response.data['waitlist_length'], 2)
+
+        url = reverse('course-waitlist-position', args=[self.course.id])
+        response = self.client.get(url, {'student_id': self.students[2].id})
+        self.assertEqual(response.data['rank'], 2)
+
+        # 前一位退出候补后位次前移
+        self.client.delete(f'{self.waitlist_url}?student_id={self.students[1].id}')
+        response = self.client.get(url, {'student_id': self.students[2].id})
+        self.assertEqual(response.data['rank'], 1)
+
+    def test_join_rejected_when_seats_available(self):
+        """课程尚有名额时不能加入候补"""
+        self.enrollment.delete()
+        response = self._join(self.students[1])
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_promotion_on_drop(self):
+        """退课后首位候补学生在同一事务中转为正式选课"""
+        self._join(self.students[1])
+        self._join(self.students[2])
+
+        response = self.client.delete(reverse('enrollment-detail', args=[self.enrollment.id]))
+        self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
+
+        self.assertTrue(Enrollment.objects.filter(course=self.course, student=self.students[1]).exists())
+        self.assertEqual(list(Waitlist.objects.values_list('student_id', flat=True)), [self.students[2].id])
+        self.course.refresh_from_db()
+        self.assertEqual(self.course.enrolled_count, 1)
+
+    def test_promotion_on_course_change(self):
+        """选课记录换到其他课程后，原课程释放的座位转给首位候补学生"""
+        self._join(self.students[1])
+        other_course = Course.objects.create(
+            name='候补测试课程2', code='WAIT002', credits=2, total_hours=32,
+            semester='2024-2025-1', teaching_method='offline', max_students=1,
+        )
+        response = self.client.patch(
+            reverse('enrollment-detail', args=[self.enrollment.id]), {'course': other_course.id}, format='json'
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(Enrollment.objects.filter(course=self.course, student=self.students[1]).exists())
+        self.assertFalse(Waitlist.objects.exists())
+        counts = dict(Course.objects.values_list('code', 'enrolled_count'))
+        self.assertEqual(counts, {'WAIT001': 1, 'WAIT002': 1})
+
+    def test_promotion_on_student_deletion(self):
+        """删除学生级联释放的座位同样触发候补转正"""
+        self._join(self.students[1])
+        self.students[0].delete()
+        self.assertTrue(Enrollment.objects.filter(course=self.course, student=self.students[1]).exists())
+        self.assertFalse(Waitlist.objects.exists())
+
+    def test_course_deletion_skips_promotion(self):
+        """删除课程时不做候补转正"""
+        self._join(self.students[1])
+        response = self.client.delete(reverse('course-detail', args=[self.course.id]))
+        self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
+        self.assertFalse(Enrollment.objects.exists())
+        self.assertFalse(Waitlist.objects.exists())